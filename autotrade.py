@@ -1,31 +1,27 @@
 import os
-import io
-import ta
 import json
+import atexit
 import time
-import base64
 import logging
-import pyupbit
-import requests
-import pandas as pd
-import mysql.connector
-import google.generativeai as genai
-
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
-
-from PIL import Image
+
+from functools import partial
 from dotenv import load_dotenv
-from ta.utils import dropna
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+# pandas/pyupbit/selenium/matplotlib/Gemini SDK/MySQL 같은 무거운 의존성은 setup() 또는 처음 쓰는 함수에서 import
+from pipeline import Pipeline, Stage
+from event_trigger import EventTrigger, VolatilityTrigger, UpbitTickerSource, ReplaySource
+from orderbook import LocalOrderbook, OrderbookFeed
+from portfolio import INSERT_POSITION_SQL, market_currency, get_current_prices, get_orderbooks, holdings, portfolio_value, position_rows
+from rollups import rollup_rows, UPSERT_ROLLUP_SQL
+from execution import OrderExecutor, INSERT_EXECUTION_SQL, execution_rows
+from decision_parser import DecisionError, request_decision, hold_decision
+from news_cache import NewsCache, parse_published
+from telemetry import CycleMetrics, INSERT_METRIC_SQL
+from trading_rules import MIN_ORDER_KRW, get_buy_amount, get_sell_amount, calculate_revenue_rate
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
 initial_capital = os.getenv('INITIAL_CAPITAL')
 gemini_key = os.getenv('GEMINI_KEY')
@@ -36,235 +32,126 @@ upbit_secret_key = os.getenv("UPBIT_SECRET_KEY")
 naver_client_key = os.getenv('NAVER_CLIENT_ID')
 naver_client_secret = os.getenv('NAVER_CLIENT_SECRET')
 serpapi_key = os.getenv("SERPAPI_API_KEY")
-
-def get_db_connection():
-    return mysql.connector.connect(
-        host=os.getenv('MYSQL_HOST'),
-        port=os.getenv('MYSQL_PORT'),
-        user=os.getenv('MYSQL_USER'),
-        password=os.getenv('MYSQL_PASSWORD'),
-        database=os.getenv('MYSQL_DB')
-    )
-
-def init_db():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS trades (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-            decision VARCHAR(10),
-            percentage INT,
-            reason TEXT,
-            btc_balance DECIMAL(18,8),
-            krw_balance DECIMAL(18,8),
-            btc_avg_buy_price DECIMAL(18,8),
-            btc_krw_price DECIMAL(18,8),
-            revenue_rate DECIMAL(6,2),
-            reflection TEXT
-        )
-    ''')
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-def log_trade(conn, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, revenue_rate, reflection=''):
-    cursor = conn.cursor()
-    timestamp = datetime.now().isoformat()
+trading_markets = [m.strip() for m in os.getenv('TRADING_MARKETS', 'KRW-BTC').split(',') if m.strip()]  # 예: KRW-BTC,KRW-ETH
+market_data_timeout = float(os.getenv('MARKET_DATA_TIMEOUT', '15'))  # 데이터 소스별 타임아웃(초)
+indicator_warmup = int(os.getenv('INDICATOR_WARMUP', '200'))  # 보조지표 누적에 사용할 최소 캔들 수
+prompt_token_budget = int(os.getenv('PROMPT_TOKEN_BUDGET', '12000'))  # 프롬프트 데이터 섹션 토큰 예산 (0이면 제한 없음)
+chart_source = os.getenv('CHART_SOURCE', 'render')  # render: OHLCV로 직접 그리기, capture: 업비트 차트 스크린샷
+chart_width = int(os.getenv('CHART_WIDTH', '1920'))
+chart_height = int(os.getenv('CHART_HEIGHT', '3000'))
+chart_image_format = os.getenv('CHART_IMAGE_FORMAT', 'png')  # png, webp, jpeg
+chart_image_quality = int(os.getenv('CHART_IMAGE_QUALITY', '85'))
+chart_image_max_width = int(os.getenv('CHART_IMAGE_MAX_WIDTH', '0')) or None
+chart_refresh_interval = float(os.getenv('CHART_REFRESH_INTERVAL', '900'))  # 캡처 모드에서 차트 페이지를 새로고침하는 주기(초)
+chart_archive_dir = os.getenv('CHART_ARCHIVE_DIR')  # 지정한 경우에만 차트 이미지를 디스크에 보관
+model_cache_ttl = int(os.getenv('MODEL_CACHE_TTL', '3600'))  # 같은 요청의 응답을 재사용할 시간(초)
+model_cache_size = int(os.getenv('MODEL_CACHE_SIZE', '64'))
+model_cache_path = os.getenv('MODEL_CACHE_PATH')  # 지정하면 응답을 파일에 기록 (replay 모드의 입력)
+model_client_mode = os.getenv('MODEL_CLIENT_MODE', 'live')  # live, replay
+reflection_timeout = float(os.getenv('REFLECTION_TIMEOUT', '120'))  # 초과 시 반성 없이 매매 결정 진행
+chart_timeout = float(os.getenv('CHART_TIMEOUT', '90'))  # 초과 시 차트 이미지 없이 매매 결정 진행
+decision_timeout = float(os.getenv('DECISION_TIMEOUT', '180'))  # 초과 시 해당 마켓은 관망
+streaming_mode = os.getenv('STREAMING_MODE', 'off')  # off, websocket, replay (정시 스케줄은 항상 유지)
+trigger_window = float(os.getenv('TRIGGER_WINDOW', '300'))  # 변동성 계산 구간(초)
+trigger_price_change = float(os.getenv('TRIGGER_PRICE_CHANGE', '0.01'))  # 구간 내 가격 변화율 임계값
+trigger_volatility = float(os.getenv('TRIGGER_VOLATILITY', '0.015'))  # 구간 내 실현 변동성 임계값
+trigger_cooldown = float(os.getenv('TRIGGER_COOLDOWN', '900'))  # 직전 사이클 이후 최소 간격(초)
+trigger_max_per_hour = int(os.getenv('TRIGGER_MAX_PER_HOUR', '2'))
+trigger_replay_path = os.getenv('TRIGGER_REPLAY_PATH')  # replay 모드의 timestamp,price CSV
+orderbook_max_age = float(os.getenv('ORDERBOOK_MAX_AGE', '5'))  # 로컬 호가창을 REST로 다시 받아올 기준(초)
+max_order_slippage = float(os.getenv('MAX_ORDER_SLIPPAGE', '1.0'))  # 예상 슬리피지(%)가 이보다 크면 주문 보류
+execution_strategy = os.getenv('EXECUTION_STRATEGY', 'market')  # market, limit (최우선 호가 지정가 후 미체결분 시장가)
+execution_slices = int(os.getenv('EXECUTION_SLICES', '1'))  # 1보다 크면 주문을 나눠 TWAP으로 실행
+execution_interval = float(os.getenv('EXECUTION_INTERVAL', '10'))  # 자식 주문 간격(초)
+limit_order_timeout = float(os.getenv('LIMIT_ORDER_TIMEOUT', '30'))  # 지정가 주문 체결 대기 시간(초)
+http_connect_timeout = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+http_read_timeout = float(os.getenv('HTTP_READ_TIMEOUT', '10'))  # 응답이 멈춘 엔드포인트가 사이클 전체를 막지 않도록
+http_retries = int(os.getenv('HTTP_RETRIES', '3'))  # 조회 요청 재시도 횟수 (주문 생성은 재시도하지 않음)
+news_google_interval = float(os.getenv('NEWS_GOOGLE_INTERVAL', '28800'))  # 구글 뉴스(SerpAPI) 갱신 주기(초)
+news_naver_interval = float(os.getenv('NEWS_NAVER_INTERVAL', '3600'))  # 네이버 뉴스 갱신 주기(초)
+news_naver_page_size = int(os.getenv('NEWS_NAVER_PAGE_SIZE', '20'))
+news_naver_max_pages = int(os.getenv('NEWS_NAVER_MAX_PAGES', '3'))
+news_top_k = int(os.getenv('NEWS_TOP_K', '10'))  # 소스별로 프롬프트에 넣을 최신 기사 수
+news_byte_budget = int(os.getenv('NEWS_BYTE_BUDGET', '2000'))  # 소스별 뉴스 JSON 최대 바이트
+
+# 프롬프트에 넣는 차트 데이터 (이름, 캔들 간격, 개수)
+OHLCV_FRAMES = [
+    ("df_daily", "day", 30),
+    ("df_4hourly", "minute240", 24),
+    ("df_hourly", "minute60", 24),
+]
+
+def log_trade(decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, revenue_rate, reflection='', fills=(), market="KRW-BTC", timestamp=None):
+    # btc_* 열에는 market 코인의 보유 수량/평균 매수가/가격을 기록
+    timestamp = timestamp or datetime.now().isoformat()
     
     sql = """INSERT INTO trades 
-             (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, revenue_rate, reflection) 
-             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
+             (timestamp, market, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, revenue_rate, reflection) 
+             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
              
-    values = (timestamp, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, revenue_rate, reflection)
+    values = (timestamp, market, decision, percentage, reason, btc_balance, krw_balance, btc_avg_buy_price, btc_krw_price, revenue_rate, reflection)
 
-    cursor.execute(sql, values)
-    conn.commit()
-    cursor.close()
+    db_writer.add(sql, values)
+
+    # 대시보드 집계 테이블을 같은 일괄 기록에 포함해 증분 갱신
+    for row in rollup_rows(timestamp, market, decision, btc_balance, krw_balance, btc_krw_price, revenue_rate):
+        db_writer.add(UPSERT_ROLLUP_SQL, row)
+
+    # 이번 거래의 주문별 실제 체결 내역
+    for row in execution_rows(timestamp, fills):
+        db_writer.add(INSERT_EXECUTION_SQL, row)
+
+def get_recent_trades(conn, market="KRW-BTC"):
+    import pandas as pd
 
-def get_recent_trades(conn):
     c = conn.cursor()
-    c.execute("SELECT * FROM trades ORDER BY timestamp DESC LIMIT 3")
+    c.execute("SELECT * FROM trades WHERE market = %s ORDER BY timestamp DESC LIMIT 3", (market,))
     columns = [column[0] for column in c.description]
     return pd.DataFrame.from_records(data=c.fetchall(), columns=columns)
 
-def calculate_performance(trades_df):
-    if trades_df.empty:
-        return 0
-    
-    initial_balance = trades_df.iloc[-1]['krw_balance'] + trades_df.iloc[-1]['btc_balance'] * trades_df.iloc[-1]['btc_krw_price']
-    final_balance = trades_df.iloc[0]['krw_balance'] + trades_df.iloc[0]['btc_balance'] * trades_df.iloc[0]['btc_krw_price']
-    
-    return (final_balance - initial_balance) / initial_balance * 100
-
 def generate_reflection(trades_df, current_market_data):
-    genai.configure(api_key=gemini_key)
-    
-    def get_ai_response(model_name):
-        model = genai.GenerativeModel(model_name)
-        
-        performance = calculate_performance(trades_df)
-        
-        system_prompt = """You are an AI trading assistant tasked with analyzing recent trading performance and current market conditions to generate insights and improvements for future trading decisions."""
-        
-        user_prompt = f"""Recent trading data:
-        {trades_df.to_json(orient='records')}
-        
-        Current market data:
-        {current_market_data}
-        
-        Overall performance over the last 3 transactions: {performance:.2f}%
-        
-        Please analyze this data and provide:
-        1. A brief reflection on the recent trading decisions
-        2. Insights on what worked well and what didn't
-        3. Suggestions for improvement in future trading decisions
-        4. Any patterns or trends you notice in the market data
-        
-        Limit your response to 250 words or less. (Strictly Follow!)"""
-        
-        logger.info(f"### AI 피드백 시작 (모델: {model_name}) ###")
-        response = model.generate_content([
+    from prompts import build_reflection_prompts
+
+    system_prompt, user_prompt = build_reflection_prompts(trades_df, current_market_data, prompt_token_budget)
+
+    logger.info(f"### AI 피드백 시작 (모델: {gemini_model}) ###")
+    try:
+        result = model_client.generate([
             {"role": "user", "parts": [{"text": system_prompt}]},
             {"role": "user", "parts": [{"text": user_prompt}]},
         ])
-        response_json = response.to_dict()
-        result = response_json["candidates"][0]["content"]["parts"][0]["text"]
-        logger.info(f"### AI 피드백: {result} ###")
-        return result
-    
-    try:
-        return get_ai_response(gemini_model)
     except Exception as e:
-        if "429" in str(e):  # Too Many Requests 오류 감지
-            logging.warning(f"429 Too Many Requests 발생. 백업 모델 {gemini_sub_model} 사용")
-            return get_ai_response(gemini_sub_model)
-        else:
-            logging.error(f"Gemini API 호출 중 오류 발생: {e}")
-            return "An error occurred during AI response"
-
-def generate_response(reflection, indicators_data):
-    genai.configure(api_key=gemini_key)
-    
-    def get_ai_response(model_name):
-        model = genai.GenerativeModel(model_name)
-        
-        system_prompt = f"""You are an expert in Bitcoin investing and strictly follow the trading principles of the legendary Korean Bitcoin trader 'Wonyo-ddi.' Analyze the provided chart image, which includes key technical indicators, along with market data, recent news headlines, and the Fear and Greed Index. Based on this analysis, determine whether to buy, sell, or hold at the moment while adhering to Wonyo-ddi's trading philosophy.
-
-        ### Wonyo-ddi's Trading Principles to Follow:
-        1. Strictly Chart-Based Trading
-        - Ignore fundamental news and external sentiment unless it directly impacts market structure.
-        - Rely primarily on price action and market structure for trade decisions.
-        - Use simple indicators, mainly candlestick patterns, moving averages, and price trends.
-        - Avoid excessive reliance on indicators like RSI, MACD, and Bollinger Bands, except for confirmation.
-
-        2. Market Sentiment & Adaptive Trading
-        - Gauge overall market sentiment through price action and volume.
-        - Adapt trading strategy based on market conditions:
-        - In bullish markets, weak bearish signals can be ignored.
-        - In bearish markets, weak bullish signals should not be trusted.
-        - Identify liquidity zones where large movements are likely to occur.
-
-        3. Risk Management & Capital Allocation
-        - Never invest more than 20-30% of total capital in a single trade.
-        - Use low leverage (preferably under 5x, avoid high leverage).
-        - Maintain a portion of capital for unexpected market movements and recovery.
-        - Use stop-loss only if trade setup is invalidated, rather than mechanical stop-loss levels.
-
-        4. Compounding & Position Management
-        - Focus on high win-rate trades over high reward-to-risk setups.
-        - Avoid taking large, high-risk positions that rely on one-time gains.
-        - Compound gains steadily over time instead of seeking single massive wins.
-
-        5. Practical Chart Application
-        - Use daily and 4-hour charts for trend direction.
-        - Use hourly charts for precision entries.
-        - Avoid noise from very small timeframes (e.g., 1-minute or 5-minute charts).
-        - Price action and volume analysis take precedence over lagging indicators.
-
-        ### Decision-Making Factors:
-        In your analysis, consider the following factors:  
-        - **Chart analysis** (MACD, ADX, RSI, Stochastic, Bollinger Bands, ATR, OBV, VWAP)  
-        - **Market data and trends**  
-        - **Recent news headlines and their potential impact on Bitcoin price**  
-        - **The Fear and Greed Index and its implications**  
-        - **Overall market sentiment**  
-        - Recent trading performance and reflection
-
-        Ensure that you analyze the trend strength, momentum, volatility, and accumulation behavior using the given indicators.  
-
-        ### Recent trading reflection:
-        {reflection}
-
-        ### Response Format:
-        1. Decision (buy, sell, or hold)
-        2. If the decision is 'buy', provide a percentage (1-100) of available KRW to use for buying. If the decision is 'sell', provide a percentage (1-100) of held BTC to sell. If the decision is 'hold', set the percentage to 0.
-        3. Reason for your decision
-
-        Ensure that the percentage is an integer between 1 and 100 for buy/sell decisions, and exactly 0 for hold decisions.
-        Your percentage should reflect the strength of your conviction in the decision based on the analyzed data.
-
-        Your response should be in JSON format as follows (Strictly Follow!):  
-
-        {'{"decision": "buy", "percentage": {"type": "integer"}, "reason": "some technical, fundamental, and sentiment-based reason"}'}
-        {'{"decision": "sell", "percentage": {"type": "integer"}, "reason": "some technical, fundamental, and sentiment-based reason"}'}
-        {'{"decision": "hold", "percentage": {"type": "integer"}, "reason": "some technical, fundamental, and sentiment-based reason"}'}\n\n"""
-        
-        # 행동 강령이 포함된 프롬프트
-        user_prompt = f"""### Data to provide
-        Current investment status: {json.dumps(indicators_data["filtered_balances"])}
-        Orderbook: {json.dumps(indicators_data["orderbook"])}
-        Daily OHLCV with indicators (30 days): {indicators_data["df_daily"].to_json()}
-        4-Hourly OHLCV with indicators (24 counts): {indicators_data["df_4hourly"].to_json()}
-        Hourly OHLCV with indicators (24 hours): {indicators_data["df_hourly"].to_json()}
-        Recent news headlines from Google: {json.dumps(indicators_data["google_news_headlines"])}
-        Recent news headlines from Naver: {json.dumps(indicators_data["naver_news_headlines"])}
-        Fear and Greed Index: {json.dumps(indicators_data["fear_greed_index"])}\n\n"""
-        
-        logger.info(f"### AI 매매 결정 시작 ###")
-        # AI 응답 받기
-        response = model.generate_content([
-            {"role": "user", "parts": [{"text": system_prompt}]}, 
-            {"role": "user", "parts": [{"text": user_prompt}]}, 
-            {"role": "user", "parts": [indicators_data["image_part"]]} 
-        ])
-        return response
-    
+        logging.error(f"Gemini API 호출 중 오류 발생: {e}")
+        return "An error occurred during AI response"
+    logger.info(f"### AI 피드백: {result} ###")
+    return result
+
+def generate_response(reflection, indicators_data, market="KRW-BTC"):
+    from prompts import build_decision_prompts
+
+    system_prompt, user_prompt = build_decision_prompts(reflection, indicators_data, prompt_token_budget, market)
+
+    logger.info(f"### {market} AI 매매 결정 시작 ###")
+    # AI 응답 받기
+    contents = [
+        {"role": "user", "parts": [{"text": system_prompt}]}, 
+        {"role": "user", "parts": [{"text": user_prompt}]}, 
+    ]
+    # 차트 이미지 생성에 실패한 경우 텍스트 데이터만으로 판단
+    if indicators_data["image_part"] is not None:
+        contents.append({"role": "user", "parts": [indicators_data["image_part"]]})
     try:
-        return get_ai_response(gemini_model)
+        return request_decision(model_client, contents)
+    except DecisionError as e:
+        logging.error(f"AI 매매 결정 형식 오류: {e}")
+        return hold_decision(f"AI 응답 형식 오류로 관망: {e}")
     except Exception as e:
-        if "429" in str(e):  # Too Many Requests 오류 감지
-            logging.warning(f"429 Too Many Requests 발생. 백업 모델 {gemini_sub_model} 사용")
-            return get_ai_response(gemini_sub_model)
-        else:
-            logging.error(f"Gemini API 호출 중 오류 발생: {e}")
-            return "An error occurred during AI response"
-
-def add_indicators(df):
-    # 볼린저 밴드
-    indicator_bb = ta.volatility.BollingerBands(close=df['close'], window=20, window_dev=2)
-    df['bb_bbm'] = indicator_bb.bollinger_mavg()
-    df['bb_bbh'] = indicator_bb.bollinger_hband()
-    df['bb_bbl'] = indicator_bb.bollinger_lband()
-    
-    # RSI
-    df['rsi'] = ta.momentum.RSIIndicator(close=df['close'], window=14).rsi()
-    
-    # MACD
-    macd = ta.trend.MACD(close=df['close'])
-    df['macd'] = macd.macd()
-    df['macd_signal'] = macd.macd_signal()
-    df['macd_diff'] = macd.macd_diff()
-    
-    # 이동평균선
-    df['sma_20'] = ta.trend.SMAIndicator(close=df['close'], window=20).sma_indicator()
-    df['ema_12'] = ta.trend.EMAIndicator(close=df['close'], window=12).ema_indicator()
-    
-    return df
+        logging.error(f"Gemini API 호출 중 오류 발생: {e}")
+        return hold_decision(f"AI 응답 오류로 관망: {e}")
 
 def get_fear_and_greed_index():
     url = "https://api.alternative.me/fng/"
-    response = requests.get(url)
+    response = http_client.get(url, endpoint="fear_greed_index", conditional=True)
     if response.status_code == 200:
         data = response.json()
         return data['data'][0]
@@ -272,7 +159,8 @@ def get_fear_and_greed_index():
         print(f"공포와 탐욕 지수를 가져오는 도중 오류 발생: {response.status_code}")
         return None
 
-def get_bitcoin_news():
+def get_bitcoin_news(since=None):
+    # 요청 실패는 예외로 전달 (빈 결과로 넘기면 뉴스 캐시가 조회 성공으로 기록해 다음 주기까지 재시도하지 않음)
     url = "https://serpapi.com/search.json"
     params = {
         "engine": "google_news",
@@ -280,463 +168,466 @@ def get_bitcoin_news():
         "api_key": serpapi_key
     }
     
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()  # Raises a HTTPError if the status is 4xx, 5xx
-        data = response.json()
-        
-        news_results = data.get("news_results", [])
-        headlines = []
-        for item in news_results:
-            headlines.append({
-                "title": item.get("title", ""),
-                "date": item.get("date", "")
-            })
-        
-        return headlines[:5]  # 최신 5개의 뉴스 헤드라인만 반환
-    except requests.RequestException as e:
-        print(f"구글 뉴스를 가져오는 중 오류 발생: {e}")
-        return []
-    
-def get_bitcoin_naver_news():
-    naver_request_url = 'https://openapi.naver.com/v1/search/news.json?query=비트코인&display=50&start=1&sort=date'
+    response = http_client.get(url, params=params, endpoint="google_news")
+    response.raise_for_status()  # Raises a HTTPError if the status is 4xx, 5xx
+    data = response.json()
+
+    # 묶음 기사(stories)처럼 제목이 없는 항목은 캐시에서 제외됨
+    return [
+        {"title": item.get("title", ""), "link": item.get("link"), "published": item.get("date")}
+        for item in data.get("news_results", [])
+    ]
+
+def get_bitcoin_naver_news(since=None):
+    # 최신순으로 한 페이지씩 받아 마지막으로 본 pubDate보다 오래된 기사가 나오면 중단
+    naver_request_url = 'https://openapi.naver.com/v1/search/news.json'
     headers = {
         "Accept": "application/json",
         "X-Naver-Client-Id": naver_client_key,
         "X-Naver-Client-Secret": naver_client_secret
     }
 
-    news_response = requests.get(naver_request_url, headers=headers)
     news = []
-    if news_response.status_code == 200:
-        news = news_response.json()["items"]
-    else:
-        print(f"네이버 뉴스를 가져오는 중 오류 발생: {news_response.status_code}")
+    for page in range(news_naver_max_pages):
+        params = {"query": "비트코인", "display": news_naver_page_size, "start": page * news_naver_page_size + 1, "sort": "date"}
+        news_response = http_client.get(naver_request_url, params=params, headers=headers, endpoint="naver_news")
+        # 중간 페이지에서 실패해도 일부 결과로 커서를 옮기지 않도록 전체 조회를 실패로 처리
+        news_response.raise_for_status()
+        items = news_response.json()["items"]
+        news += [
+            {"title": item["title"], "description": item.get("description"), "link": item.get("originallink") or item.get("link"), "published": item.get("pubDate")}
+            for item in items
+        ]
+        oldest = parse_published(items[-1].get("pubDate")) if items else None
+        if len(items) < news_naver_page_size or since is None or oldest is None or oldest <= since:
+            break
     return news
 
-# # 로컬용
-# def setup_chrome_options():
-#     chrome_options = Options()
-#     chrome_options.add_argument("--start-maximized")
-#     chrome_options.add_argument("--headless")  # 디버깅을 위해 헤드리스 모드 비활성화
-#     chrome_options.add_argument("--disable-gpu")
-#     chrome_options.add_argument("--no-sandbox")
-#     chrome_options.add_argument("--disable-dev-shm-usage")
-#     chrome_options.add_argument("--enable-unsafe-swiftshader")
-#     chrome_options.add_argument("--window-size=1920,3000")
-#     chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-#     return chrome_options
-
-# def create_driver():
-#     logger.info("ChromeDriver 설정 중...")
-#     service = Service(ChromeDriverManager().install())
-#     driver = webdriver.Chrome(service=service, options=setup_chrome_options())
-#     return driver
-
-# EC2 서버용
-def create_driver():
-    logger.info("ChromeDriver 설정 중...")
-    try:
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")  # 헤드리스 모드 사용
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,3000")
-
-        service = Service('/usr/bin/chromedriver')  # Specify the path to the ChromeDriver executable
-
-        # Initialize the WebDriver with the specified options
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-
-        return driver
-    except Exception as e:
-        logger.error(f"ChromeDriver 생성 중 오류 발생: {e}")
-        raise
-
-def scroll_into_view(driver, xpath):
-    try:
-        # XPath로 요소 찾기
-        element = driver.find_element(By.XPATH, xpath)
-
-        # 요소를 화면 중앙으로 스크롤
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
-        time.sleep(1)  # 스크롤 후 잠시 대기
-    except Exception as e:
-        logger.error(f"스크롤 중 오류 발생: {e}")
-
-def click_element_by_xpath(driver, xpath, element_name, wait_time=1):
-    try:
-        # 요소가 보이도록 스크롤
-        scroll_into_view(driver, xpath)
-
-        # 요소가 클릭 가능할 때까지 대기 후 클릭
-        element = WebDriverWait(driver, wait_time).until(
-            EC.element_to_be_clickable((By.XPATH, xpath))
-        )
-        element.click()
-
-        logger.info(f"{element_name} 클릭 완료")
-        time.sleep(2)  # 클릭 후 대기
-    except TimeoutException:
-        logger.error(f"{element_name} 요소를 찾는 데 시간이 초과되었습니다.")
-    except ElementClickInterceptedException:
-        logger.error(f"{element_name} 요소를 클릭할 수 없습니다. 다른 요소에 가려져 있을 수 있습니다.")
-    except Exception as e:
-        logger.error(f"{element_name} 클릭 중 오류 발생: {e}")
-
-def perform_chart_actions(driver):
-    # 시간 설정
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[1]",
-        "시간 메뉴"
-    )
-    
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[1]/cq-menu-dropdown/cq-item[8]",
-        "1시간 옵션"
-    )
-
-    # 추세 지표
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]",
-        "지표 메뉴"
-    )
-
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]/cq-menu-dropdown/cq-scroll/cq-studies/cq-studies-content/cq-item[53]",
-        "MACD 옵션"
-    )
-
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]",
-        "지표 메뉴"
-    )
-
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]/cq-menu-dropdown/cq-scroll/cq-studies/cq-studies-content/cq-item[1]",
-        "ADX 옵션"
-    )
-
-    # 모멘텀 지표
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]",
-        "지표 메뉴"
-    )
-
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]/cq-menu-dropdown/cq-scroll/cq-studies/cq-studies-content/cq-item[81]",
-        "RSI 옵션"
-    )
-
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]",
-        "지표 메뉴"
-    )
+def refresh_news():
+    # 소스별 갱신 주기가 지났을 때만 조회 (마지막 조회 시각은 뉴스 캐시에 저장되어 재시작 후에도 유지)
+    return {
+        "google": news_cache.refresh("google", get_bitcoin_news, news_google_interval),
+        "naver": news_cache.refresh("naver", get_bitcoin_naver_news, news_naver_interval),
+    }
 
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]/cq-menu-dropdown/cq-scroll/cq-studies/cq-studies-content/cq-item[91]",
-        "스토캐스틱 모멘텀 옵션"
-    )
-    
-    # 변동성 지표
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]",
-        "지표 메뉴"
-    )
-    
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]/cq-menu-dropdown/cq-scroll/cq-studies/cq-studies-content/cq-item[15]",
-        "볼린저 밴드 옵션"
+def get_revenue_rate(balances, initial_investment, prices):
+    # 원화 + 거래 대상 마켓 보유분을 한 번에 조회한 현재가로 평가
+    return calculate_revenue_rate(portfolio_value(balances, prices), initial_investment)
+
+# 사이클 간 재사용하는 서비스 (import 시에는 만들지 않고 setup()에서 생성)
+http_client = None
+db_writer = None
+news_cache = None
+candle_store = None
+indicator_engine = None
+chart_service = None
+local_orderbooks = {}
+model_client = None
+
+def setup():
+    global http_client, db_writer, news_cache, candle_store, indicator_engine, chart_service, local_orderbooks, model_client
+    from db import init_db, BatchWriter
+    from candle_store import CandleStore
+    from indicators import IndicatorEngine
+    from model_client import ModelClient, ResponseCache
+    from http_client import HttpClient, install_pyupbit
+
+    # 외부 API 공용 HTTP 클라이언트 (pyupbit 요청도 같은 세션/한도 사용)
+    http_client = HttpClient(timeout=(http_connect_timeout, http_read_timeout), retries=http_retries)
+    install_pyupbit(http_client)
+    # 데이터베이스 초기화
+    init_db()
+    # 거래/텔레메트리 INSERT 일괄 기록기
+    db_writer = BatchWriter()
+    # 뉴스 캐시 (제목 기준 중복 제거, 소스별 갱신 시각 유지)
+    news_cache = NewsCache()
+    # 캔들 저장소 (사이클마다 새로 마감된 캔들만 조회)
+    candle_store = CandleStore()
+    # 보조지표 누적 상태 (마감된 캔들마다 O(1) 갱신)
+    indicator_engine = IndicatorEngine()
+    # 차트 캡처용 브라우저 세션 (캡처 모드에서만 selenium 로드, 사이클 간 재사용)
+    if chart_source == "capture":
+        from chart_capture import ChartCaptureService
+        chart_service = ChartCaptureService(refresh_interval=chart_refresh_interval)
+        atexit.register(chart_service.stop)
+    # 로컬 호가창 (WebSocket 모드에서는 스트림으로, 그 외에는 필요할 때 REST 스냅샷으로 갱신)
+    local_orderbooks = {market: LocalOrderbook(market) for market in trading_markets}
+    if streaming_mode == "websocket":
+        OrderbookFeed(local_orderbooks).start()
+    # Gemini 모델 핸들/응답 캐시 (사이클 간 재사용)
+    model_client = ModelClient(
+        gemini_key, gemini_model, gemini_sub_model,
+        cache=ResponseCache(ttl=model_cache_ttl, max_entries=model_cache_size, path=model_cache_path),
+        mode=model_client_mode,
     )
 
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]",
-        "지표 메뉴"
-    )
-    
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]/cq-menu-dropdown/cq-scroll/cq-studies/cq-studies-content/cq-item[2]",
-        "ATR 옵션"
-    )
-
-    # 거래량 지표
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]",
-        "지표 메뉴"
-    )
-    
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]/cq-menu-dropdown/cq-scroll/cq-studies/cq-studies-content/cq-item[63]",
-        "OBV 옵션"
-    )
+def run_sources_concurrently(sources, timeout):
+    # 독립적인 데이터 소스를 동시에 호출하고 소스별 소요 시간과 상태를 기록
+    results = {}
+    timings = {}
+    started = {}
 
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]",
-        "지표 메뉴"
-    )
-    
-    click_element_by_xpath(
-        driver,
-        "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div/cq-menu[3]/cq-menu-dropdown/cq-scroll/cq-studies/cq-studies-content/cq-item[104]",
-        "VWAP 옵션"
-    )
+    def timed_call(name, func):
+        started[name] = time.perf_counter()
+        result = func()
+        timings[name] = {"seconds": round(time.perf_counter() - started[name], 3), "status": "ok"}
+        return result
 
-def capture_and_encode_screenshot(driver):
-    try:
-        # 스크린샷 캡처
-        png = driver.get_screenshot_as_png()
-        
-        # PIL Image로 변환
-        img = Image.open(io.BytesIO(png))
-
-        # 현재 시간을 파일명에 포함
-        current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"upbit_chart_{current_time}.png"
-        
-        # 현재 스크립트의 경로를 가져옴
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        # 파일 저장 경로 설정
-        file_path = os.path.join(script_dir, filename)
-        
-        # 이미지 파일로 저장
-        img.save(file_path)
-        logger.info(f"스크린샷이 저장되었습니다: {file_path}")
-        
-        # 이미지를 바이트로 변환
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        
-        # base64로 인코딩
-        base64_image = base64.b64encode(buffered.getvalue()).decode('utf-8')
-        
-        return base64_image, file_path
-    except Exception as e:
-        logger.error(f"스크린샷 캡처 및 인코딩 중 오류 발생: {e}")
-        return None, None
-    
-def prepare_image_for_gemini(base64_image_str, image_path):
+    executor = ThreadPoolExecutor(max_workers=len(sources))
     try:
-        image_bytes = base64.b64decode(base64_image_str)
-        os.remove(image_path)
-
-        return {"mime_type": "image/png", "data": image_bytes}
-    except Exception as e:
-        logger.error(f"이미지 처리 중 오류 발생: {e}")
-        return None
-    
-def get_ai_response_to_json(response):
-    response_json = response.to_dict()
-
-    # JSON 데이터 추출
-    text_content = response_json["candidates"][0]["content"]["parts"][0]["text"]
-    json_string = text_content.strip("```json\n").strip("```")
-
-    return json.loads(json_string)
-
-def get_revenue_rate(balances, initial_investment):
-    current_value = 0.0 
-    
-    for coin in balances:
-        coin_currency = coin['currency']
-        coin_balance = float(coin['balance'])
-        
-        # KRW와 BTC 모두 고려하여 계산
-        if coin_currency == 'KRW':
-            current_value += coin_balance  # 현재 KRW 잔고
-        elif coin_currency == 'BTC':
-            # BTC의 현재 가격 가져오기
-            coin_ticker = coin['unit_currency'] + "-" + coin_currency
-            now_price = pyupbit.get_current_price(coin_ticker)  # 현재 BTC 가격을 KRW로 환산
-            current_value += coin_balance * now_price  # BTC를 현재 시세로 환산한 가치
-    
-    # 수익률 계산
-    revenue_rate = round(round((int(current_value) / initial_investment) * 100.0, 2) - 100, 2)
-    
-    return revenue_rate
-
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-# 데이터베이스 초기화
-init_db()
-google_news_headlines = []
-
-def ai_trading(current_hour):
-    global google_news_headlines
-    # Upbit 객체 생성
-    upbit = pyupbit.Upbit(upbit_access_key, upbit_secret_key)
-
-    # 1. 현재 투자 상태 조회
-    all_balances = upbit.get_balances()
-    filtered_balances = [balance for balance in all_balances if balance['currency'] in ['BTC', 'KRW']]
-    
-    # 2. 오더북(호가 데이터) 조회
-    orderbook = pyupbit.get_orderbook("KRW-BTC")
-    
-    # 3. 차트 데이터 조회 및 보조지표 추가
-    # 30일 일봉 데이터
-    df_daily = pyupbit.get_ohlcv("KRW-BTC", interval="day", count=30)
-    df_daily = dropna(df_daily)
-    df_daily = add_indicators(df_daily)
-
-    # 4시간 24개 시간봉 데이터
-    df_4hourly = pyupbit.get_ohlcv("KRW-BTC", interval="minute240", count=24)
-    df_4hourly = dropna(df_4hourly)
-    df_4hourly = add_indicators(df_4hourly)
-    
-    # 24시간 시간봉 데이터
-    df_hourly = pyupbit.get_ohlcv("KRW-BTC", interval="minute60", count=24)
-    df_hourly = dropna(df_hourly)
-    df_hourly = add_indicators(df_hourly)
-
-    # 4. 공포 탐욕 지수 가져오기
-    fear_greed_index = get_fear_and_greed_index()
-
-    # 5. 뉴스 헤드라인 가져오기
-    # 8시간 마다 google news 최신화
-    # 매 시간 마다 naver news 최신화
-    if current_hour % 8 == 0:
-        google_news_headlines = get_bitcoin_news()
-    naver_news_headlines = get_bitcoin_naver_news()
-
-    # 데이터베이스 연결
-    conn = get_db_connection()
+        futures = {name: executor.submit(timed_call, name, func) for name, (func, _, _) in sources.items()}
+        deadline = time.perf_counter() + timeout
+        for name, future in futures.items():
+            fallback = sources[name][1]
+            try:
+                results[name] = future.result(timeout=max(deadline - time.perf_counter(), 0))
+            except Exception as e:
+                status = "timeout" if not future.done() else "error"
+                elapsed = time.perf_counter() - started.get(name, deadline - timeout)
+                timings[name] = {"seconds": round(elapsed, 3), "status": status}
+                logger.error(f"{name} 데이터 조회 실패 ({status}): {e!r}")
+                results[name] = fallback
+    finally:
+        # 멈춘 호출이 있어도 사이클 전체가 기다리지 않도록 즉시 반환
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    missing = [name for name, (_, _, required) in sources.items() if required and results[name] is None]
+    if missing:
+        raise RuntimeError(f"필수 데이터 조회 실패: {', '.join(missing)}")
+
+    return results, dict(timings)
+
+def refresh_orderbooks():
+    # 오래된 호가창만 모아 한 번의 요청으로 갱신
+    stale = [market for market, book in local_orderbooks.items() if book.age() is None or book.age() > orderbook_max_age]
+    if stale:
+        for snapshot in get_orderbooks(stale):
+            local_orderbooks[snapshot["market"]].apply_snapshot(snapshot)
+    return local_orderbooks
+
+def get_orderbook_summaries():
+    # 원본 호가 dict 대신 스프레드/구간별 누적 금액/불균형만 프롬프트에 전달
+    return {market: book.summary() for market, book in refresh_orderbooks().items()}
+
+def check_slippage(market, side, amount):
+    # 시장가 주문 전 호가창 기준 예상 평균 체결가와 슬리피지 확인
+    estimate = refresh_orderbooks()[market].estimate(side, amount)
+    if estimate is None:
+        return True
+    logger.info(
+        f"### {market} 예상 체결: 평균 {estimate['avg_price']:,.0f}원 (최우선 {estimate['best_price']:,.0f}원, "
+        f"슬리피지 {estimate['slippage_pct']}%, {estimate['levels']}호가) ###"
+    )
+    if not estimate["filled"] or estimate["slippage_pct"] > max_order_slippage:
+        logger.error(f"### {market} 주문 보류: 예상 슬리피지가 허용치({max_order_slippage}%)를 초과합니다 ###")
+        return False
+    return True
+
+def get_ohlcv_with_indicators(market, interval, count, metrics=None):
+    from ta.utils import dropna
+
+    # 로컬 캔들 저장소에서 마지막 저장 시점 이후 캔들만 받아와 병합
+    df = candle_store.get(market, interval, max(count, indicator_warmup))
+    if df is None:
+        raise RuntimeError(f"{market} {interval} 캔들 데이터가 비어 있습니다.")
+    # 새로 마감된 캔들만 지표 상태에 반영 (프롬프트에는 최근 count개만, 차트에는 워밍업 이력까지 전달)
+    started = time.perf_counter()
+    df = indicator_engine.update((market, interval), dropna(df))
+    if metrics is not None:
+        metrics.record("indicators", market, seconds=time.perf_counter() - started)
+    return df
 
-    # 최근 거래 내역 가져오기
-    recent_trades = get_recent_trades(conn)
-
-    # 현재 시장 데이터 수집 (기존 코드에서 가져온 데이터 사용)
-    current_market_data = {
-        "fear_greed_index": fear_greed_index,
-        "google_news_headlines": google_news_headlines,
-        "naver_news_headlines": naver_news_headlines,
-        "orderbook": orderbook,
-        "daily_ohlcv": df_daily.to_dict(),
-        "4_hourly_ohlcv": df_4hourly.to_dict(),
-        "hourly_ohlcv": df_hourly.to_dict()
+def fetch_market_data(upbit, metrics=None):
+    # 이름: (호출 함수, 실패 시 대체값, 필수 여부)
+    sources = {
+        # 1. 현재 투자 상태 조회 (전체 코인 잔고가 한 번에 조회됨)
+        "balances": (upbit.get_balances, None, True),
+        # 2. 모든 마켓의 현재가/오더북(호가 데이터)을 각각 한 번의 요청으로 조회
+        "prices": (lambda: get_current_prices(trading_markets), None, True),
+        "orderbooks": (get_orderbook_summaries, {}, False),
+        # 4. 공포 탐욕 지수 가져오기
+        "fear_greed_index": (get_fear_and_greed_index, None, False),
+        # 5. 뉴스 캐시 갱신 (주기가 지난 소스만 새 기사 조회, 실패 시 캐시된 기사 사용)
+        "news": (refresh_news, {}, False),
     }
-
-    # 반성 및 개선 내용 생성
-    reflection = generate_reflection(recent_trades, current_market_data)
-
-    # Selenium으로 차트 캡처
-    driver = None
+    # 3. 차트 데이터 조회 및 보조지표 추가 (30일 일봉, 4시간봉 24개, 시간봉 24개)
+    # 캔들 API는 마켓 목록 조회를 지원하지 않으므로 마켓×간격별로 동시에 조회 (저장소 덕분에 새 캔들만 받음)
+    for market in trading_markets:
+        for name, interval, count in OHLCV_FRAMES:
+            sources[f"{market}:{name}"] = (partial(get_ohlcv_with_indicators, market, interval, count, metrics), None, True)
+
+    results, timings = run_sources_concurrently(sources, market_data_timeout)
+
+    # 최신순 상위 기사만 바이트 예산 안에서 사용 (네이버는 요약 일부 포함)
+    google_news_headlines = news_cache.top("google", news_top_k, news_byte_budget)
+    naver_news_headlines = news_cache.top("naver", news_top_k, news_byte_budget, description_chars=80)
+
+    market_data = {}
+    for market in trading_markets:
+        histories = {name: results[f"{market}:{name}"] for name, _, _ in OHLCV_FRAMES}
+        frames = {name: histories[name].iloc[-count:] for name, _, count in OHLCV_FRAMES}
+        filtered_balances = [balance for balance in results["balances"] if balance['currency'] in [market_currency(market), 'KRW']]
+        orderbook = results["orderbooks"].get(market)
+
+        indicators_data = {
+            "filtered_balances": filtered_balances,
+            "orderbook": orderbook,
+            **frames,
+            "google_news_headlines": google_news_headlines,
+            "naver_news_headlines": naver_news_headlines,
+            "fear_greed_index": results["fear_greed_index"],
+            # 차트 보조지표 계산용 전체 이력 (프롬프트에는 넣지 않음)
+            "chart_histories": histories,
+        }
+
+        # 현재 시장 데이터 수집
+        current_market_data = {
+            "fear_greed_index": results["fear_greed_index"],
+            "google_news_headlines": google_news_headlines,
+            "naver_news_headlines": naver_news_headlines,
+            "orderbook": orderbook,
+            "daily_ohlcv": frames["df_daily"],
+            "4_hourly_ohlcv": frames["df_4hourly"],
+            "hourly_ohlcv": frames["df_hourly"]
+        }
+        market_data[market] = (indicators_data, current_market_data)
+
+    return {"markets": market_data, "balances": results["balances"], "prices": results["prices"]}, timings
+
+def get_recent_trades_pooled(market):
+    from db import get_db_connection
+
+    # 최근 거래 내역 가져오기 (풀에서 빌린 커넥션은 바로 반환)
+    conn = get_db_connection()
     try:
-        driver = create_driver()
-        driver.get("https://upbit.com/full_chart?code=CRIX.UPBIT.KRW-BTC")
-        logger.info("페이지 로드 완료")
-        time.sleep(30)  # 페이지 로딩 대기 시간 증가
-        logger.info("차트 작업 시작")
-        perform_chart_actions(driver)
-        logger.info("차트 작업 완료")
-        chart_image, saved_file_path = capture_and_encode_screenshot(driver)
-        logger.info(f"스크린샷 캡처 완료. 저장된 파일 경로: {saved_file_path}")
-    except WebDriverException as e:
-        logger.error(f"WebDriver 오류 발생: {e}")
-        chart_image, saved_file_path = None, None
-    except Exception as e:
-        logger.error(f"차트 캡처 중 오류 발생: {e}")
-        chart_image, saved_file_path = None, None
+        return get_recent_trades(conn, market)
     finally:
-        if driver:
-            driver.quit()
-
-    image_part = prepare_image_for_gemini(chart_image, saved_file_path)
-
-    # AI에게 데이터 제공하고 판단 받기
-    indicators_data = {
-        "filtered_balances": filtered_balances,
-        "orderbook": orderbook,
-        "df_daily": df_daily,
-        "df_4hourly": df_4hourly,
-        "df_hourly": df_hourly,
-        "google_news_headlines": google_news_headlines,
-        "naver_news_headlines": naver_news_headlines,
-        "fear_greed_index": fear_greed_index,
-        "image_part": image_part
-    }
-    response = generate_response(reflection, indicators_data)
+        conn.close()
 
-    # AI의 판단에 따라 실제로 자동매매 진행하기
-    print(f"### Response : {response}")
-    result = get_ai_response_to_json(response)
+def build_chart_part(market, indicators_data=None, metrics=None):
+    from image_pipeline import build_image_part
 
-    logger.info(f"### AI 매매 결정 : {result["decision"].upper()} ###")
-    logger.info(f"### 이유 : {result["reason"]} ###")
-    logger.info(f"### 퍼센트 : {result["percentage"]} ###")
+    # 차트 이미지 생성 (로컬 렌더링 또는 상시 띄워둔 차트 페이지에서 캡처, 캡처 페이지는 첫 번째 마켓 기준)
+    if indicators_data is None:
+        png = chart_service.capture_png()
+    else:
+        from chart_renderer import render_chart_png
+        histories = indicators_data["chart_histories"]
+        counts = {name: count for name, _, count in OHLCV_FRAMES}
+        png = render_chart_png([
+            (f"{market} {label}", histories[name], counts[name])
+            for label, name in (("Daily", "df_daily"), ("4H", "df_4hourly"), ("1H", "df_hourly"))
+        ], width=chart_width, height=chart_height)
+    image_part, image_stats = build_image_part(
+        png,
+        image_format=chart_image_format,
+        quality=chart_image_quality,
+        max_width=chart_image_max_width,
+        archive_dir=chart_archive_dir,
+        market=market,
+    )
+    if metrics is not None:
+        metrics.record("chart", market, bytes_in=image_stats["bytes_in"], bytes_out=image_stats["bytes_out"])
+    return image_part
 
-    order_executed = False
+def reflection_stage(market, metrics, data, recent_trades):
+    # 반성 및 개선 내용 생성
+    model_client.start_tracking()
+    reflection = generate_reflection(recent_trades, data["markets"][market][1])
+    metrics.record_model_calls("reflection", market, model_client.tracked_calls())
+    return reflection
+
+def chart_stage(market, metrics, data=None):
+    return build_chart_part(market, data["markets"][market][0] if data is not None else None, metrics)
+
+def decision_stage(market, metrics, data, reflection, chart):
+    # AI에게 데이터 제공하고 판단 받기 (차트 이미지 생성에 실패한 경우 텍스트 데이터만으로 판단)
+    indicators_data = {**data["markets"][market][0], "image_part": chart}
+    model_client.start_tracking()
+    result = generate_response(reflection, indicators_data, market)
+    metrics.record_model_calls("decision", market, model_client.tracked_calls())
+    return result
+
+def market_stages(market, metrics):
+    import pandas as pd
+
+    # 마켓마다 최근 거래 → 반성, 차트 → 매매 결정 단계를 만들고 모든 마켓을 동시에 진행
+    capture = chart_source == "capture" and market == trading_markets[0]
+    return [
+        Stage(f"{market}:recent_trades", partial(get_recent_trades_pooled, market), fallback=pd.DataFrame()),
+        Stage(f"{market}:reflection", partial(reflection_stage, market, metrics),
+              deps={"data": "market", "recent_trades": f"{market}:recent_trades"},
+              timeout=reflection_timeout, fallback=""),
+        # 캡처는 시장 데이터가 필요 없으므로 조회와 동시에 시작
+        Stage(f"{market}:chart", partial(chart_stage, market, metrics),
+              deps={} if capture else {"data": "market"},
+              timeout=chart_timeout, fallback=None),
+        Stage(f"{market}:decision", partial(decision_stage, market, metrics),
+              deps={"data": "market", "reflection": f"{market}:reflection", "chart": f"{market}:chart"},
+              timeout=decision_timeout, fallback=hold_decision("AI 매매 결정 시간 초과로 관망")),
+    ]
+
+def execute_decision(upbit, market, result, coin_balance, krw_budget, price):
+    executor = OrderExecutor(
+        upbit, market,
+        strategy=execution_strategy,
+        slices=execution_slices,
+        interval=execution_interval,
+        limit_timeout=limit_order_timeout,
+        orderbook_source=lambda: refresh_orderbooks()[market],
+    )
+    coin = market_currency(market)
 
     if result["decision"] == "buy":
-        my_krw = upbit.get_balance("KRW")
-        buy_amount = my_krw * (result["percentage"] / 100) * 0.9995  # 수수료 고려
-        if buy_amount > 5000:
-            logger.info(f"### 실행된 매수 주문: 사용 가능한 원화의 {result["percentage"]}% ###")
-            order = upbit.buy_market_order("KRW-BTC", buy_amount)
-            if order:
-                order_executed = True
-        else:
-            logger.error("### 매수 주문 실패: 원화 부족(5,000원 ​​미만) ###")
+        buy_amount = get_buy_amount(krw_budget, result["percentage"])
+        if buy_amount > MIN_ORDER_KRW and check_slippage(market, "buy", buy_amount):
+            logger.info(f"### {market} 실행된 매수 주문: 사용 가능한 원화의 {result["percentage"]}% ###")
+            return executor.execute("buy", buy_amount, price)
+        elif buy_amount <= MIN_ORDER_KRW:
+            logger.error(f"### {market} 매수 주문 실패: 원화 부족(5,000원 ​​미만) ###")
     elif result["decision"] == "sell":
-        my_btc = upbit.get_balance("KRW-BTC")
-        sell_amount = my_btc * (result["percentage"] / 100)
-        current_price = pyupbit.get_current_price("KRW-BTC")
-        if sell_amount * current_price > 5000:
-            logger.info(f"### 실행된 매도 주문: 보유 BTC의 {result["percentage"]}% ###")
-            order = upbit.sell_market_order("KRW-BTC", sell_amount)
-            if order:
-                order_executed = True
-        else:
-            logger.error("### 매도 주문 실패: BTC 부족(한화 5000원 미만) ###")
+        sell_amount = get_sell_amount(coin_balance, result["percentage"])
+        if sell_amount * price > MIN_ORDER_KRW and check_slippage(market, "sell", sell_amount):
+            logger.info(f"### {market} 실행된 매도 주문: 보유 {coin}의 {result["percentage"]}% ###")
+            return executor.execute("sell", sell_amount, price)
+        elif sell_amount * price <= MIN_ORDER_KRW:
+            logger.error(f"### {market} 매도 주문 실패: {coin} 부족(한화 5000원 미만) ###")
+    return None
+
+def record_stage_timings(metrics, stage_timings):
+    # 파이프라인 단계 이름("market", "KRW-BTC:decision")을 (단계, 마켓)으로 기록
+    for name, timing in stage_timings.items():
+        market, _, stage = name.rpartition(":")
+        metrics.record("fetch" if name == "market" else stage, market or None,
+                       seconds=timing["seconds"], status=timing["status"])
+
+def ai_trading():
+    import pyupbit
 
-    # 거래 실행 여부와 관계없이 현재 잔고 조회
-    time.sleep(1)  # API 호출 제한을 고려하여 잠시 대기
+    # Upbit 객체 생성
+    upbit = pyupbit.Upbit(upbit_access_key, upbit_secret_key)
+    metrics = CycleMetrics()
+
+    def fetch_stage():
+        # 1~5. 잔고, 현재가, 오더북, 차트, 공포 탐욕 지수, 뉴스를 동시에 조회
+        http_before = http_client.totals()
+        data, fetch_timings = fetch_market_data(upbit, metrics)
+        http_after = http_client.totals()
+        timing_summary = ", ".join(f"{name}={t['seconds']}s({t['status']})" for name, t in fetch_timings.items())
+        logger.info(f"시장 데이터 조회 완료 [{timing_summary}]")
+        for name, timing in fetch_timings.items():
+            market, _, source = name.rpartition(":")
+            metrics.record(f"fetch:{source}", market or None, seconds=timing["seconds"], status=timing["status"])
+        metrics.record("fetch", bytes_in=http_after["bytes_in"] - http_before["bytes_in"],
+                       retries=http_after["retries"] - http_before["retries"])
+        return data
+
+    # 반성 생성(Gemini)과 차트 생성은 서로 독립이므로 동시에 실행하고, 매매 결정만 둘을 기다림
+    pipeline = Pipeline([Stage("market", fetch_stage)] + [stage for market in trading_markets for stage in market_stages(market, metrics)])
+    stage_results, stage_timings = pipeline.run()
+    logger.info(pipeline.report(stage_timings))
+    record_stage_timings(metrics, stage_timings)
+
+    # 원화는 마켓 수로 나눠 각 마켓의 매수 예산으로 사용
+    positions, krw_balance = holdings(stage_results["market"]["balances"], trading_markets)
+    krw_budget = krw_balance / len(trading_markets)
+    prices = stage_results["market"]["prices"]
+
+    executions = {}
+    for market in trading_markets:
+        result = stage_results[f"{market}:decision"]
+
+        # AI의 판단에 따라 실제로 자동매매 진행하기
+        logger.info(f"### {market} AI 매매 결정 : {result["decision"].upper()} ###")
+        logger.info(f"### 이유 : {result["reason"]} ###")
+        logger.info(f"### 퍼센트 : {result["percentage"]} ###")
+
+        with metrics.measure("order", market):
+            executions[market] = execute_decision(upbit, market, result, positions[market][0], krw_budget, prices[market])
+
+    # 거래 실행 여부와 관계없이 현재 잔고/현재가를 한 번씩 조회 (주문은 체결 완료까지 확인했으므로 바로 조회)
     balances = upbit.get_balances()
-    revenue_rate = get_revenue_rate(balances, int(initial_capital))
-    btc_balance = next((float(balance['balance']) for balance in balances if balance['currency'] == 'BTC'), 0)
-    krw_balance = next((float(balance['balance']) for balance in balances if balance['currency'] == 'KRW'), 0)
-    btc_avg_buy_price = next((float(balance['avg_buy_price']) for balance in balances if balance['currency'] == 'BTC'), 0)
-    current_btc_price = pyupbit.get_current_price("KRW-BTC")
-
-    # 거래 정보 로깅
-    log_trade(conn, result["decision"], result["percentage"] if order_executed else 0, result["reason"], btc_balance, krw_balance, btc_avg_buy_price, current_btc_price, revenue_rate, reflection)
-
-    # 데이터베이스 연결 종료
-    conn.close()
-
-# Main loop
-while True:
-    try:
-        # 현재 시간 전달
-        ai_trading(datetime.now().hour)
+    prices = get_current_prices(trading_markets)
+    positions, krw_balance = holdings(balances, trading_markets)
+    revenue_rate = get_revenue_rate(balances, int(initial_capital), prices)
+    timestamp = datetime.now().isoformat()
 
-        # 다음 정시 계산
-        now = datetime.now()
-        next_hour = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
-        # 대기 시간 계산 (다음 정시 - 현재 시간)
-        sleep_time = (next_hour - now).total_seconds()
-        logger.info(f"현재 {sleep_time}초 뒤 {next_hour}에 자동으로 매매 기능이 동작합니다.")
+    for market in trading_markets:
+        result = stage_results[f"{market}:decision"]
+        execution = executions[market]
+        order_executed = execution is not None and execution["volume"] > 0
+        coin_balance, avg_buy_price = positions[market]
+        # 체결된 경우 실제 평균 체결가를 기록
+        coin_price = execution["avg_price"] if order_executed else prices[market]
+
+        # 거래 정보 로깅
+        log_trade(
+            result["decision"], result["percentage"] if order_executed else 0, result["reason"],
+            coin_balance, krw_balance, avg_buy_price, coin_price, revenue_rate, stage_results[f"{market}:reflection"],
+            fills=execution["fills"] if execution else (), market=market, timestamp=timestamp,
+        )
 
-        time.sleep(sleep_time)  # 정시까지 대기
-    except Exception as e:
-        logger.error(f"오류 발생: {e}")
-        time.sleep(300)  # 오류 발생 시 5분 후 재시도
\ No newline at end of file
+    # 마켓별 보유 현황 (long-format)
+    for row in position_rows(timestamp, balances, prices):
+        db_writer.add(INSERT_POSITION_SQL, row)
+
+    # 이번 사이클의 기록을 한 트랜잭션으로 반영 (다음 사이클의 최근 거래 조회 전에 완료)
+    with metrics.measure("db_write"):
+        db_writer.flush()
+    logger.info(f"HTTP 요청 통계 [{http_client.report()}]")
+
+    # 단계별 성능 기록 (db_write 시간까지 포함하도록 거래 기록 뒤에 별도로 반영, 매매 경로를 막지 않게 백그라운드 기록)
+    logger.info(f"사이클 성능 [{metrics.summary()}]")
+    for row in metrics.rows():
+        db_writer.add(INSERT_METRIC_SQL, row)
+    db_writer.flush_later()
+    return metrics
+
+def main():
+    # 로깅 설정
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    setup()
+    logger.info(f"초기화 완료 ({time.perf_counter() - started:.2f}초)")
+
+    # 가격 스트림 기반 조기 매매 트리거
+    event_trigger = None
+    if streaming_mode in ("websocket", "replay"):
+        if streaming_mode == "websocket":
+            price_source = UpbitTickerSource(trading_markets[0])
+        else:
+            price_source = ReplaySource.from_csv(trigger_replay_path, speed=1)
+        event_trigger = EventTrigger(price_source, VolatilityTrigger(
+            window=trigger_window,
+            price_change=trigger_price_change,
+            volatility=trigger_volatility,
+            cooldown=trigger_cooldown,
+            max_per_hour=trigger_max_per_hour,
+        ))
+        event_trigger.start()
+
+    # Main loop
+    while True:
+        try:
+            ai_trading()
+
+            # 다음 정시 계산
+            now = datetime.now()
+            next_hour = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
+            # 대기 시간 계산 (다음 정시 - 현재 시간)
+            sleep_time = (next_hour - now).total_seconds()
+            logger.info(f"현재 {sleep_time}초 뒤 {next_hour}에 자동으로 매매 기능이 동작합니다.")
+
+            if event_trigger:
+                # 정시까지 대기하되 급격한 가격 변동이 감지되면 바로 다음 사이클 실행
+                reason = event_trigger.wait(sleep_time)
+                if reason:
+                    logger.info(f"조기 매매 사이클 시작: {reason}")
+            else:
+                time.sleep(sleep_time)  # 정시까지 대기
+        except Exception as e:
+            logger.error(f"오류 발생: {e}")
+            time.sleep(300)  # 오류 발생 시 5분 후 재시도
+
+if __name__ == "__main__":
+    main()
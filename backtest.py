@@ -0,0 +1,299 @@
+import os
+import json
+import time
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+
+from candle_store import CandleStore, INTERVAL_DURATIONS
+from indicators import compute_indicator_array, INDICATOR_COLUMNS, DEFAULT_PARAMS
+from prompts import build_decision_prompts
+from decision_parser import DecisionError, request_decision, hold_decision
+from trading_rules import FEE_RATE, MIN_ORDER_KRW, get_buy_amount, get_sell_amount, calculate_revenue_rate
+
+# ai_trading()이 프롬프트에 넣는 것과 같은 (이름, 캔들 간격, 개수)
+FRAME_SPECS = [
+    ("df_daily", "day", 30),
+    ("df_4hourly", "minute240", 24),
+    ("df_hourly", "minute60", 24),
+]
+BASE_FRAME = "df_hourly"
+
+class IntervalSeries:
+    # 한 캔들 간격의 전체 이력과 지표를 numpy 배열로 보관 (스텝마다 DataFrame을 자르지 않음)
+    def __init__(self, df, interval, params):
+        self.df = df
+        self.close_times = (df.index + INTERVAL_DURATIONS[interval]).to_numpy()
+        self.close = df['close'].to_numpy(dtype=float)
+        self.indicators = compute_indicator_array(self.close[None, :], **params)[0]
+        self.columns = {name: i for i, name in enumerate(INDICATOR_COLUMNS)}
+
+    def visible_count(self, now):
+        # now 시점까지 마감된 캔들 수
+        return int(np.searchsorted(self.close_times, now, side='right'))
+
+    def frame(self, end, count):
+        start = max(end - count, 0)
+        df = self.df.iloc[start:end].copy()
+        df[INDICATOR_COLUMNS] = self.indicators[start:end]
+        return df
+
+class MarketSnapshot:
+    # 한 스텝에서 의사결정 제공자에게 보여주는 시장 상태 (프롬프트용 DataFrame은 필요할 때만 생성)
+    def __init__(self, backtest, now, ends, price, account):
+        self.backtest = backtest
+        self.timestamp = now
+        self.ends = ends
+        self.price = price
+        self.account = account
+        self.prompts = None  # needs_prompt 제공자에게는 Backtest.run이 (system, user) 프롬프트를 채워 줌
+
+    def value(self, frame_name, column, offset=0):
+        series = self.backtest.series[frame_name]
+        index = self.ends[frame_name] - 1 - offset
+        if column in series.columns:
+            return series.indicators[index, series.columns[column]]
+        return series.df[column].iat[index]
+
+    def indicators_data(self):
+        data = {
+            name: self.backtest.series[name].frame(self.ends[name], count)
+            for name, _, count in FRAME_SPECS
+        }
+        data.update({
+            "filtered_balances": self.account.balances(),
+            "orderbook": None,
+            "google_news_headlines": [],
+            "naver_news_headlines": [],
+            "fear_greed_index": None,
+            "image_part": None,
+        })
+        return data
+
+class SimulatedAccount:
+    # 업비트 시장가 주문 체결을 흉내 내는 계좌 (ai_trading()과 같은 수수료/최소 주문 규칙)
+    def __init__(self, krw):
+        self.krw = float(krw)
+        self.btc = 0.0
+        self.avg_buy_price = 0.0
+
+    def balances(self):
+        return [
+            {"currency": "KRW", "balance": str(self.krw), "avg_buy_price": "0", "unit_currency": "KRW"},
+            {"currency": "BTC", "balance": str(self.btc), "avg_buy_price": str(self.avg_buy_price), "unit_currency": "KRW"},
+        ]
+
+    def buy_market_order(self, price, krw_amount):
+        volume = krw_amount / price
+        self.avg_buy_price = (self.avg_buy_price * self.btc + krw_amount) / (self.btc + volume)
+        self.btc += volume
+        self.krw -= krw_amount * (1 + FEE_RATE)
+
+    def sell_market_order(self, price, volume):
+        self.krw += volume * price * (1 - FEE_RATE)
+        self.btc -= volume
+        if self.btc <= 0:
+            self.btc = 0.0
+            self.avg_buy_price = 0.0
+
+    def execute(self, decision, percentage, price):
+        if decision == "buy":
+            buy_amount = get_buy_amount(self.krw, percentage)
+            if buy_amount > MIN_ORDER_KRW:
+                self.buy_market_order(price, buy_amount)
+                return True
+        elif decision == "sell":
+            sell_amount = get_sell_amount(self.btc, percentage)
+            if sell_amount * price > MIN_ORDER_KRW:
+                self.sell_market_order(price, sell_amount)
+                return True
+        return False
+
+    def equity(self, price):
+        return self.krw + self.btc * price
+
+class ReplayProvider:
+    # 기록된 응답(JSONL: timestamp, decision, percentage, reason)을 시각 기준으로 재생, 없으면 hold
+    # 기본은 프롬프트 없이 재생 (초당 수천 스텝), needs_prompt=True면 실거래와 같은 프롬프트 조립 경로도 매 스텝 거침 (초당 수십 스텝)
+    def __init__(self, responses, needs_prompt=False):
+        self.needs_prompt = needs_prompt
+        self.responses = {pd.Timestamp(r["timestamp"]).floor("h"): r for r in responses}
+
+    @classmethod
+    def from_file(cls, path, needs_prompt=False):
+        with open(path, encoding="utf-8") as f:
+            return cls([json.loads(line) for line in f if line.strip()], needs_prompt)
+
+    def decide(self, snapshot):
+        response = self.responses.get(pd.Timestamp(snapshot.timestamp).floor("h"))
+        if response is None:
+            return {"decision": "hold", "percentage": 0, "reason": "no recorded response"}
+        return response
+
+class RuleBasedProvider:
+    # 모델 대신 쓰는 단순 규칙: 시간봉 RSI 과매도/과매수 + MACD 히스토그램 방향 (파라미터 탐색용이라 프롬프트 생략)
+    needs_prompt = False
+
+    def __init__(self, rsi_buy=30, rsi_sell=70, buy_percentage=20, sell_percentage=20):
+        self.rsi_buy = rsi_buy
+        self.rsi_sell = rsi_sell
+        self.buy_percentage = buy_percentage
+        self.sell_percentage = sell_percentage
+
+    def decide(self, snapshot):
+        rsi = snapshot.value(BASE_FRAME, "rsi")
+        macd_diff = snapshot.value(BASE_FRAME, "macd_diff")
+        if rsi < self.rsi_buy and macd_diff > snapshot.value(BASE_FRAME, "macd_diff", offset=1):
+            return {"decision": "buy", "percentage": self.buy_percentage, "reason": f"RSI {rsi:.1f} oversold, MACD turning up"}
+        if rsi > self.rsi_sell and macd_diff < snapshot.value(BASE_FRAME, "macd_diff", offset=1):
+            return {"decision": "sell", "percentage": self.sell_percentage, "reason": f"RSI {rsi:.1f} overbought, MACD turning down"}
+        return {"decision": "hold", "percentage": 0, "reason": "no signal"}
+
+class ModelProvider:
+    # 실제 Gemini 모델로 판단 (실거래와 같은 프롬프트, 차트 이미지/뉴스 없이)
+    needs_prompt = True
+
+    def __init__(self, client):
+        self.client = client
+
+    def decide(self, snapshot):
+        system_prompt, user_prompt = snapshot.prompts
+        try:
+            return request_decision(self.client, [
+                {"role": "user", "parts": [{"text": system_prompt}]},
+                {"role": "user", "parts": [{"text": user_prompt}]},
+            ])
+        except DecisionError as e:
+            return hold_decision(f"invalid response: {e}")
+
+class Backtest:
+    # 저장된 캔들 이력을 기준 간격(시간봉) 단위로 재생하며 ai_trading()의 판단/주문 루프를 시뮬레이션
+    def __init__(self, frames, initial_capital, params=None, market="KRW-BTC", token_budget=None):
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        self.initial_capital = initial_capital
+        self.market = market
+        self.token_budget = token_budget
+        self.series = {
+            name: IntervalSeries(frames[name], interval, self.params)
+            for name, interval, _ in FRAME_SPECS
+        }
+
+    @classmethod
+    def from_store(cls, store, market, initial_capital, params=None, token_budget=None):
+        frames = {name: store.load(market, interval) for name, interval, _ in FRAME_SPECS}
+        return cls(frames, initial_capital, params, market, token_budget)
+
+    def step_times(self, start=None, end=None, every=1):
+        # 모든 간격에서 프롬프트 구간만큼 캔들이 쌓인 이후의 시간봉 경계
+        times = self.series[BASE_FRAME].close_times
+        ready = max(
+            self.series[name].close_times[min(count, len(self.series[name].close_times)) - 1]
+            for name, _, count in FRAME_SPECS
+        )
+        mask = times >= ready
+        if start is not None:
+            mask &= times >= np.datetime64(pd.Timestamp(start))
+        if end is not None:
+            mask &= times <= np.datetime64(pd.Timestamp(end))
+        return times[mask][::every]
+
+    def run(self, provider, start=None, end=None, every=1):
+        # 제공자가 needs_prompt면 ai_trading()과 같은 build_decision_prompts로 스텝마다 프롬프트를 조립
+        needs_prompt = getattr(provider, "needs_prompt", False)
+        account = SimulatedAccount(self.initial_capital)
+        records = []
+        started = time.perf_counter()
+
+        for now in self.step_times(start, end, every):
+            ends = {name: series.visible_count(now) for name, series in self.series.items()}
+            price = self.series[BASE_FRAME].close[ends[BASE_FRAME] - 1]
+            snapshot = MarketSnapshot(self, now, ends, price, account)
+            prompt_chars = 0
+            if needs_prompt:
+                snapshot.prompts = build_decision_prompts("", snapshot.indicators_data(), self.token_budget, self.market)
+                prompt_chars = sum(len(prompt) for prompt in snapshot.prompts)
+
+            result = provider.decide(snapshot)
+            executed = account.execute(result["decision"], result["percentage"], price)
+
+            equity = account.equity(price)
+            records.append((
+                now, price, result["decision"], result["percentage"] if executed else 0, executed,
+                account.krw, account.btc, equity, calculate_revenue_rate(equity, self.initial_capital), prompt_chars,
+            ))
+
+        elapsed = time.perf_counter() - started
+        curve = pd.DataFrame(records, columns=[
+            "timestamp", "btc_krw_price", "decision", "percentage", "executed",
+            "krw_balance", "btc_balance", "equity", "revenue_rate", "prompt_chars",
+        ])
+        return curve, summarize(curve, elapsed)
+
+def summarize(curve, elapsed):
+    if curve.empty:
+        return {"steps": 0, "seconds": round(elapsed, 3)}
+    equity = curve["equity"]
+    drawdown = equity / equity.cummax() - 1
+    summary = {
+        "steps": len(curve),
+        "start": str(curve["timestamp"].iloc[0]),
+        "end": str(curve["timestamp"].iloc[-1]),
+        "trades": int(curve["executed"].sum()),
+        "final_equity": round(float(equity.iloc[-1]), 2),
+        "revenue_rate": float(curve["revenue_rate"].iloc[-1]),
+        "max_drawdown_pct": round(float(drawdown.min()) * 100, 2),
+        "buy_and_hold_pct": round(float(curve["btc_krw_price"].iloc[-1] / curve["btc_krw_price"].iloc[0] - 1) * 100, 2),
+        "seconds": round(elapsed, 3),
+        "steps_per_second": round(len(curve) / elapsed) if elapsed else None,
+    }
+    if curve["prompt_chars"].any():
+        summary["avg_prompt_chars"] = round(float(curve["prompt_chars"].mean()))
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="저장된 캔들로 매매 루프 백테스트")
+    parser.add_argument("--db", default=os.getenv('CANDLE_STORE_PATH', 'candles.db'))
+    parser.add_argument("--market", default="KRW-BTC")
+    parser.add_argument("--download", type=int, default=0, help="백테스트 전 간격별로 받아둘 캔들 수")
+    parser.add_argument("--history", type=int, default=100_000, help="간격별로 불러올 최대 캔들 수")
+    parser.add_argument("--provider", choices=["rule", "replay", "model"], default="rule")
+    parser.add_argument("--replay-file", help="replay 제공자가 재생할 JSONL 응답 파일")
+    parser.add_argument("--with-prompts", action="store_true", help="replay 제공자도 스텝마다 프롬프트를 조립 (느림, 프롬프트 경로 검증용)")
+    parser.add_argument("--token-budget", type=int, default=int(os.getenv('PROMPT_TOKEN_BUDGET', '12000')))
+    parser.add_argument("--initial-capital", type=float, default=float(os.getenv('INITIAL_CAPITAL') or 1_000_000))
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--every", type=int, default=1, help="판단 주기 (시간봉 개수)")
+    parser.add_argument("--output", help="자산 곡선 CSV 저장 경로")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = CandleStore(args.db, max_rows=max(args.download, args.history))
+    if args.download:
+        for _, interval, _ in FRAME_SPECS:
+            store.get(args.market, interval, args.download)
+
+    if args.provider == "replay":
+        provider = ReplayProvider.from_file(args.replay_file, needs_prompt=args.with_prompts)
+    elif args.provider == "model":
+        from model_client import ModelClient, ResponseCache
+
+        # MODEL_CLIENT_MODE=replay + MODEL_CACHE_PATH로 기록된 응답만 재생 가능
+        client = ModelClient(
+            os.getenv('GEMINI_KEY'), os.getenv('GEMINI_MODEL'), os.getenv('GEMINI_SUB_MODEL'),
+            cache=ResponseCache(ttl=0, max_entries=100_000, path=os.getenv('MODEL_CACHE_PATH')),
+            mode=os.getenv('MODEL_CLIENT_MODE', 'live'),
+        )
+        provider = ModelProvider(client)
+    else:
+        provider = RuleBasedProvider()
+
+    backtest = Backtest.from_store(store, args.market, args.initial_capital, token_budget=args.token_budget)
+    curve, summary = backtest.run(provider, args.start, args.end, args.every)
+    if args.output:
+        curve.to_csv(args.output, index=False)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
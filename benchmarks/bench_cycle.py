@@ -0,0 +1,383 @@
+# 매매 사이클 전체 오프라인 벤치마크: 기록된 응답(업비트/뉴스/공포 탐욕 지수/모델/차트)과 SQLite로 ai_trading()을 N회 실행
+# 실행: python -m benchmarks.bench_cycle --iterations 20 --output bench_cycle.json
+# 결과 JSON은 키가 정렬되어 있어 커밋 간 비교(diff)에 사용할 수 있음
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import platform
+import tempfile
+import importlib
+import subprocess
+import tracemalloc
+import numpy as np
+
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qsl
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(REPO_DIR, "benchmarks", "fixtures", "cycle")
+
+# (메서드, 호스트, 경로) -> 기록된 응답 파일
+ROUTES = {
+    ("GET", "api.upbit.com", "/v1/accounts"): "accounts.json",
+    ("GET", "api.upbit.com", "/v1/ticker"): "ticker.json",
+    ("GET", "api.upbit.com", "/v1/orderbook"): "orderbook.json",
+    ("GET", "api.upbit.com", "/v1/candles/days"): "candles_days.json",
+    ("GET", "api.upbit.com", "/v1/candles/minutes/240"): "candles_minutes_240.json",
+    ("GET", "api.upbit.com", "/v1/candles/minutes/60"): "candles_minutes_60.json",
+    ("POST", "api.upbit.com", "/v1/orders"): "order_created.json",
+    ("GET", "api.upbit.com", "/v1/order"): "order.json",
+    ("GET", "api.alternative.me", "/fng/"): "fng.json",
+    ("GET", "openapi.naver.com", "/v1/search/news.json"): "naver_news.json",
+    ("GET", "serpapi.com", "/search.json"): "google_news.json",
+}
+CANDLE_STEPS = {
+    "/v1/candles/days": 86400,
+    "/v1/candles/minutes/240": 14400,
+    "/v1/candles/minutes/60": 3600,
+}
+
+# MySQL 대신 사용할 SQLite 스키마 (INSERT 문과 같은 열)
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, market TEXT, decision TEXT, percentage INTEGER,
+    reason TEXT, btc_balance REAL, krw_balance REAL, btc_avg_buy_price REAL, btc_krw_price REAL,
+    revenue_rate REAL, reflection TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_trades_market_timestamp ON trades (market, timestamp);
+CREATE TABLE IF NOT EXISTS trade_rollups (
+    market TEXT NOT NULL, resolution TEXT NOT NULL, bucket_start TEXT NOT NULL,
+    open_price REAL, high_price REAL, low_price REAL, close_price REAL, btc_balance REAL, krw_balance REAL,
+    revenue_rate REAL, buy_count INTEGER, sell_count INTEGER, hold_count INTEGER, trade_count INTEGER,
+    PRIMARY KEY (market, resolution, bucket_start)
+);
+CREATE TABLE IF NOT EXISTS executions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, order_uuid TEXT, side TEXT, ord_type TEXT, state TEXT,
+    volume REAL, funds REAL, avg_price REAL, paid_fee REAL
+);
+CREATE TABLE IF NOT EXISTS positions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, market TEXT, currency TEXT, balance REAL,
+    avg_buy_price REAL, price REAL, value_krw REAL
+);
+CREATE TABLE IF NOT EXISTS cycle_metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, cycle_id TEXT, timestamp TEXT, version TEXT, market TEXT, stage TEXT,
+    seconds REAL, status TEXT, bytes_in INTEGER, bytes_out INTEGER, prompt_chars INTEGER, retries INTEGER, model TEXT
+);
+"""
+
+@lru_cache(maxsize=None)
+def translate_sql(sql):
+    # MySQL 문법 -> SQLite (%s 자리표시자, ON DUPLICATE KEY UPDATE, GREATEST/LEAST)
+    sql = sql.replace("%s", "?")
+    sql = sql.replace("ON DUPLICATE KEY UPDATE", "ON CONFLICT DO UPDATE SET")
+    sql = re.sub(r"VALUES\((\w+)\)", r"excluded.\1", sql)
+    return sql.replace("GREATEST(", "MAX(").replace("LEAST(", "MIN(")
+
+def adapt(value):
+    return value.isoformat(sep=" ") if isinstance(value, datetime) else value
+
+class SqliteCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    @property
+    def description(self):
+        return self.cursor.description
+
+    def execute(self, sql, params=()):
+        self.cursor.execute(translate_sql(sql), tuple(adapt(v) for v in params))
+
+    def executemany(self, sql, rows):
+        self.cursor.executemany(translate_sql(sql), [tuple(adapt(v) for v in row) for row in rows])
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def close(self):
+        self.cursor.close()
+
+class SqliteConnection:
+    # db.get_db_connection()이 돌려주는 MySQL 풀 커넥션 대역 (호출마다 새 연결 = 풀에서 빌리기)
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+
+    def cursor(self):
+        return SqliteCursor(self.conn.cursor())
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+class SqliteDatabase:
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        return SqliteConnection(self.path)
+
+    def init_db(self):
+        conn = sqlite3.connect(self.path)
+        conn.executescript(SQLITE_SCHEMA)
+        conn.close()
+
+class FixtureTransport:
+    # 업비트/뉴스/공포 탐욕 지수 API 대역: HttpClient 세션 자리에서 기록된 응답을 돌려줌
+    # 캔들은 가장 최근 캔들이 현재 구간이 되도록 시각을 옮겨, 두 번째 사이클부터 실제처럼 새 캔들만 조회됨
+    def __init__(self, fixture_dir):
+        self.bodies = {}
+        for route, filename in ROUTES.items():
+            with open(os.path.join(fixture_dir, filename), encoding="utf-8") as f:
+                self.bodies[route] = json.load(f)
+        self.encoded = {}
+        self.requests = 0
+
+    def response(self, url, status, body):
+        response = Response()
+        response.status_code = status
+        response._content = body
+        response.headers = CaseInsensitiveDict({
+            "Content-Type": "application/json; charset=utf-8",
+            "Remaining-Req": "group=default; min=1800; sec=29",
+        })
+        response.url = url
+        response.encoding = "utf-8"
+        return response
+
+    def candles(self, path, body, count):
+        step = CANDLE_STEPS[path]
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        newest = datetime.fromtimestamp(now.timestamp() // step * step, timezone.utc).replace(tzinfo=None)
+        key = (path, count, newest)
+        if key not in self.encoded:
+            shift = newest - datetime.fromisoformat(body[0]["candle_date_time_utc"])
+            items = []
+            for candle in body[:count]:
+                utc = datetime.fromisoformat(candle["candle_date_time_utc"]) + shift
+                items.append(dict(
+                    candle,
+                    candle_date_time_utc=utc.isoformat(),
+                    candle_date_time_kst=(utc + timedelta(hours=9)).isoformat(),
+                    timestamp=int(utc.replace(tzinfo=timezone.utc).timestamp() * 1000),
+                ))
+            self.encoded[key] = json.dumps(items).encode()
+        return self.encoded[key]
+
+    def by_market(self, body, markets):
+        # 기록에 없는 마켓은 첫 번째 마켓 응답을 복사해 사용
+        template = body[0]
+        found = {item["market"]: item for item in body}
+        return json.dumps([found.get(market) or dict(template, market=market) for market in markets]).encode()
+
+    def request(self, method, url, params=None, **kwargs):
+        self.requests += 1
+        parts = urlsplit(url)
+        query = dict(parse_qsl(parts.query))
+        # requests는 리스트 파라미터를 같은 키로 반복해서 보냄 (markets=KRW-BTC&markets=KRW-ETH)
+        query.update({k: ",".join(v) if isinstance(v, (list, tuple)) else str(v) for k, v in (params or {}).items()})
+        route = (method, parts.hostname, parts.path)
+        body = self.bodies.get(route)
+        if body is None:
+            return self.response(url, 404, json.dumps({"error": {"message": f"no fixture for {route}"}}).encode())
+        if parts.path in CANDLE_STEPS:
+            return self.response(url, 200, self.candles(parts.path, body, int(query.get("count", 200))))
+        if parts.path in ("/v1/ticker", "/v1/orderbook"):
+            return self.response(url, 200, self.by_market(body, query["markets"].split(",")))
+        if route not in self.encoded:
+            self.encoded[route] = json.dumps(body, ensure_ascii=False).encode()
+        return self.response(url, 200, self.encoded[route])
+
+class FixtureModel:
+    # Gemini 호출 대역: JSON 모드(매매 결정) 요청에는 결정 JSON, 그 외(반성)에는 기록된 텍스트
+    def __init__(self, fixture_dir, latency=0.0):
+        with open(os.path.join(fixture_dir, "model_reflection.txt"), encoding="utf-8") as f:
+            self.reflection = f.read()
+        with open(os.path.join(fixture_dir, "model_decision.json"), encoding="utf-8") as f:
+            self.decision = f.read()
+        self.latency = latency
+
+    def call(self, model_name, contents, generation_config=None):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.decision if generation_config is not None else self.reflection
+
+class FixtureChart:
+    # 차트 캡처 서비스 대역 (Chromium 없이 기록된 PNG 반환)
+    def __init__(self, fixture_dir):
+        with open(os.path.join(fixture_dir, "chart.png"), "rb") as f:
+            self.png = f.read()
+
+    def capture_png(self):
+        return self.png
+
+    def stop(self):
+        pass
+
+def load_autotrade(args, work_dir):
+    # 환경 변수로 외부 의존을 끈 뒤, DB는 SQLite로 바꿔서 import + setup()
+    os.environ.update({
+        "TRADING_MARKETS": ",".join(args.markets),
+        "INITIAL_CAPITAL": "1350000",
+        "GEMINI_KEY": "bench",
+        "GEMINI_MODEL": "bench-model",
+        "UPBIT_ACCESS_KEY": "bench",
+        "UPBIT_SECRET_KEY": "bench",
+        "CHART_SOURCE": "capture" if args.chart == "fixture" else "render",
+        "STREAMING_MODE": "off",
+        "MODEL_CLIENT_MODE": "live",
+        "MODEL_CACHE_SIZE": "0",
+        "CANDLE_STORE_PATH": os.path.join(work_dir, "candles.db"),
+        "NEWS_CACHE_PATH": os.path.join(work_dir, "news.db"),
+        "APP_VERSION": "bench",
+    })
+    os.environ.pop("MODEL_CACHE_PATH", None)
+    os.environ.pop("CHART_ARCHIVE_DIR", None)
+
+    import db
+    database = SqliteDatabase(os.path.join(work_dir, "trades.db"))
+    db.get_db_connection = database.connect
+    db.init_db = database.init_db
+
+    autotrade = importlib.import_module("autotrade")
+    autotrade.setup()
+    transport = FixtureTransport(args.fixtures)
+    autotrade.http_client.session = lambda url: transport
+    autotrade.model_client.call = FixtureModel(args.fixtures, args.model_latency).call
+    if args.chart == "fixture":
+        autotrade.chart_service = FixtureChart(args.fixtures)
+    return autotrade, transport
+
+def stage_name(stage, market):
+    return stage if market is None else f"{market}:{stage}"
+
+def percentiles(values):
+    values = np.asarray(values) * 1000
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "mean": round(float(values.mean()), 3),
+        "min": round(float(values.min()), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+def allocation_by_file(before, after, top):
+    # 사이클 동안 늘어난 메모리를 파일(저장소 모듈/외부 패키지) 단위로 집계
+    totals = {}
+    for stat in after.compare_to(before, "filename"):
+        filename = stat.traceback[0].filename
+        if filename.startswith(REPO_DIR):
+            name = os.path.relpath(filename, REPO_DIR)
+        elif "site-packages" in filename:
+            name = filename.split("site-packages" + os.sep, 1)[1].split(os.sep, 1)[0]
+        else:
+            name = "<stdlib>"
+        totals[name] = totals.get(name, 0) + stat.size_diff
+    ranked = sorted(totals.items(), key=lambda item: abs(item[1]), reverse=True)[:top]
+    return {name: round(size / 1024, 1) for name, size in ranked}
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1, help="통계에서 제외할 첫 사이클 수 (캔들/뉴스 캐시 채우기)")
+    parser.add_argument("--alloc-iterations", type=int, default=1, help="tracemalloc으로 메모리 할당을 측정할 사이클 수")
+    parser.add_argument("--markets", nargs="+", default=["KRW-BTC"])
+    parser.add_argument("--chart", choices=["render", "fixture"], default="render")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="모델 호출마다 추가할 지연(초)")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    parser.add_argument("--output")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_cycle_")
+    started = time.perf_counter()
+    autotrade, transport = load_autotrade(args, work_dir)
+    import_seconds = time.perf_counter() - started
+    logging.getLogger().setLevel(args.log_level)
+
+    cold = None
+    cycles = []
+    stages = {}
+    for i in range(args.warmup + args.iterations):
+        started = time.perf_counter()
+        metrics = autotrade.ai_trading()
+        elapsed = time.perf_counter() - started
+        if i == 0:
+            cold = elapsed
+        if i < args.warmup:
+            continue
+        cycles.append(elapsed)
+        for (stage, market), record in metrics.records.items():
+            stages.setdefault(stage_name(stage, market), []).append(record.get("seconds", 0.0))
+
+    # 할당 측정은 추적 오버헤드가 시간 측정에 섞이지 않도록 별도 사이클에서 수행
+    allocations = None
+    if args.alloc_iterations:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        for _ in range(args.alloc_iterations):
+            autotrade.ai_trading()
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        allocations = {
+            "iterations": args.alloc_iterations,
+            "peak_kb": round(peak / 1024, 1),
+            "net_kb": round(sum(stat.size_diff for stat in after.compare_to(before, "filename")) / 1024, 1),
+            "by_file_kb": allocation_by_file(before, after, top=10),
+        }
+
+    result = {
+        "benchmark": "cycle",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "markets": args.markets,
+            "chart": args.chart,
+            "model_latency": args.model_latency,
+        },
+        "import_ms": round(import_seconds * 1000, 3),
+        "cold_cycle_ms": round(cold * 1000, 3),
+        "cycle_ms": percentiles(cycles) if cycles else None,
+        "stages_ms": {name: percentiles(values) for name, values in sorted(stages.items())},
+        "http_requests_per_cycle": round(transport.requests / (args.warmup + args.iterations + args.alloc_iterations), 1),
+        "allocations": allocations,
+    }
+
+    for name, stats in result["stages_ms"].items():
+        print(f"{name:>28}: p50 {stats['p50']:9.3f} ms | p95 {stats['p95']:9.3f} ms")
+    if cycles:
+        print(f"{'cycle':>28}: p50 {result['cycle_ms']['p50']:9.3f} ms | p95 {result['cycle_ms']['p95']:9.3f} ms (cold {result['cold_cycle_ms']:.1f} ms)")
+
+    output = json.dumps(result, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# 모듈 import 시간 벤치마크: 모듈마다 새 인터프리터에서 import만 N회 실행해 중앙값을 측정하고, -X importtime으로 누적 비용이 큰 하위 모듈을 기록
+# 실행: python -m benchmarks.bench_import --iterations 5 --output bench_import.json
+# import만 측정하므로 DB/외부 API 연결은 필요 없음 (autotrade는 setup()을 호출하지 않으면 부수 효과 없음)
+import os
+import sys
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ["autotrade", "db", "backtest", "sweep", "portfolio", "candle_store", "streamlit_app"]
+
+def import_seconds(module):
+    code = f"import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} import 실패: {result.stderr.strip().splitlines()[-1:]}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+def import_profile(module, top):
+    # -X importtime 출력(stderr): "import time: self [us] | cumulative | imported package" (하위 모듈이 상위보다 먼저, 2칸씩 들여쓰기)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(cumulative)))
+
+    # 대상 모듈 바로 앞의 더 깊은 줄들이 대상 모듈이 불러온 하위 import (인터프리터 시작 시 import는 제외)
+    end = max((i for i, (name, depth, _) in enumerate(entries) if name == module and depth == 0), default=None)
+    if end is None:
+        return {}
+    start = end
+    while start > 0 and entries[start - 1][1] > 0:
+        start -= 1
+
+    # 최상위 패키지별 최대 누적 시간 (예: pandas.core.frame -> pandas)
+    packages = {}
+    for name, _, cumulative in entries[start:end]:
+        package = name.split(".")[0]
+        packages[package] = max(packages.get(package, 0), cumulative)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {package: round(us / 1000, 1) for package, us in ranked}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="모듈별로 기록할 최상위 import 수")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        # 첫 실행은 .pyc 생성 비용이 섞이므로 버림
+        import_seconds(module)
+        samples = [import_seconds(module) for _ in range(args.iterations)]
+        results[module] = {
+            "median_ms": round(statistics.median(samples) * 1000, 1),
+            "min_ms": round(min(samples) * 1000, 1),
+            "max_ms": round(max(samples) * 1000, 1),
+            "top_imports_ms": import_profile(module, args.top),
+        }
+
+    report = {
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "iterations": args.iterations,
+        "modules": results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# 보조지표 계산 마이크로 벤치마크: 프레임별 ta 경로(add_indicators) vs 일괄 벡터 계산(compute_indicators_batch)
+# 실행: python -m benchmarks.bench_indicators
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from indicators import add_indicators, compute_indicators_batch, INDICATOR_COLUMNS
+
+INTERVALS = [("day", "D"), ("minute240", "4h"), ("minute60", "h")]
+
+def make_frames(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _, freq in INTERVALS:
+        close = 1e8 + np.cumsum(rng.normal(0, 3e5, rows))
+        frames.append(pd.DataFrame(
+            {"open": close, "high": close, "low": close, "close": close, "volume": 1.0, "value": 1.0},
+            index=pd.date_range("2020-01-01", periods=rows, freq=freq),
+        ))
+    return frames
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def check_parity(frames):
+    expected = [add_indicators(df.copy()) for df in frames]
+    actual = compute_indicators_batch(frames)
+    for exp, act in zip(expected, actual):
+        for column in INDICATOR_COLUMNS:
+            np.testing.assert_allclose(act[column], exp[column], rtol=1e-9, atol=1e-6, equal_nan=True)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[24, 1_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        frames = make_frames(rows)
+        check_parity(frames)
+        per_frame = best_time(lambda: [add_indicators(df.copy()) for df in frames], args.repeat)
+        batch = best_time(lambda: compute_indicators_batch(frames), args.repeat)
+        results.append({
+            "rows": rows,
+            "frames": len(frames),
+            "ta_per_frame_ms": round(per_frame * 1000, 3),
+            "batch_ms": round(batch * 1000, 3),
+            "speedup": round(per_frame / batch, 2),
+        })
+        print(f"{rows:>8} rows x {len(frames)}: ta {per_frame * 1000:9.3f} ms | batch {batch * 1000:9.3f} ms | x{per_frame / batch:.2f}")
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
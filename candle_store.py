@@ -0,0 +1,102 @@
+import os
+import math
+import logging
+import sqlite3
+import threading
+import pandas as pd
+
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume", "value"]
+INTERVAL_DURATIONS = {
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(days=31),
+    "minute1": timedelta(minutes=1),
+    "minute3": timedelta(minutes=3),
+    "minute5": timedelta(minutes=5),
+    "minute10": timedelta(minutes=10),
+    "minute15": timedelta(minutes=15),
+    "minute30": timedelta(minutes=30),
+    "minute60": timedelta(hours=1),
+    "minute240": timedelta(hours=4),
+}
+
+class CandleStore:
+    # (마켓, 캔들 간격)별 OHLCV를 SQLite에 쌓아두고 마지막 저장 시점 이후의 캔들만 새로 받아오는 저장소
+    def __init__(self, path=None, max_rows=1000, fetcher=None):
+        self.path = path or os.getenv('CANDLE_STORE_PATH', 'candles.db')
+        self.max_rows = max_rows  # 메모리에 유지할 최대 캔들 수
+        self.fetcher = fetcher
+        self.frames = {}
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS candles (
+                market TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL, value REAL,
+                PRIMARY KEY (market, interval, ts)
+            ) WITHOUT ROWID
+        ''')
+        self.conn.commit()
+
+    def load(self, market, interval):
+        rows = self.conn.execute(
+            "SELECT ts, open, high, low, close, volume, value FROM candles "
+            "WHERE market = ? AND interval = ? ORDER BY ts DESC LIMIT ?",
+            (market, interval, self.max_rows),
+        ).fetchall()
+        df = pd.DataFrame(rows[::-1], columns=["ts"] + OHLCV_COLUMNS)
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("ts")))
+        return df.astype(float)
+
+    def save(self, market, interval, df):
+        rows = [
+            (market, interval, ts.isoformat(), *(float(v) for v in values))
+            for ts, values in zip(df.index, df[OHLCV_COLUMNS].itertuples(index=False))
+        ]
+        self.conn.executemany("INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self.conn.commit()
+
+    def cached_frame(self, market, interval):
+        key = (market, interval)
+        if key not in self.frames:
+            with self.lock:
+                self.frames[key] = self.load(market, interval)
+        return self.frames[key]
+
+    def missing_count(self, df, interval, count, now):
+        # 저장된 캔들이 부족하면 전체 구간, 아니면 마지막 캔들(진행 중이었을 수 있음)부터 현재까지만 요청
+        if len(df) < count:
+            return count
+        elapsed = now - df.index[-1].to_pydatetime()
+        return min(math.floor(elapsed / INTERVAL_DURATIONS[interval]) + 1, count)
+
+    def get(self, market, interval, count, now=None):
+        now = now or datetime.now()
+        df = self.cached_frame(market, interval)
+
+        fetch_count = self.missing_count(df, interval, count, now)
+        if self.fetcher is None:
+            import pyupbit
+            self.fetcher = pyupbit.get_ohlcv
+        new = self.fetcher(market, interval=interval, count=fetch_count)
+        if new is None:
+            if len(df) < count:
+                return None
+            logger.warning(f"{market} {interval} 캔들 갱신 실패, 저장된 캔들을 사용합니다.")
+            return df.iloc[-count:].copy()
+        new = new[OHLCV_COLUMNS]
+
+        with self.lock:
+            # 새로 받은 캔들이 같은 시각의 기존 캔들(진행 중이던 캔들)을 덮어씀
+            merged = pd.concat([df[~df.index.isin(new.index)], new]).sort_index()
+            self.frames[(market, interval)] = merged.iloc[-self.max_rows:]
+            self.save(market, interval, new)
+
+        logger.info(f"{market} {interval} 캔들 {fetch_count}개 요청 (보관 {len(merged)}개)")
+        return merged.iloc[-count:].copy()
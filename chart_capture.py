@@ -0,0 +1,222 @@
+import time
+import logging
+import threading
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+
+logger = logging.getLogger(__name__)
+
+CHART_URL = "https://upbit.com/full_chart?code=CRIX.UPBIT.KRW-BTC"
+CHART_TOOLBAR_XPATH = "/html/body/div[1]/div[2]/div[3]/span/div/div/div[1]/div/div"
+TIME_MENU_XPATH = f"{CHART_TOOLBAR_XPATH}/cq-menu[1]"
+STUDY_MENU_XPATH = f"{CHART_TOOLBAR_XPATH}/cq-menu[3]"
+STUDY_ITEM_XPATH = f"{STUDY_MENU_XPATH}/cq-menu-dropdown/cq-scroll/cq-studies/cq-studies-content/cq-item[{{}}]"
+
+# (지표 이름, cq-item 순번)
+CHART_STUDIES = [
+    # 추세 지표
+    ("MACD 옵션", 53),
+    ("ADX 옵션", 1),
+    # 모멘텀 지표
+    ("RSI 옵션", 81),
+    ("스토캐스틱 모멘텀 옵션", 91),
+    # 변동성 지표
+    ("볼린저 밴드 옵션", 15),
+    ("ATR 옵션", 2),
+    # 거래량 지표
+    ("OBV 옵션", 63),
+    ("VWAP 옵션", 104),
+]
+
+# # 로컬용
+# def setup_chrome_options():
+#     chrome_options = Options()
+#     chrome_options.add_argument("--start-maximized")
+#     chrome_options.add_argument("--headless")  # 디버깅을 위해 헤드리스 모드 비활성화
+#     chrome_options.add_argument("--disable-gpu")
+#     chrome_options.add_argument("--no-sandbox")
+#     chrome_options.add_argument("--disable-dev-shm-usage")
+#     chrome_options.add_argument("--enable-unsafe-swiftshader")
+#     chrome_options.add_argument("--window-size=1920,3000")
+#     chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
+#     return chrome_options
+
+# def create_driver():
+#     logger.info("ChromeDriver 설정 중...")
+#     service = Service(ChromeDriverManager().install())
+#     driver = webdriver.Chrome(service=service, options=setup_chrome_options())
+#     return driver
+
+# EC2 서버용
+def create_driver():
+    logger.info("ChromeDriver 설정 중...")
+    try:
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")  # 헤드리스 모드 사용
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--window-size=1920,3000")
+
+        service = Service('/usr/bin/chromedriver')  # Specify the path to the ChromeDriver executable
+
+        # Initialize the WebDriver with the specified options
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+
+        return driver
+    except Exception as e:
+        logger.error(f"ChromeDriver 생성 중 오류 발생: {e}")
+        raise
+
+def scroll_into_view(driver, xpath):
+    try:
+        # XPath로 요소 찾기
+        element = driver.find_element(By.XPATH, xpath)
+
+        # 요소를 화면 중앙으로 스크롤 (스크롤은 동기적으로 처리되므로 별도 대기 없음)
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
+    except Exception as e:
+        logger.error(f"스크롤 중 오류 발생: {e}")
+
+def click_element_by_xpath(driver, xpath, element_name, wait_time=10):
+    try:
+        # 요소가 클릭 가능할 때까지 대기 (고정 대기 대신 준비 상태를 확인)
+        WebDriverWait(driver, wait_time).until(EC.presence_of_element_located((By.XPATH, xpath)))
+
+        # 요소가 보이도록 스크롤
+        scroll_into_view(driver, xpath)
+
+        element = WebDriverWait(driver, wait_time).until(
+            EC.element_to_be_clickable((By.XPATH, xpath))
+        )
+        element.click()
+
+        logger.info(f"{element_name} 클릭 완료")
+        return True
+    except TimeoutException:
+        logger.error(f"{element_name} 요소를 찾는 데 시간이 초과되었습니다.")
+    except ElementClickInterceptedException:
+        logger.error(f"{element_name} 요소를 클릭할 수 없습니다. 다른 요소에 가려져 있을 수 있습니다.")
+    except Exception as e:
+        logger.error(f"{element_name} 클릭 중 오류 발생: {e}")
+    return False
+
+def perform_chart_actions(driver):
+    # 시간 설정
+    click_element_by_xpath(driver, TIME_MENU_XPATH, "시간 메뉴")
+    click_element_by_xpath(driver, f"{TIME_MENU_XPATH}/cq-menu-dropdown/cq-item[8]", "1시간 옵션")
+
+    # 보조 지표 추가
+    for study_name, item_index in CHART_STUDIES:
+        click_element_by_xpath(driver, STUDY_MENU_XPATH, "지표 메뉴")
+        click_element_by_xpath(driver, STUDY_ITEM_XPATH.format(item_index), study_name)
+
+def wait_for_chart_ready(driver, timeout):
+    # 문서 로드 완료 + 차트 툴바 렌더링 완료까지 대기
+    WebDriverWait(driver, timeout).until(
+        lambda d: d.execute_script("return document.readyState") == "complete"
+    )
+    WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.XPATH, TIME_MENU_XPATH))
+    )
+
+def wait_for_next_paint(driver):
+    # 실시간으로 갱신되는 차트가 최신 프레임을 그린 뒤 캡처하도록 두 번의 animation frame을 기다림
+    driver.execute_async_script(
+        "const done = arguments[arguments.length - 1];"
+        "requestAnimationFrame(() => requestAnimationFrame(() => done(true)));"
+    )
+
+class ChartCaptureService:
+    # 차트 페이지를 한 번 설정해 두고 여러 사이클에 걸쳐 재사용하는 캡처 서비스
+    def __init__(self, url=CHART_URL, ready_timeout=60, max_page_age=6 * 60 * 60, refresh_interval=15 * 60):
+        self.url = url
+        self.ready_timeout = ready_timeout
+        self.max_page_age = max_page_age  # 이 시간(초)이 지나면 페이지를 새로 구성
+        self.refresh_interval = refresh_interval  # 이 시간(초)이 지나면 새로고침 (실시간 갱신이 멈춘 차트를 캡처하지 않도록)
+        self.driver = None
+        self.page_loaded_at = None
+        self.page_refreshed_at = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.driver = create_driver()
+        self.driver.set_script_timeout(self.ready_timeout)
+        self.load_page()
+
+    def load_page(self):
+        start = time.perf_counter()
+        self.driver.get(self.url)
+        wait_for_chart_ready(self.driver, self.ready_timeout)
+        logger.info(f"페이지 로드 완료 ({time.perf_counter() - start:.1f}초)")
+        logger.info("차트 작업 시작")
+        perform_chart_actions(self.driver)
+        logger.info("차트 작업 완료")
+        self.page_loaded_at = time.monotonic()
+        self.page_refreshed_at = self.page_loaded_at
+
+    def refresh_page(self):
+        start = time.perf_counter()
+        self.driver.refresh()
+        wait_for_chart_ready(self.driver, self.ready_timeout)
+        # 새로고침하면 시간 단위/보조지표 설정이 초기화되므로 다시 적용
+        perform_chart_actions(self.driver)
+        self.page_refreshed_at = time.monotonic()
+        logger.info(f"차트 페이지 새로고침 완료 ({time.perf_counter() - start:.1f}초)")
+
+    def stop(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+            except WebDriverException as e:
+                logger.error(f"WebDriver 종료 중 오류 발생: {e}")
+        self.driver = None
+        self.page_loaded_at = None
+        self.page_refreshed_at = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def is_alive(self):
+        if self.driver is None:
+            return False
+        try:
+            # 브라우저가 죽었거나 페이지가 비정상이면 예외가 발생하거나 차트 툴바가 사라짐
+            return bool(self.driver.find_elements(By.XPATH, TIME_MENU_XPATH))
+        except WebDriverException:
+            return False
+
+    def ensure_ready(self):
+        if not self.is_alive():
+            logger.info("차트 브라우저 세션 (재)시작")
+            self.restart()
+        elif time.monotonic() - self.page_loaded_at > self.max_page_age:
+            logger.info("차트 페이지가 오래되어 다시 구성합니다.")
+            self.load_page()
+        elif time.monotonic() - self.page_refreshed_at > self.refresh_interval:
+            logger.info("차트 페이지를 새로고침합니다.")
+            self.refresh_page()
+
+    def capture_png(self):
+        with self.lock:
+            start = time.perf_counter()
+            try:
+                self.ensure_ready()
+                wait_for_next_paint(self.driver)
+                png = self.driver.get_screenshot_as_png()
+            except WebDriverException as e:
+                # 세션이 끊긴 경우 한 번만 재시작 후 다시 시도
+                logger.error(f"WebDriver 오류 발생, 세션을 재시작합니다: {e}")
+                self.restart()
+                wait_for_next_paint(self.driver)
+                png = self.driver.get_screenshot_as_png()
+            logger.info(f"차트 캡처 완료 ({time.perf_counter() - start:.1f}초)")
+            return png
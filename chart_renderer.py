@@ -0,0 +1,141 @@
+import io
+import ta
+import numpy as np
+
+# pyplot 전역 상태 없이 Agg 캔버스로 직접 렌더링 (브라우저/디스플레이 불필요, 스레드 안전)
+from matplotlib.figure import Figure
+
+# 업비트 차트에서 추가하던 보조지표와 동일한 패널 구성
+PANELS = ["price", "volume", "macd", "adx", "rsi", "stoch", "atr"]
+PANEL_HEIGHTS = {"price": 3, "volume": 1.2, "macd": 1, "adx": 1, "rsi": 1, "stoch": 1, "atr": 1}
+UP_COLOR = "#c84a31"    # 업비트 양봉 색상
+DOWN_COLOR = "#1261c4"  # 업비트 음봉 색상
+
+def safe_indicator(func):
+    # 캔들 수가 지표 기간보다 짧으면 ta가 예외를 던지므로 None으로 대체
+    try:
+        return func()
+    except (IndexError, ValueError, ZeroDivisionError):
+        return None
+
+def compute_chart_studies(df):
+    high, low, close, volume = df['high'], df['low'], df['close'], df['volume']
+    studies = {}
+
+    bb = ta.volatility.BollingerBands(close=close, window=20, window_dev=2)
+    studies['bb_bbm'] = bb.bollinger_mavg()
+    studies['bb_bbh'] = bb.bollinger_hband()
+    studies['bb_bbl'] = bb.bollinger_lband()
+    studies['vwap'] = ta.volume.VolumeWeightedAveragePrice(high, low, close, volume, window=14).volume_weighted_average_price()
+    studies['obv'] = ta.volume.OnBalanceVolumeIndicator(close, volume).on_balance_volume()
+
+    macd = ta.trend.MACD(close=close)
+    studies['macd'] = macd.macd()
+    studies['macd_signal'] = macd.macd_signal()
+    studies['macd_diff'] = macd.macd_diff()
+
+    adx = safe_indicator(lambda: ta.trend.ADXIndicator(high, low, close, window=14))
+    if adx is not None:
+        studies['adx'] = safe_indicator(adx.adx)
+        studies['adx_pos'] = safe_indicator(adx.adx_pos)
+        studies['adx_neg'] = safe_indicator(adx.adx_neg)
+
+    studies['rsi'] = ta.momentum.RSIIndicator(close=close, window=14).rsi()
+
+    stoch = ta.momentum.StochasticOscillator(high, low, close, window=14, smooth_window=3)
+    studies['stoch_k'] = stoch.stoch()
+    studies['stoch_d'] = stoch.stoch_signal()
+
+    studies['atr'] = safe_indicator(lambda: ta.volatility.AverageTrueRange(high, low, close, window=14).average_true_range())
+
+    # ADX/ATR은 워밍업 구간을 0으로 채우므로 선이 바닥에서 튀지 않게 비워둠
+    for name in ('adx', 'adx_pos', 'adx_neg', 'atr'):
+        if studies.get(name) is not None:
+            studies[name] = studies[name].mask(studies[name] == 0)
+
+    return {name: series for name, series in studies.items() if series is not None}
+
+def compute_chart_window(df, count=None):
+    # 보조지표는 워밍업 구간까지 포함한 전체 이력으로 계산한 뒤 화면에 그릴 최근 count개만 잘라냄
+    # (24~30개만으로 계산하면 MACD/ADX는 비어 있고 BB/RSI/ATR은 일부 구간만 그려짐)
+    studies = compute_chart_studies(df)
+    if count is not None and len(df) > count:
+        df = df.iloc[-count:]
+        studies = {name: series.iloc[-count:] for name, series in studies.items()}
+    return df, studies
+
+def draw_candles(ax, df, x):
+    opens = df['open'].to_numpy()
+    closes = df['close'].to_numpy()
+    colors = np.where(closes >= opens, UP_COLOR, DOWN_COLOR)
+    ax.vlines(x, df['low'].to_numpy(), df['high'].to_numpy(), colors=colors, linewidth=0.8)
+    ax.bar(x, np.abs(closes - opens), bottom=np.minimum(opens, closes), width=0.6, color=colors)
+
+def draw_panel(ax, panel, df, studies, x):
+    if panel == "price":
+        draw_candles(ax, df, x)
+        for name, style in (('bb_bbh', ':'), ('bb_bbm', '-'), ('bb_bbl', ':')):
+            ax.plot(x, studies[name], linestyle=style, color="#888888", linewidth=0.8)
+        ax.plot(x, studies['vwap'], color="#e69500", linewidth=0.9, label="VWAP")
+        ax.set_ylabel("Price / BB / VWAP")
+    elif panel == "volume":
+        colors = np.where(df['close'].to_numpy() >= df['open'].to_numpy(), UP_COLOR, DOWN_COLOR)
+        ax.bar(x, df['volume'].to_numpy(), width=0.6, color=colors, alpha=0.6)
+        ax.twinx().plot(x, studies['obv'], color="#6a3d9a", linewidth=0.9)
+        ax.set_ylabel("Volume / OBV")
+    elif panel == "macd":
+        ax.bar(x, studies['macd_diff'], width=0.6, color="#999999")
+        ax.plot(x, studies['macd'], color="#1f77b4", linewidth=0.9)
+        ax.plot(x, studies['macd_signal'], color="#ff7f0e", linewidth=0.9)
+        ax.set_ylabel("MACD")
+    elif panel == "adx":
+        for name, color in (('adx', "#333333"), ('adx_pos', UP_COLOR), ('adx_neg', DOWN_COLOR)):
+            if name in studies:
+                ax.plot(x, studies[name], color=color, linewidth=0.9)
+        ax.set_ylabel("ADX")
+    elif panel == "rsi":
+        ax.plot(x, studies['rsi'], color="#6a3d9a", linewidth=0.9)
+        ax.axhline(70, color="#bbbbbb", linewidth=0.6)
+        ax.axhline(30, color="#bbbbbb", linewidth=0.6)
+        ax.set_ylim(0, 100)
+        ax.set_ylabel("RSI")
+    elif panel == "stoch":
+        ax.plot(x, studies['stoch_k'], color="#1f77b4", linewidth=0.9)
+        ax.plot(x, studies['stoch_d'], color="#ff7f0e", linewidth=0.9)
+        ax.axhline(80, color="#bbbbbb", linewidth=0.6)
+        ax.axhline(20, color="#bbbbbb", linewidth=0.6)
+        ax.set_ylim(0, 100)
+        ax.set_ylabel("Stochastic")
+    elif panel == "atr":
+        if 'atr' in studies:
+            ax.plot(x, studies['atr'], color="#333333", linewidth=0.9)
+        ax.set_ylabel("ATR")
+
+def format_time_axis(ax, df, x):
+    step = max(len(x) // 6, 1)
+    ax.set_xticks(x[::step])
+    ax.set_xticklabels([ts.strftime("%m-%d %H:%M") for ts in df.index[::step]], fontsize=7)
+
+def render_chart_png(frames, width=1920, height=3000, dpi=100):
+    # frames: [(제목, 워밍업 이력을 포함한 OHLCV DataFrame, 그릴 캔들 수), ...] -> 타임프레임별 열, 보조지표별 행으로 그린 PNG 바이트
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    axes = fig.subplots(
+        len(PANELS), len(frames),
+        sharex='col', squeeze=False,
+        gridspec_kw={"height_ratios": [PANEL_HEIGHTS[p] for p in PANELS]},
+    )
+    for col, (title, df, count) in enumerate(frames):
+        df, studies = compute_chart_window(df, count)
+        x = np.arange(len(df))
+        for row, panel in enumerate(PANELS):
+            ax = axes[row][col]
+            draw_panel(ax, panel, df, studies, x)
+            ax.grid(True, linewidth=0.3)
+            ax.tick_params(labelsize=7)
+        axes[0][col].set_title(title)
+        format_time_axis(axes[-1][col], df, x)
+
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi)
+    return buffer.getvalue()
@@ -0,0 +1,187 @@
+import os
+import time
+import logging
+import threading
+import mysql.connector
+
+from mysql.connector import pooling
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from rollups import create_rollup_table, backfill_rollups, ADD_ROLLUP_MARKET_SQL
+from execution import create_executions_table
+from portfolio import create_positions_table
+from telemetry import create_metrics_table
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+pool = None
+pool_lock = threading.Lock()
+# 풀이 비어 있을 때 커넥션 반환을 기다릴 최대 시간(초)
+pool_timeout = float(os.getenv('MYSQL_POOL_TIMEOUT', '10'))
+
+def default_pool_size():
+    # 마켓별 최근 거래 조회 단계가 동시에 돌고 일괄 기록기/대시보드도 커넥션을 쓰므로 마켓 수 + 여유분 (MySQL 풀 최대 32)
+    markets = [m for m in os.getenv('TRADING_MARKETS', 'KRW-BTC').split(',') if m.strip()]
+    return min(max(5, len(markets) + 3), pooling.CNX_POOL_MAXSIZE)
+
+def get_pool():
+    # 자동매매/대시보드가 공유하는 커넥션 풀 (프로세스당 한 번 생성)
+    global pool
+    with pool_lock:
+        if pool is None:
+            pool = pooling.MySQLConnectionPool(
+                pool_name="trades",
+                pool_size=int(os.getenv('MYSQL_POOL_SIZE') or default_pool_size()),
+                pool_reset_session=True,
+                host=os.getenv('MYSQL_HOST'),
+                port=os.getenv('MYSQL_PORT'),
+                user=os.getenv('MYSQL_USER'),
+                password=os.getenv('MYSQL_PASSWORD'),
+                database=os.getenv('MYSQL_DB')
+            )
+        return pool
+
+def borrow_connection(timeout=None):
+    # MySQLConnectionPool은 비어 있으면 기다리지 않고 PoolError를 던지므로 반환될 때까지 간격을 늘려가며 재시도
+    deadline = time.monotonic() + (pool_timeout if timeout is None else timeout)
+    delay = 0.01
+    while True:
+        try:
+            return get_pool().get_connection()
+        except mysql.connector.errors.PoolError:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.error("DB 커넥션 풀이 비어 있어 커넥션을 빌리지 못했습니다.")
+                raise
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.2)
+
+def get_db_connection(timeout=None):
+    # 풀에서 커넥션을 빌려오고, 끊어진 커넥션이면 재연결 (close() 시 풀로 반환)
+    conn = borrow_connection(timeout)
+    try:
+        conn.ping(reconnect=True, attempts=2, delay=1)
+    except mysql.connector.Error as e:
+        logger.warning(f"DB 커넥션 상태 확인 실패, 새 커넥션으로 교체합니다: {e}")
+        conn.close()
+        conn = borrow_connection(timeout)
+    return conn
+
+def ensure_index(cursor, table, index_name, columns):
+    # MySQL에는 CREATE INDEX IF NOT EXISTS가 없으므로 information_schema로 확인
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+        (table, index_name)
+    )
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(f"CREATE INDEX {index_name} ON {table} ({columns})")
+        logger.info(f"{table}.{index_name} 인덱스 생성")
+
+def column_exists(cursor, table, column):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s",
+        (table, column)
+    )
+    return cursor.fetchone()[0] > 0
+
+def init_db():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS trades (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            market VARCHAR(16) DEFAULT 'KRW-BTC',
+            decision VARCHAR(10),
+            percentage INT,
+            reason TEXT,
+            btc_balance DECIMAL(18,8),
+            krw_balance DECIMAL(18,8),
+            btc_avg_buy_price DECIMAL(18,8),
+            btc_krw_price DECIMAL(18,8),
+            revenue_rate DECIMAL(6,2),
+            reflection TEXT
+        )
+    ''')
+    # 대시보드/최근 거래 조회의 ORDER BY timestamp DESC, 결정별 집계용 인덱스
+    ensure_index(cursor, "trades", "idx_trades_timestamp", "timestamp")
+    ensure_index(cursor, "trades", "idx_trades_decision", "decision")
+    # 여러 마켓 거래 시 마켓별 최근 거래 조회용 (btc_* 열은 해당 마켓 코인의 값)
+    if not column_exists(cursor, "trades", "market"):
+        cursor.execute("ALTER TABLE trades ADD COLUMN market VARCHAR(16) DEFAULT 'KRW-BTC' AFTER timestamp")
+        logger.info("trades.market 열 추가")
+    ensure_index(cursor, "trades", "idx_trades_market_timestamp", "market, timestamp")
+    # 대시보드 차트용 시간/일/주 단위 집계 테이블 (마켓별)
+    create_rollup_table(cursor)
+    if not column_exists(cursor, "trade_rollups", "market"):
+        cursor.execute(ADD_ROLLUP_MARKET_SQL)
+        logger.info("trade_rollups.market 열 추가")
+    backfilled = backfill_rollups(cursor)
+    if backfilled:
+        logger.info(f"trade_rollups 초기 집계 {backfilled}건 생성")
+    # 주문 UUID별 실제 체결 기록
+    create_executions_table(cursor)
+    # 사이클별 마켓 보유 현황
+    create_positions_table(cursor)
+    # 사이클 단계별 성능 기록
+    create_metrics_table(cursor)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+class BatchWriter:
+    # INSERT를 모아 두었다가 한 트랜잭션에서 executemany로 기록
+    def __init__(self, max_rows=50):
+        self.max_rows = max_rows
+        self.pending = []
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+
+    def add(self, sql, values):
+        with self.lock:
+            self.pending.append((sql, values))
+            should_flush = len(self.pending) >= self.max_rows
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, []
+        if not pending:
+            return 0
+
+        # 같은 SQL끼리 묶어서 executemany
+        batches = {}
+        for sql, values in pending:
+            batches.setdefault(sql, []).append(values)
+
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            for sql, rows in batches.items():
+                cursor.executemany(sql, rows)
+            conn.commit()
+            cursor.close()
+        except mysql.connector.Error:
+            conn.rollback()
+            # 기록 실패 시 다음 flush에서 다시 시도하도록 되돌려 둠
+            with self.lock:
+                self.pending = pending + self.pending
+            raise
+        finally:
+            conn.close()
+        return len(pending)
+
+    def flush_later(self):
+        # 매매 경로를 막지 않도록 백그라운드 스레드에서 기록 (실패는 로그만 남기고 다음 flush에서 재시도)
+        def flush_safely():
+            try:
+                return self.flush()
+            except mysql.connector.Error as e:
+                logger.error(f"DB 일괄 기록 중 오류 발생: {e}")
+                return 0
+        return self.executor.submit(flush_safely)
@@ -0,0 +1,104 @@
+import re
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+DECISIONS = ("buy", "sell", "hold")
+
+# Gemini JSON 모드: 응답을 이 스키마의 JSON으로만 생성하도록 요청
+DECISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "decision": {"type": "string", "enum": list(DECISIONS)},
+        "percentage": {"type": "integer"},
+        "reason": {"type": "string"},
+    },
+    "required": ["decision", "percentage", "reason"],
+}
+DECISION_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": DECISION_SCHEMA,
+}
+
+CORRECTION_PROMPT = """Your previous response could not be used: {error}
+Reply again with only one JSON object: {{"decision": "buy" | "sell" | "hold", "percentage": integer, "reason": string}}.
+percentage must be 1-100 for buy/sell and 0 for hold."""
+
+FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+
+class DecisionError(ValueError):
+    pass
+
+def extract_json(text):
+    # 코드 블록(```json ... ```)이나 앞뒤 설명이 섞인 응답에서 첫 번째 JSON 객체를 추출
+    if not isinstance(text, str) or not text.strip():
+        raise DecisionError("empty response")
+    fenced = FENCE_PATTERN.search(text)
+    if fenced:
+        text = fenced.group(1)
+    text = text.strip()
+
+    decoder = json.JSONDecoder()
+    for match in re.finditer(r"\{", text):
+        candidate = text[match.start():]
+        try:
+            data, _ = decoder.raw_decode(candidate)
+            return data
+        except json.JSONDecodeError:
+            pass
+        # 응답이 중간에 끊긴 경우 닫는 따옴표/괄호를 붙여서 한 번 더 시도
+        for suffix in ('}', '"}'):
+            try:
+                data, _ = decoder.raw_decode(candidate + suffix)
+                return data
+            except json.JSONDecodeError:
+                continue
+    raise DecisionError(f"no JSON object in response: {text[:80]!r}")
+
+def validate_decision(data):
+    if not isinstance(data, dict):
+        raise DecisionError(f"expected a JSON object, got {type(data).__name__}")
+
+    decision = str(data.get("decision", "")).strip().lower()
+    if decision not in DECISIONS:
+        raise DecisionError(f"decision must be one of {', '.join(DECISIONS)}, got {data.get('decision')!r}")
+
+    raw_percentage = data.get("percentage", 0)
+    try:
+        percentage = float(str(raw_percentage).strip().rstrip("%"))
+    except ValueError:
+        raise DecisionError(f"percentage must be a number, got {raw_percentage!r}")
+    if decision == "hold":
+        percentage = 0
+    elif not 1 <= percentage <= 100:
+        raise DecisionError(f"percentage for {decision} must be between 1 and 100, got {raw_percentage!r}")
+
+    return {"decision": decision, "percentage": int(round(percentage)), "reason": str(data.get("reason", ""))}
+
+def parse_decision(text):
+    return validate_decision(extract_json(text))
+
+def hold_decision(reason):
+    # 판단을 얻지 못한 사이클은 주문 없이 관망으로 기록
+    return {"decision": "hold", "percentage": 0, "reason": reason}
+
+def request_decision(client, contents):
+    # JSON 모드로 판단을 요청하고, 형식이 잘못된 경우 전체 사이클 대신 짧은 수정 요청으로 한 번만 재시도
+    text = client.generate(contents, generation_config=DECISION_GENERATION_CONFIG)
+    try:
+        return parse_decision(text)
+    except DecisionError as e:
+        logger.warning(f"AI 응답 형식 오류, 수정 요청 후 재시도: {e}")
+        # 잘못된 응답이 다음 사이클에 캐시로 재사용되지 않도록 제거
+        client.invalidate(contents, generation_config=DECISION_GENERATION_CONFIG)
+        correction = contents + [
+            {"role": "model", "parts": [{"text": text}]},
+            {"role": "user", "parts": [{"text": CORRECTION_PROMPT.format(error=e)}]},
+        ]
+        text = client.generate(correction, generation_config=DECISION_GENERATION_CONFIG)
+        try:
+            return parse_decision(text)
+        except DecisionError:
+            client.invalidate(correction, generation_config=DECISION_GENERATION_CONFIG)
+            raise
@@ -0,0 +1,146 @@
+import csv
+import math
+import time
+import logging
+import threading
+
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class VolatilityTrigger:
+    # 최근 window초 동안의 가격 변화율/실현 변동성을 누적하고 임계값을 넘으면 조기 매매 사이클을 요청
+    def __init__(self, window=300, price_change=0.01, volatility=0.015, cooldown=900, max_per_hour=2, clock=time.monotonic):
+        self.window = window
+        self.price_change = price_change
+        self.volatility = volatility
+        self.cooldown = cooldown
+        self.max_per_hour = max_per_hour
+        self.prices = deque()  # (시각, 가격)
+        self.returns = deque()  # (시각, 로그 수익률 제곱)
+        self.squared_sum = 0.0
+        self.last_cycle = None
+        self.triggers = deque()  # 최근 1시간 동안의 조기 사이클 시각
+        self.clock = clock
+        self.clock_offset = None  # 마지막 체결 시각 - 로컬 시계 (스트림 시각을 현재로 외삽할 때 사용)
+
+    def update(self, ts, price):
+        # 새 체결가 반영 후 조기 사이클이 필요하면 사유 문자열, 아니면 None
+        if self.prices:
+            r = math.log(price / self.prices[-1][1])
+            self.returns.append((ts, r * r))
+            self.squared_sum += r * r
+        self.prices.append((ts, price))
+        self.clock_offset = ts - self.clock()
+
+        # 구간 밖으로 나간 값 제거 (가장 오래된 가격 하나는 변화율 기준으로 남김)
+        while len(self.prices) > 1 and self.prices[1][0] <= ts - self.window:
+            self.prices.popleft()
+        while self.returns and self.returns[0][0] <= ts - self.window:
+            self.squared_sum -= self.returns.popleft()[1]
+        while self.triggers and self.triggers[0] <= ts - 3600:
+            self.triggers.popleft()
+
+        change = price / self.prices[0][1] - 1
+        volatility = math.sqrt(max(self.squared_sum, 0.0))
+        if abs(change) >= self.price_change:
+            reason = f"{self.window}초 가격 변화 {change * 100:+.2f}%"
+        elif volatility >= self.volatility:
+            reason = f"{self.window}초 실현 변동성 {volatility * 100:.2f}%"
+        else:
+            return None
+
+        if self.last_cycle is not None and ts - self.last_cycle < self.cooldown:
+            return None
+        if len(self.triggers) >= self.max_per_hour:
+            return None
+        self.triggers.append(ts)
+        self.last_cycle = ts
+        return reason
+
+    def now(self):
+        # 현재 시각을 스트림 시각 기준으로 환산 (마지막 체결 이후 흐른 시간을 더함, 체결이 없었으면 벽시계)
+        # 마지막 체결 시각을 그대로 쓰면 스트림이 조용할 때 쿨다운 기준이 과거로 잡힘
+        if self.clock_offset is None:
+            return time.time()
+        return self.clock() + self.clock_offset
+
+    def record_cycle(self, ts=None):
+        # 정시 사이클도 쿨다운 기준 시각으로 사용
+        self.last_cycle = ts if ts is not None else self.now()
+
+class UpbitTickerSource:
+    # 업비트 WebSocket 현재가 스트림 -> (시각(초), 체결가)
+    def __init__(self, market="KRW-BTC"):
+        self.market = market
+
+    def __iter__(self):
+        from pyupbit import WebSocketManager
+
+        manager = WebSocketManager("ticker", [self.market])
+        try:
+            while True:
+                data = manager.get()
+                if not isinstance(data, dict):
+                    # 연결이 끊기면 WebSocketManager가 재연결하고 문자열 알림을 넣어줌
+                    logger.warning(f"WebSocket 메시지 무시: {data}")
+                    continue
+                yield data["timestamp"] / 1000, float(data["trade_price"])
+        finally:
+            manager.terminate()
+
+class ReplaySource:
+    # 테스트용: CSV(timestamp,price)나 (시각, 가격) 목록을 순서대로 재생 (speed > 0이면 실제 간격/speed만큼 대기)
+    def __init__(self, ticks, speed=0):
+        self.ticks = ticks
+        self.speed = speed
+
+    @classmethod
+    def from_csv(cls, path, speed=0):
+        with open(path, encoding="utf-8") as f:
+            return cls([(float(row["timestamp"]), float(row["price"])) for row in csv.DictReader(f)], speed)
+
+    def __iter__(self):
+        previous = None
+        for ts, price in self.ticks:
+            if self.speed and previous is not None:
+                time.sleep(max(ts - previous, 0) / self.speed)
+            previous = ts
+            yield ts, price
+
+class EventTrigger:
+    # 스트림을 백그라운드 스레드에서 소비하고, 메인 루프는 wait()로 다음 정시 또는 조기 트리거까지 대기
+    def __init__(self, source, trigger):
+        self.source = source
+        self.trigger = trigger
+        self.reason = None
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.consume, name="event-trigger", daemon=True)
+        self.thread.start()
+
+    def consume(self):
+        try:
+            for ts, price in self.source:
+                with self.lock:
+                    reason = self.trigger.update(ts, price)
+                if reason:
+                    self.reason = reason
+                    self.event.set()
+        except Exception as e:
+            # 스트림이 멈춰도 정시 스케줄은 계속 동작
+            logger.error(f"가격 스트림 중단, 정시 스케줄만 사용합니다: {e}")
+
+    def wait(self, timeout):
+        # 조기 트리거 사유를 반환, timeout까지 아무 일도 없으면 None (정시 사이클)
+        fired = self.event.wait(timeout)
+        self.event.clear()
+        reason, self.reason = self.reason, None
+        if not fired:
+            # 조기 사이클은 update()가 트리거를 일으킨 체결 시각으로 이미 기록함
+            with self.lock:
+                self.trigger.record_cycle()
+        return reason if fired else None
@@ -0,0 +1,160 @@
+import time
+import logging
+
+from trading_rules import MIN_ORDER_KRW
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATES = ("done", "cancel")
+
+INSERT_EXECUTION_SQL = """INSERT INTO executions
+    (timestamp, order_uuid, side, ord_type, state, volume, funds, avg_price, paid_fee)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"""
+
+def create_executions_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS executions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            timestamp DATETIME,
+            order_uuid VARCHAR(64),
+            side VARCHAR(4),
+            ord_type VARCHAR(10),
+            state VARCHAR(10),
+            volume DECIMAL(18,8),
+            funds DECIMAL(18,8),
+            avg_price DECIMAL(18,8),
+            paid_fee DECIMAL(18,8),
+            INDEX idx_executions_timestamp (timestamp)
+        )
+    ''')
+
+def summarize_order(order):
+    # get_order(uuid) 응답의 실제 체결 내역(trades)으로 체결 수량/금액/수수료 계산
+    trades = order.get("trades") or []
+    volume = sum(float(t["volume"]) for t in trades)
+    funds = sum(float(t["funds"]) for t in trades)
+    return {
+        "uuid": order["uuid"],
+        "side": "buy" if order["side"] == "bid" else "sell",
+        "ord_type": order["ord_type"],
+        "state": order["state"],
+        "volume": volume,
+        "funds": funds,
+        "avg_price": funds / volume if volume else None,
+        "paid_fee": float(order.get("paid_fee") or 0),
+    }
+
+def execution_rows(timestamp, fills):
+    return [
+        (timestamp, f["uuid"], f["side"], f["ord_type"], f["state"], f["volume"], f["funds"], f["avg_price"], f["paid_fee"])
+        for f in fills
+    ]
+
+class OrderExecutor:
+    # 주문을 자식 주문으로 나눠 실행하고(TWAP), 주문 UUID별 실제 체결을 조회해 평균 체결가/수수료를 계산
+    # strategy: market(시장가) / limit(최우선 호가 지정가, limit_timeout 후 미체결분은 취소 후 시장가)
+    def __init__(self, upbit, market="KRW-BTC", strategy="market", slices=1, interval=10,
+                 limit_timeout=30, poll_interval=0.5, poll_timeout=15, orderbook_source=None):
+        self.upbit = upbit
+        self.market = market
+        self.strategy = strategy
+        self.slices = max(int(slices), 1)
+        self.interval = interval
+        self.limit_timeout = limit_timeout
+        self.poll_interval = poll_interval
+        self.poll_timeout = poll_timeout
+        self.orderbook_source = orderbook_source  # 최신 LocalOrderbook을 돌려주는 함수 (지정가 가격 결정용)
+
+    def wait_for_order(self, uuid, timeout):
+        # 주문이 done/cancel 상태가 될 때까지 조회 (timeout이 지나면 마지막 상태 반환)
+        deadline = time.monotonic() + timeout
+        while True:
+            order = self.upbit.get_order(uuid)
+            if (order and order.get("state") in FINAL_STATES) or time.monotonic() >= deadline:
+                return order
+            time.sleep(self.poll_interval)
+
+    def submit(self, side, amount):
+        if side == "buy":
+            return self.upbit.buy_market_order(self.market, amount)
+        return self.upbit.sell_market_order(self.market, amount)
+
+    def market_child(self, side, amount):
+        order = self.submit(side, amount)
+        if not order or "uuid" not in order:
+            logger.error(f"{side} 시장가 주문 실패: {order}")
+            return []
+        order = self.wait_for_order(order["uuid"], self.poll_timeout)
+        return [summarize_order(order)] if order else []
+
+    def limit_child(self, side, amount):
+        # 최우선 호가에 지정가 주문 후 limit_timeout 동안 체결을 기다림
+        book = self.orderbook_source().summary() if self.orderbook_source else None
+        if not book:
+            return self.market_child(side, amount)
+        price = book["best_ask"] if side == "buy" else book["best_bid"]
+        volume = round(amount / price if side == "buy" else amount, 8)
+        if side == "buy":
+            order = self.upbit.buy_limit_order(self.market, price, volume)
+        else:
+            order = self.upbit.sell_limit_order(self.market, price, volume)
+        if not order or "uuid" not in order:
+            logger.error(f"{side} 지정가 주문 실패: {order}")
+            return self.market_child(side, amount)
+
+        order_uuid = order["uuid"]
+        order = self.wait_for_order(order_uuid, self.limit_timeout)
+        if order is None or order.get("state") not in FINAL_STATES:
+            self.upbit.cancel_order(order_uuid)
+            order = self.wait_for_order(order_uuid, self.poll_timeout)
+        if order is None or order.get("state") not in FINAL_STATES:
+            # 취소가 확인되지 않은 지정가 주문은 아직 체결될 수 있으므로 미체결분을 시장가로 보내지 않음 (중복 체결 방지)
+            state = order.get("state") if order else None
+            logger.error(f"{side} 지정가 주문 {order_uuid} 취소 확인 실패 (상태: {state}), 미체결분 시장가 주문을 중단합니다.")
+            return [summarize_order(order)] if order else []
+        fills = [summarize_order(order)]
+
+        # 최종 상태의 체결 수량(executed_volume) 기준으로 미체결분만 시장가로 마무리
+        executed = float(order.get("executed_volume") or fills[0]["volume"])
+        filled = executed * price if side == "buy" else executed
+        remaining = amount - filled
+        remaining_value = remaining if side == "buy" else remaining * price
+        if remaining_value > MIN_ORDER_KRW:
+            fills += self.market_child(side, remaining)
+        return fills
+
+    def child_amounts(self, side, amount, price):
+        # 자식 주문 하나하나가 최소 주문 금액을 넘도록 분할 수 조정
+        value = amount if side == "buy" else amount * price
+        slices = max(min(self.slices, int(value // (MIN_ORDER_KRW * 2))), 1)
+        return [amount / slices] * slices
+
+    def execute(self, side, amount, price):
+        # side=buy면 amount는 원화 금액, sell이면 코인 수량 (price는 분할 판단용 기준가)
+        fills = []
+        children = self.child_amounts(side, amount, price)
+        for i, child in enumerate(children):
+            if i:
+                time.sleep(self.interval)
+            if self.strategy == "limit":
+                fills += self.limit_child(side, child)
+            else:
+                fills += self.market_child(side, child)
+
+        volume = sum(f["volume"] for f in fills)
+        funds = sum(f["funds"] for f in fills)
+        result = {
+            "side": side,
+            "orders": len(fills),
+            "volume": volume,
+            "funds": funds,
+            "avg_price": funds / volume if volume else None,
+            "paid_fee": sum(f["paid_fee"] for f in fills),
+            "fills": fills,
+        }
+        if volume:
+            logger.info(
+                f"### {self.market} 체결 완료: {side} {volume:.8f}, 평균 {result['avg_price']:,.0f}원, "
+                f"수수료 {result['paid_fee']:,.2f}원 ({len(fills)}건) ###"
+            )
+        return result
@@ -0,0 +1,246 @@
+import re
+import time
+import random
+import logging
+import threading
+import requests
+
+from collections import deque
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# 제공자별 초당 요청 한도: 이름 -> (초당 토큰, 버스트)
+# 업비트: 시세 10회/초, 주문 외 거래 API 30회/초, 주문(생성/취소) 8회/초
+RATE_LIMITS = {
+    "upbit-quotation": (10, 10),
+    "upbit-exchange": (30, 30),
+    "upbit-order": (8, 8),
+    "naver": (10, 10),
+    "serpapi": (1, 2),
+    "alternative.me": (1, 2),
+}
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "DELETE")
+REMAINING_REQ_PATTERN = re.compile(r"sec=(\d+)")
+
+def rate_group(method, url, headers=None):
+    # 요청이 속한 한도 그룹 (업비트는 같은 호스트라도 API 종류별로 한도가 다름)
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    if host == "api.upbit.com":
+        if parts.path.startswith("/v1/order") and method in ("POST", "DELETE"):
+            return "upbit-order"
+        if headers and "Authorization" in headers:
+            return "upbit-exchange"
+        return "upbit-quotation"
+    if host.endswith("naver.com"):
+        return "naver"
+    if host.endswith("serpapi.com"):
+        return "serpapi"
+    if host.endswith("alternative.me"):
+        return "alternative.me"
+    return host
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        # 토큰이 생길 때까지 대기 후 하나 사용 (timeout 안에 못 얻으면 False)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def drain(self):
+        # 서버가 남은 요청 수 0을 알려주면 다음 1초 동안 요청을 멈춤
+        with self.lock:
+            self.tokens = min(self.tokens, 1 - self.rate)
+            self.updated = time.monotonic()
+
+class EndpointStats:
+    def __init__(self, window=200):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.not_modified = 0
+        self.bytes_in = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.latencies = deque(maxlen=window)  # 최근 응답 시간 (p95 계산용)
+
+    def record(self, seconds, error):
+        self.count += 1
+        self.errors += int(error)
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.latencies.append(seconds)
+
+    def snapshot(self):
+        latencies = sorted(self.latencies)
+        p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] if latencies else 0.0
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "not_modified": self.not_modified,
+            "bytes_in": self.bytes_in,
+            "avg_seconds": round(self.total_seconds / self.count, 3) if self.count else 0.0,
+            "p95_seconds": round(p95, 3),
+            "max_seconds": round(self.max_seconds, 3),
+        }
+
+class HttpClient:
+    # 호스트별 keep-alive 세션, 한도 그룹별 토큰 버킷, 지터 재시도, 조건부 요청, 엔드포인트별 지연/오류 집계
+    def __init__(self, limits=None, timeout=(3.05, 10), retries=3, backoff=0.5, max_backoff=8, pool_size=10):
+        self.buckets = {name: TokenBucket(rate, burst) for name, (rate, burst) in (limits or RATE_LIMITS).items()}
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self.sessions = {}
+        self.validators = {}  # URL -> (ETag, Last-Modified, 마지막 200 응답)
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def session(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self.sessions[host] = session
+            return session
+
+    def endpoint_stats(self, endpoint):
+        with self.lock:
+            return self.stats.setdefault(endpoint, EndpointStats())
+
+    def sleep_before_retry(self, attempt, response=None):
+        # 지수 백오프 + full jitter, 429/503의 Retry-After가 있으면 우선
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = min(float(retry_after), self.max_backoff)
+        else:
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        time.sleep(delay)
+
+    def request(self, method, url, endpoint=None, conditional=False, timeout=None, **kwargs):
+        method = method.upper()
+        parts = urlsplit(url)
+        endpoint = endpoint or f"{method} {parts.netloc}{parts.path}"
+        stats = self.endpoint_stats(endpoint)
+        bucket = self.buckets.get(rate_group(method, url, kwargs.get("headers")))
+        session = self.session(url)
+        # 주문 생성 같은 비멱등 요청은 중복 실행을 막기 위해 재시도하지 않음
+        # 인증 요청(업비트 JWT)은 nonce가 한 번만 유효해 같은 헤더로 재시도하면 계속 거부되므로 호출한 쪽에서 다시 서명해 요청
+        authenticated = "Authorization" in (kwargs.get("headers") or {})
+        retries = self.retries if method in IDEMPOTENT_METHODS and not authenticated else 0
+
+        cache_key = None
+        if conditional:
+            cache_key = requests.Request(method, url, params=kwargs.get("params")).prepare().url
+            etag, last_modified, _ = self.validators.get(cache_key, (None, None, None))
+            headers = dict(kwargs.get("headers") or {})
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+            kwargs["headers"] = headers
+
+        for attempt in range(retries + 1):
+            if bucket is not None:
+                bucket.acquire()
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                stats.record(time.perf_counter() - started, error=True)
+                if attempt >= retries:
+                    raise
+                stats.retries += 1
+                logger.warning(f"{endpoint} 요청 실패, 재시도 {attempt + 1}/{retries}: {e}")
+                self.sleep_before_retry(attempt)
+                continue
+
+            stats.record(time.perf_counter() - started, error=response.status_code >= 400)
+            stats.bytes_in += len(response.content)
+            remaining = REMAINING_REQ_PATTERN.search(response.headers.get("Remaining-Req", ""))
+            if bucket is not None and remaining and int(remaining.group(1)) == 0:
+                bucket.drain()
+
+            if response.status_code in RETRY_STATUSES and attempt < retries:
+                stats.retries += 1
+                logger.warning(f"{endpoint} 응답 {response.status_code}, 재시도 {attempt + 1}/{retries}")
+                self.sleep_before_retry(attempt, response)
+                continue
+
+            if cache_key is not None:
+                if response.status_code == 304 and cache_key in self.validators:
+                    # 변경 없음: 마지막으로 받은 응답을 그대로 사용
+                    stats.not_modified += 1
+                    return self.validators[cache_key][2]
+                if response.status_code == 200:
+                    etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+                    if etag or last_modified:
+                        self.validators[cache_key] = (etag, last_modified, response)
+            return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def snapshot(self):
+        with self.lock:
+            items = list(self.stats.items())
+        return {endpoint: stats.snapshot() for endpoint, stats in items}
+
+    def totals(self):
+        # 전체 엔드포인트 합계 (사이클 전후 차이로 단계별 전송량/재시도 계산)
+        snapshot = self.snapshot().values()
+        return {
+            "bytes_in": sum(s["bytes_in"] for s in snapshot),
+            "retries": sum(s["retries"] for s in snapshot),
+        }
+
+    def report(self):
+        return ", ".join(
+            f"{endpoint}={s['count']}회/오류{s['errors']}/재시도{s['retries']}/p95 {s['p95_seconds']}s"
+            for endpoint, s in self.snapshot().items()
+        )
+
+def install_pyupbit(client):
+    # pyupbit 내부 requests.get/post/delete 호출을 공용 클라이언트로 연결 (세션 재사용 + 업비트 한도 준수)
+    import pyupbit.request_api as request_api
+
+    class PyupbitTransport:
+        get = staticmethod(client.get)
+        post = staticmethod(client.post)
+        delete = staticmethod(client.delete)
+
+    request_api.requests = PyupbitTransport
@@ -0,0 +1,82 @@
+import io
+import os
+import time
+import logging
+import resource
+import itertools
+
+from PIL import Image
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+MIME_TYPES = {"png": "image/png", "webp": "image/webp", "jpeg": "image/jpeg"}
+
+# 디스크 보관은 매매 경로를 막지 않도록 별도 스레드에서 처리
+archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-archive")
+# 같은 시각(마이크로초)에 여러 마켓 차트가 보관돼도 파일명이 겹치지 않도록 붙이는 일련번호
+archive_sequence = itertools.count()
+
+def get_peak_rss_mb():
+    # 리눅스의 ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def reencode_image(png, max_width, image_format, quality):
+    # 디코딩 -> (축소) -> 인코딩을 한 번에 처리
+    img = Image.open(io.BytesIO(png))
+    if max_width and img.width > max_width:
+        img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+    if image_format == "jpeg" and img.mode != "RGB":
+        img = img.convert("RGB")
+
+    buffer = io.BytesIO()
+    if image_format == "png":
+        img.save(buffer, format="PNG", optimize=False)
+    else:
+        img.save(buffer, format=image_format.upper(), quality=quality)
+    return buffer.getvalue()
+
+def archive_filename(extension, market=None, now=None):
+    # 예: upbit_chart_KRW-BTC_20261018_093000_123456_0007.png
+    now = now or datetime.now()
+    prefix = f"upbit_chart_{market}" if market else "upbit_chart"
+    return f"{prefix}_{now.strftime('%Y%m%d_%H%M%S_%f')}_{next(archive_sequence):04d}.{extension}"
+
+def write_archive(data, archive_dir, filename):
+    try:
+        os.makedirs(archive_dir, exist_ok=True)
+        file_path = os.path.join(archive_dir, filename)
+        with open(file_path, "wb") as f:
+            f.write(data)  # bytes/memoryview 모두 복사 없이 기록
+        logger.info(f"차트 이미지가 저장되었습니다: {file_path}")
+    except OSError as e:
+        logger.error(f"차트 이미지 저장 중 오류 발생: {e}")
+
+def build_image_part(png, image_format="png", quality=85, max_width=None, archive_dir=None, market=None):
+    # PNG 바이트(또는 memoryview)를 Gemini 이미지 파트로 변환
+    # 원본 그대로 보낼 때는 받은 버퍼를 그대로 전달하고(SDK 경계에서만 bytes로 변환), 재인코딩이 필요할 때만 한 번 디코딩
+    start = time.perf_counter()
+    image_format = image_format.lower()
+    if image_format == "jpg":
+        image_format = "jpeg"
+
+    if image_format == "png" and not max_width:
+        data = png
+    else:
+        data = reencode_image(png, max_width, image_format, quality)
+
+    if archive_dir:
+        archive_executor.submit(write_archive, data, archive_dir, archive_filename(image_format, market))
+
+    stats = {
+        "bytes_in": len(png),
+        "bytes_out": len(data),
+        "seconds": round(time.perf_counter() - start, 3),
+        "peak_rss_mb": round(get_peak_rss_mb(), 1),
+    }
+    logger.info(
+        f"이미지 처리 완료: {stats['bytes_in']:,} → {stats['bytes_out']:,} bytes ({image_format}), "
+        f"{stats['seconds']}초, 최대 RSS {stats['peak_rss_mb']}MB"
+    )
+    return {"mime_type": MIME_TYPES[image_format], "data": data}, stats
@@ -0,0 +1,275 @@
+import math
+import numpy as np
+import pandas as pd
+
+from collections import deque, OrderedDict
+
+NAN = float('nan')
+
+INDICATOR_COLUMNS = ['bb_bbm', 'bb_bbh', 'bb_bbl', 'rsi', 'macd', 'macd_signal', 'macd_diff', 'sma_20', 'ema_12']
+
+# add_indicators()에서 사용하던 기본 파라미터
+DEFAULT_PARAMS = {
+    "bb_window": 20,
+    "bb_dev": 2,
+    "rsi_window": 14,
+    "macd_fast": 12,
+    "macd_slow": 26,
+    "macd_signal": 9,
+    "sma_window": 20,
+    "ema_window": 12,
+}
+
+# ta 기준 구현 (IndicatorEngine / compute_indicators_batch 결과 비교용)
+def add_indicators(df):
+    import ta
+
+    # 볼린저 밴드
+    indicator_bb = ta.volatility.BollingerBands(close=df['close'], window=20, window_dev=2)
+    df['bb_bbm'] = indicator_bb.bollinger_mavg()
+    df['bb_bbh'] = indicator_bb.bollinger_hband()
+    df['bb_bbl'] = indicator_bb.bollinger_lband()
+    
+    # RSI
+    df['rsi'] = ta.momentum.RSIIndicator(close=df['close'], window=14).rsi()
+    
+    # MACD
+    macd = ta.trend.MACD(close=df['close'])
+    df['macd'] = macd.macd()
+    df['macd_signal'] = macd.macd_signal()
+    df['macd_diff'] = macd.macd_diff()
+    
+    # 이동평균선
+    df['sma_20'] = ta.trend.SMAIndicator(close=df['close'], window=20).sma_indicator()
+    df['ema_12'] = ta.trend.EMAIndicator(close=df['close'], window=12).ema_indicator()
+    
+    return df
+
+class EmaState:
+    # pandas ewm(adjust=False, min_periods=window)와 같은 재귀식
+    def __init__(self, window, alpha=None):
+        self.alpha = alpha if alpha is not None else 2 / (window + 1)
+        self.min_periods = window
+        self.value = None
+        self.count = 0
+
+    def next_value(self, x):
+        return x if self.value is None else self.value + self.alpha * (x - self.value)
+
+    def result(self, value, count):
+        return value if count >= self.min_periods else NAN
+
+    def update(self, x):
+        self.value = self.next_value(x)
+        self.count += 1
+        return self.result(self.value, self.count)
+
+    def peek(self, x):
+        return self.result(self.next_value(x), self.count + 1)
+
+class RollingState:
+    # 고정 길이 구간의 평균/모표준편차(ddof=0)를 Welford 방식으로 O(1) 갱신
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def moments_after(self, x):
+        n, mean, m2 = len(self.values), self.mean, self.m2
+        if n == self.window:
+            old = self.values[0]
+            if n == 1:
+                n, mean, m2 = 0, 0.0, 0.0
+            else:
+                new_mean = (n * mean - old) / (n - 1)
+                m2 -= (old - mean) * (old - new_mean)
+                n, mean = n - 1, new_mean
+        n += 1
+        delta = x - mean
+        mean += delta / n
+        m2 += delta * (x - mean)
+        return n, mean, max(m2, 0.0)
+
+    def result(self, n, mean, m2):
+        if n < self.window:
+            return NAN, NAN
+        return mean, math.sqrt(m2 / n)
+
+    def update(self, x):
+        n, self.mean, self.m2 = self.moments_after(x)
+        if len(self.values) == self.window:
+            self.values.popleft()
+        self.values.append(x)
+        return self.result(n, self.mean, self.m2)
+
+    def peek(self, x):
+        return self.result(*self.moments_after(x))
+
+class IndicatorState:
+    # 하나의 (마켓, 캔들 간격)에 대한 보조지표 누적 상태
+    def __init__(self, params):
+        self.params = params
+        self.bb = RollingState(params["bb_window"])
+        self.sma = RollingState(params["sma_window"])
+        self.ema = EmaState(params["ema_window"])
+        self.macd_fast = EmaState(params["macd_fast"])
+        self.macd_slow = EmaState(params["macd_slow"])
+        self.macd_signal = EmaState(params["macd_signal"])
+        self.rsi_up = EmaState(params["rsi_window"], alpha=1 / params["rsi_window"])
+        self.rsi_down = EmaState(params["rsi_window"], alpha=1 / params["rsi_window"])
+        self.prev_close = None
+        self.last_ts = None
+
+    def step(self, close, commit):
+        apply = (lambda state, x: state.update(x)) if commit else (lambda state, x: state.peek(x))
+
+        bb_mean, bb_std = apply(self.bb, close)
+        sma, _ = apply(self.sma, close)
+        ema = apply(self.ema, close)
+
+        # MACD 시그널은 MACD 값이 유효해진 시점부터 누적 (ta와 동일)
+        macd = apply(self.macd_fast, close) - apply(self.macd_slow, close)
+        macd_signal = apply(self.macd_signal, macd) if not math.isnan(macd) else NAN
+
+        # 첫 캔들의 변화량은 0으로 취급 (ta와 동일)
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        up = apply(self.rsi_up, diff if diff > 0 else 0.0)
+        down = apply(self.rsi_down, -diff if diff < 0 else 0.0)
+        if math.isnan(down):
+            rsi = NAN
+        elif down == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - 100 / (1 + up / down)
+
+        if commit:
+            self.prev_close = close
+
+        dev = self.params["bb_dev"]
+        return (
+            bb_mean, bb_mean + dev * bb_std, bb_mean - dev * bb_std,
+            rsi,
+            macd, macd_signal, macd - macd_signal,
+            sma, ema,
+        )
+
+class IndicatorEngine:
+    # 새로 마감된 캔들만큼만 상태를 갱신하는 증분 보조지표 계산기
+    def __init__(self, max_history=1000, **params):
+        self.params = {**DEFAULT_PARAMS, **params}
+        self.max_history = max_history
+        self.states = {}
+        self.histories = {}
+
+    def reset(self, key):
+        self.states.pop(key, None)
+        self.histories.pop(key, None)
+
+    def update(self, key, df, last_closed=False):
+        # df의 마지막 행은 진행 중인 캔들로 보고 상태에 반영하지 않음 (last_closed=True면 반영)
+        state = self.states.get(key)
+        if state is not None and len(df) and df.index[-1] < state.last_ts:
+            # 저장된 상태보다 과거 데이터가 들어오면 처음부터 다시 누적
+            self.reset(key)
+            state = None
+        if state is None:
+            state = self.states[key] = IndicatorState(self.params)
+            self.histories[key] = OrderedDict()
+        history = self.histories[key]
+
+        closes = df['close'].to_numpy()
+        closed_count = len(df) if last_closed else len(df) - 1
+        rows = []
+        for i, ts in enumerate(df.index):
+            if ts in history:
+                rows.append(history[ts])
+            elif state.last_ts is not None and ts < state.last_ts:
+                # 상태가 만들어지기 전의 캔들
+                rows.append((NAN,) * len(INDICATOR_COLUMNS))
+            elif i < closed_count:
+                values = state.step(float(closes[i]), commit=True)
+                state.last_ts = ts
+                history[ts] = values
+                rows.append(values)
+            else:
+                rows.append(state.step(float(closes[i]), commit=False))
+
+        while len(history) > self.max_history:
+            history.popitem(last=False)
+
+        result = df.copy()
+        result[INDICATOR_COLUMNS] = pd.DataFrame(rows, index=df.index, columns=INDICATOR_COLUMNS)
+        return result
+
+def stack_closes(frames):
+    # 길이가 다른 프레임을 오른쪽 정렬로 쌓음 (앞쪽은 NaN 패딩) -> (프레임 수, 최대 길이)
+    length = max(len(df) for df in frames)
+    closes = np.full((len(frames), length), np.nan)
+    for i, df in enumerate(frames):
+        closes[i, length - len(df):] = df['close'].to_numpy(dtype=float)
+    return closes
+
+def ewm_2d(values, min_periods, span=None, alpha=None):
+    # 시간축(열)을 따라 모든 간격을 한 번에 계산, 앞쪽 NaN은 ta와 같이 건너뜀
+    frame = pd.DataFrame(values.T)
+    return frame.ewm(span=span, alpha=alpha, min_periods=min_periods, adjust=False).mean().to_numpy().T
+
+def rolling_mean_std(values, window, mean_out, std_out):
+    # 구간에 NaN(패딩/부족한 캔들)이 포함되면 NaN -> rolling(min_periods=window)과 동일
+    rolling = pd.DataFrame(values.T).rolling(window, min_periods=window)
+    mean_out[:] = rolling.mean().to_numpy().T
+    std_out[:] = rolling.std(ddof=0).to_numpy().T
+
+def compute_indicator_array(closes, **params):
+    # closes: (간격 수, 캔들 수) 배열 -> (간격 수, 캔들 수, 지표 수) 배열 (마지막 축 순서는 INDICATOR_COLUMNS)
+    # 출력 버퍼를 미리 할당해 두고 각 지표는 그 버퍼의 뷰에 바로 기록
+    params = {**DEFAULT_PARAMS, **params}
+    count, length = closes.shape
+    out = np.empty((count, length, len(INDICATOR_COLUMNS)))
+    bb_bbm, bb_bbh, bb_bbl, rsi, macd, macd_signal, macd_diff, sma, ema = (out[:, :, i] for i in range(len(INDICATOR_COLUMNS)))
+    std = np.empty((count, length))
+
+    # 볼린저 밴드 / SMA
+    rolling_mean_std(closes, params["bb_window"], bb_bbm, std)
+    np.multiply(std, params["bb_dev"], out=std)
+    np.add(bb_bbm, std, out=bb_bbh)
+    np.subtract(bb_bbm, std, out=bb_bbl)
+    if params["sma_window"] == params["bb_window"]:
+        sma[:] = bb_bbm
+    else:
+        rolling_mean_std(closes, params["sma_window"], sma, std)
+
+    # EMA / MACD
+    ema_fast = ewm_2d(closes, params["macd_fast"], span=params["macd_fast"])
+    ema[:] = ema_fast if params["ema_window"] == params["macd_fast"] else ewm_2d(closes, params["ema_window"], span=params["ema_window"])
+    np.subtract(ema_fast, ewm_2d(closes, params["macd_slow"], span=params["macd_slow"]), out=macd)
+    macd_signal[:] = ewm_2d(macd, params["macd_signal"], span=params["macd_signal"])
+    np.subtract(macd, macd_signal, out=macd_diff)
+
+    # RSI (첫 캔들의 변화량은 0, 패딩 구간은 NaN 유지)
+    diff = np.diff(closes, axis=1, prepend=np.nan)
+    padding = np.isnan(closes)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    up[padding] = np.nan
+    down[padding] = np.nan
+    window = params["rsi_window"]
+    ema_up = ewm_2d(up, window, alpha=1 / window)
+    ema_down = ewm_2d(down, window, alpha=1 / window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi[:] = np.where(ema_down == 0, 100.0, 100 - 100 / (1 + ema_up / ema_down))
+
+    return out
+
+def compute_indicators_batch(frames, **params):
+    # 여러 간격의 OHLCV 프레임을 한 번의 벡터 연산으로 계산해 각 프레임에 지표 열을 붙여 반환
+    closes = stack_closes(frames)
+    values = compute_indicator_array(closes, **params)
+    length = closes.shape[1]
+    results = []
+    for i, df in enumerate(frames):
+        # 프레임별 지표 블록은 출력 버퍼의 연속 구간이므로 복사 없이 DataFrame으로 감쌈
+        block = pd.DataFrame(values[i, length - len(df):], index=df.index, columns=INDICATOR_COLUMNS, copy=False)
+        results.append(pd.concat([df, block], axis=1))
+    return results
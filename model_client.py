@@ -0,0 +1,184 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class ReplayMiss(KeyError):
+    # replay 모드에서 기록된 응답이 없는 요청
+    pass
+
+def normalize_text(text):
+    # 줄 끝 공백/연속 공백 차이로 같은 프롬프트가 다른 키가 되지 않도록 정규화
+    return re.sub(r"\s+", " ", text).strip()
+
+def hash_part(part):
+    if "text" in part:
+        return {"text": normalize_text(part["text"])}
+    # 이미지 등 바이너리 파트는 내용 해시로 대체
+    data = part.get("data", b"")
+    return {"mime_type": part.get("mime_type"), "sha256": hashlib.sha256(data).hexdigest()}
+
+def cache_key(model_name, contents, generation_config=None):
+    normalized = [
+        {"role": content.get("role"), "parts": [hash_part(p) for p in content["parts"]]}
+        for content in contents
+    ]
+    payload = json.dumps([model_name, normalized, generation_config], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def sdk_contents(contents):
+    # SDK(protobuf)는 bytes만 받으므로 memoryview 이미지는 실제 호출 직전에만 bytes로 변환 (캐시 적중 시에는 복사 없음)
+    return [
+        {**content, "parts": [
+            {**part, "data": bytes(part["data"])} if isinstance(part.get("data"), memoryview) else part
+            for part in content["parts"]
+        ]}
+        for content in contents
+    ]
+
+def content_size(contents):
+    # (텍스트 글자 수, 텍스트 + 이미지 바이트 수)
+    chars = 0
+    size = 0
+    for content in contents:
+        for part in content["parts"]:
+            if "text" in part:
+                chars += len(part["text"])
+                size += len(part["text"].encode("utf-8"))
+            else:
+                size += len(part.get("data", b""))
+    return chars, size
+
+class ResponseCache:
+    # TTL + 최대 개수(LRU) 제한이 있는 응답 캐시, path를 주면 JSON 파일에 보관해 재시작/테스트 재생에 사용
+    def __init__(self, ttl=3600, max_entries=64, path=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries.update(json.load(f))
+
+    def get(self, key, ignore_ttl=False):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if not ignore_ttl and self.ttl and time.time() - entry["created"] > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, text, model_name):
+        with self.lock:
+            self.entries[key] = {"text": text, "model": model_name, "created": time.time()}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            if self.path:
+                self.save()
+
+    def discard(self, key):
+        with self.lock:
+            if self.entries.pop(key, None) is not None and self.path:
+                self.save()
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+class ModelClient:
+    # Gemini 호출 계층: configure/모델 객체는 한 번만 만들고, 같은 요청은 캐시된 응답으로 대체
+    # mode: live(캐시 사용), replay(기록된 응답만 사용, API 호출 없음)
+    # Gemini SDK는 첫 모델 호출 때 import/configure (replay 모드와 import 시점에는 로드하지 않음)
+    def __init__(self, api_key, model_name, fallback_model=None, cache=None, mode="live"):
+        self.api_key = api_key
+        self.configured = False
+        self.model_name = model_name
+        self.fallback_model = fallback_model
+        self.cache = cache or ResponseCache()
+        self.mode = mode
+        self.models = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()  # 스레드(파이프라인 단계)별 호출 기록
+
+    def get_model(self, model_name):
+        with self.lock:
+            model = self.models.get(model_name)
+            if model is None:
+                import google.generativeai as genai
+                if not self.configured:
+                    genai.configure(api_key=self.api_key)
+                    self.configured = True
+                model = self.models[model_name] = genai.GenerativeModel(model_name)
+            return model
+
+    def call(self, model_name, contents, generation_config=None):
+        response = self.get_model(model_name).generate_content(sdk_contents(contents), generation_config=generation_config)
+        return response.to_dict()["candidates"][0]["content"]["parts"][0]["text"]
+
+    def start_tracking(self):
+        self.local.calls = []
+
+    def tracked_calls(self):
+        # start_tracking() 이후 현재 스레드에서의 호출 기록 (모델, 캐시 여부, 송수신 바이트, 재시도)
+        return getattr(self.local, "calls", [])
+
+    def track(self, contents, text, model_name, cached, retries=0):
+        calls = getattr(self.local, "calls", None)
+        if calls is None:
+            return
+        prompt_chars, bytes_in = content_size(contents)
+        calls.append({
+            "model": model_name,
+            "cached": cached,
+            "prompt_chars": prompt_chars,
+            "bytes_in": 0 if cached else bytes_in,
+            "bytes_out": 0 if cached else len(text.encode("utf-8")),
+            "retries": retries,
+        })
+
+    def invalidate(self, contents, generation_config=None):
+        # 형식 검증에 실패한 응답 등 재사용하면 안 되는 캐시 항목 제거
+        self.cache.discard(cache_key(self.model_name, contents, generation_config))
+
+    def generate(self, contents, generation_config=None):
+        # 응답 텍스트를 반환 (429면 백업 모델로 한 번 더 시도)
+        key = cache_key(self.model_name, contents, generation_config)
+        entry = self.cache.get(key, ignore_ttl=self.mode == "replay")
+        if entry is not None:
+            logger.info(f"모델 응답 캐시 사용 (모델: {entry['model']}, 키: {key[:12]})")
+            self.track(contents, entry["text"], entry["model"], cached=True)
+            return entry["text"]
+        if self.mode == "replay":
+            raise ReplayMiss(key)
+
+        model_name = self.model_name
+        retries = 0
+        started = time.perf_counter()
+        try:
+            text = self.call(model_name, contents, generation_config)
+        except Exception as e:
+            if "429" not in str(e) or not self.fallback_model:  # Too Many Requests 오류만 백업 모델로 전환
+                raise
+            logger.warning(f"429 Too Many Requests 발생. 백업 모델 {self.fallback_model} 사용")
+            model_name = self.fallback_model
+            retries = 1
+            text = self.call(model_name, contents, generation_config)
+        logger.info(f"모델 응답 수신 (모델: {model_name}, {time.perf_counter() - started:.2f}초)")
+        self.track(contents, text, model_name, cached=False, retries=retries)
+
+        self.cache.put(key, text, model_name)
+        return text
@@ -0,0 +1,144 @@
+import os
+import re
+import json
+import time
+import html
+import hashlib
+import logging
+import sqlite3
+import threading
+
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+TAG_PATTERN = re.compile(r"<[^>]+>")
+SPACE_PATTERN = re.compile(r"\s+")
+# 제목 비교 시 무시할 문자 (공백/문장부호, 한글/영문/숫자만 남김)
+TITLE_NOISE_PATTERN = re.compile(r"[^0-9a-z가-힣]+")
+# SerpAPI google_news 날짜 형식 (예: "10/18/2026, 07:00 AM, +0000 UTC")
+SERPAPI_DATE_FORMAT = "%m/%d/%Y, %I:%M %p, %z UTC"
+
+def strip_markup(text):
+    # <b> 같은 강조 태그와 &quot; 같은 HTML 엔티티 제거
+    text = html.unescape(TAG_PATTERN.sub("", text or ""))
+    return SPACE_PATTERN.sub(" ", text).strip()
+
+def title_key(title):
+    normalized = TITLE_NOISE_PATTERN.sub("", strip_markup(title).lower())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+def parse_published(value):
+    # Naver pubDate(RFC 2822)/SerpAPI date 문자열 -> epoch 초 (알 수 없으면 None)
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.strptime(value, SERPAPI_DATE_FORMAT).timestamp()
+    except ValueError:
+        return None
+
+class NewsCache:
+    # 소스별 뉴스를 정규화한 제목 해시로 중복 제거해 SQLite에 쌓고, 최신순 상위 K개를 바이트 예산 안에서 제공
+    def __init__(self, path=None, retention_days=3):
+        self.path = path or os.getenv('NEWS_CACHE_PATH', 'news.db')
+        self.retention = retention_days * 86400
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS news (
+                id TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                title TEXT NOT NULL,
+                description TEXT,
+                link TEXT,
+                published REAL NOT NULL,
+                fetched REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_news_source_published ON news (source, published);
+            CREATE TABLE IF NOT EXISTS news_sources (
+                source TEXT PRIMARY KEY,
+                last_fetch REAL,
+                last_published REAL
+            );
+        ''')
+        self.conn.commit()
+
+    def state(self, source):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT last_fetch, last_published FROM news_sources WHERE source = ?", (source,)
+            ).fetchone()
+        return row or (None, None)
+
+    def due(self, source, interval, now=None):
+        # 마지막 조회 시각은 DB에 남으므로 재시작 후에도 주기가 이어짐
+        last_fetch, _ = self.state(source)
+        now = now if now is not None else time.time()
+        return last_fetch is None or now - last_fetch >= interval
+
+    def refresh(self, source, fetcher, interval, now=None):
+        # 주기가 되었으면 fetcher(since)로 마지막 pubDate 이후 기사만 받아 저장, 새로 저장한 개수 반환
+        # fetcher가 예외를 던지면 조회 시각을 기록하지 않아 다음 사이클에 다시 시도
+        now = now if now is not None else time.time()
+        if not self.due(source, interval, now):
+            return 0
+        _, last_published = self.state(source)
+        try:
+            items = fetcher(last_published)
+        except Exception as e:
+            logger.warning(f"{source} 뉴스 조회 실패, 다음 사이클에 다시 시도합니다: {e}")
+            return 0
+
+        rows = []
+        undated = 0
+        for item in items:
+            title = strip_markup(item.get("title"))
+            published = parse_published(item.get("published"))
+            if published is None:
+                # 날짜를 알 수 없는 기사를 현재 시각으로 저장하면 커서가 앞당겨져 이후의 실제 신규 기사가 누락되므로 제외
+                undated += bool(title)
+                continue
+            if not title or (last_published is not None and published <= last_published):
+                continue
+            rows.append((title_key(title), source, title, strip_markup(item.get("description")),
+                         item.get("link"), published, now))
+
+        newest = max([last_published or 0.0] + [row[5] for row in rows]) or None
+        with self.lock:
+            before = self.conn.total_changes
+            # 다른 소스에 이미 있는 같은 제목의 기사는 무시
+            self.conn.executemany("INSERT OR IGNORE INTO news VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            inserted = self.conn.total_changes - before
+            self.conn.execute(
+                "INSERT OR REPLACE INTO news_sources VALUES (?, ?, ?)", (source, now, newest)
+            )
+            self.conn.execute("DELETE FROM news WHERE published < ?", (now - self.retention,))
+            self.conn.commit()
+        logger.info(f"{source} 뉴스 {len(items)}건 조회, 신규 {inserted}건 저장" + (f", 날짜 없음 {undated}건 제외" if undated else ""))
+        return inserted
+
+    def top(self, source, k=10, byte_budget=2000, description_chars=0):
+        # 최신순 상위 k개 중 JSON으로 직렬화했을 때 byte_budget 안에 들어가는 만큼 반환
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT title, description, published FROM news WHERE source = ? "
+                "ORDER BY published DESC LIMIT ?",
+                (source, k),
+            ).fetchall()
+        headlines = []
+        used = 2  # "[]"
+        for title, description, published in rows:
+            item = {"title": title, "date": datetime.fromtimestamp(published).strftime("%Y-%m-%d %H:%M")}
+            if description_chars and description:
+                item["description"] = description[:description_chars]
+            size = len(json.dumps(item, ensure_ascii=False).encode("utf-8")) + 2
+            if used + size > byte_budget:
+                break
+            headlines.append(item)
+            used += size
+        return headlines
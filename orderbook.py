@@ -0,0 +1,269 @@
+import time
+import logging
+import threading
+
+from bisect import bisect_left, bisect_right
+
+logger = logging.getLogger(__name__)
+
+GRID_PADDING = 64  # 호가 격자를 스냅샷 범위 밖으로 양쪽에 더 확보해 두는 틱 수
+GRID_MAX_SLOTS = 4096  # 격자가 이보다 커지면 틱 격자 대신 실제 가격만으로 좌표를 잡음
+
+class Fenwick:
+    # 구간 합 트리: 한 칸 갱신, 앞부분 합, 누적합이 target에 닿는 칸 찾기가 모두 O(log n)
+    def __init__(self, values):
+        self.n = len(values)
+        self.tree = [0] + list(values)
+        for i in range(1, self.n + 1):
+            parent = i + (i & -i)
+            if parent <= self.n:
+                self.tree[parent] += self.tree[i]
+        self.top = 1 << self.n.bit_length() >> 1 if self.n else 0
+
+    def add(self, i, delta):
+        i += 1
+        while i <= self.n:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i):
+        # 0..i-1 칸의 합
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def total(self):
+        return self.prefix(self.n)
+
+    def search(self, target):
+        # prefix(i + 1) >= target이 되는 첫 칸 i (없으면 n)
+        pos = 0
+        step = self.top
+        while step:
+            nxt = pos + step
+            if nxt <= self.n and self.tree[nxt] < target:
+                pos = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        return pos
+
+class BookSide:
+    # 한쪽 호가(매수/매도)의 가격 레벨 (매수는 가격 내림차순)
+    # 가격을 체결 우선순위 순서의 칸(틱 격자)에 고정해 두고 칸별 수량/금액/레벨 수를 Fenwick 트리로 관리
+    # 격자 안의 레벨 변경과 조회(최우선 호가/체결 추정/구간 깊이)는 모두 O(log n)
+    # 격자 밖 가격이 들어올 때만 격자를 다시 잡음 (O(n), 호가가 격자 여유분을 벗어날 때만 발생)
+    def __init__(self, descending):
+        self.sign = -1 if descending else 1
+        self.sizes = {}
+        self.rebuilds = 0
+        self.regrid()
+
+    def regrid(self):
+        # 현재 레벨로 칸을 다시 나눔: 정렬 키(오름차순 = 체결 우선순위)가 일정한 틱 간격이면 앞뒤로 여유 칸을 둔 격자를 만들고,
+        # 아니면 현재 가격만으로 칸을 만듦
+        keys = sorted(self.sign * price for price in self.sizes)
+        self.slot_keys = keys
+        self.tolerance = 0.0
+        if len(keys) > 1:
+            tick = min(b - a for a, b in zip(keys, keys[1:]))
+            steps = [(key - keys[0]) / tick for key in keys]
+            span = round(steps[-1])
+            if all(abs(step - round(step)) < 1e-6 for step in steps) and span + 2 * GRID_PADDING < GRID_MAX_SLOTS:
+                low = keys[0] - GRID_PADDING * tick
+                self.slot_keys = [low + i * tick for i in range(span + 1 + 2 * GRID_PADDING)]
+                self.tolerance = tick * 1e-6
+        self.slot_prices = [None] * len(self.slot_keys)
+        sizes = [0.0] * len(self.slot_keys)
+        for price, size in self.sizes.items():
+            i = self.slot(price)
+            self.slot_prices[i] = price
+            sizes[i] = size
+        self.size_tree = Fenwick(sizes)
+        self.notional_tree = Fenwick([price * size if price is not None else 0.0
+                                      for price, size in zip(self.slot_prices, sizes)])
+        self.count_tree = Fenwick([0 if price is None else 1 for price in self.slot_prices])
+        self.rebuilds += 1
+
+    def slot(self, price):
+        # 가격이 놓일 칸 번호 (격자에 없으면 None)
+        key = self.sign * price
+        i = bisect_left(self.slot_keys, key - self.tolerance)
+        if i < len(self.slot_keys) and abs(self.slot_keys[i] - key) <= self.tolerance:
+            return i
+        return None
+
+    def set(self, price, size):
+        # 증분 반영: size가 0이면 레벨 삭제
+        size = size if size > 0 else 0.0
+        old = self.sizes.get(price, 0.0)
+        if size == old:
+            return
+        i = self.slot(price)
+        if i is None:
+            if size:
+                self.sizes[price] = size
+                self.regrid()
+            return
+        if size:
+            self.sizes[price] = size
+        else:
+            del self.sizes[price]
+        if not old:
+            self.count_tree.add(i, 1)
+            self.slot_prices[i] = price
+        elif not size:
+            self.count_tree.add(i, -1)
+            self.slot_prices[i] = None
+        self.size_tree.add(i, size - old)
+        self.notional_tree.add(i, price * (size - old))
+
+    def replace(self, levels):
+        self.sizes = {price: size for price, size in levels if size > 0}
+        self.regrid()
+
+    def update(self, levels):
+        # 전체 레벨 목록을 받아 바뀐 레벨만 반영 (빠진 레벨은 삭제)
+        levels = {price: size for price, size in levels if size > 0}
+        if not self.sizes:
+            self.replace(levels.items())
+            return
+        for price in [price for price in self.sizes if price not in levels]:
+            self.set(price, 0)
+        for price, size in levels.items():
+            self.set(price, size)
+
+    def level(self, k):
+        # 체결 우선순위로 k번째(1부터) 레벨의 칸 번호
+        return self.count_tree.search(k)
+
+    def best(self):
+        if not self.sizes:
+            return None
+        return self.slot_prices[self.level(1)]
+
+    def total_notional(self):
+        return self.notional_tree.total()
+
+    def fill(self, amount, by_notional):
+        # amount(원화 금액 또는 수량)를 최우선 호가부터 채울 때의 체결 결과 (누적합 트리 위 이분 탐색)
+        if not self.sizes or amount <= 0:
+            return None
+        tree = self.notional_tree if by_notional else self.size_tree
+        if amount > tree.total():
+            # 호가창 전체로도 부족한 경우 보이는 물량까지만 체결된 것으로 계산
+            volume, notional = self.size_tree.total(), self.notional_tree.total()
+            levels = len(self.sizes)
+            return {"volume": volume, "notional": notional, "avg_price": notional / volume,
+                    "worst_price": self.slot_prices[self.level(levels)], "levels": levels, "filled": False}
+        i = tree.search(amount)
+        levels = self.count_tree.prefix(i + 1)
+        if i >= len(self.slot_prices) or self.slot_prices[i] is None:
+            # 부동소수 오차로 빈 칸에 멈춘 경우 다음 레벨로
+            levels = min(self.count_tree.prefix(i) + 1, len(self.sizes))
+            i = self.level(levels)
+        price = self.slot_prices[i]
+        size_before = self.size_tree.prefix(i)
+        notional_before = self.notional_tree.prefix(i)
+        if by_notional:
+            notional = amount
+            volume = size_before + (amount - notional_before) / price
+        else:
+            volume = amount
+            notional = notional_before + (amount - size_before) * price
+        return {"volume": volume, "notional": notional, "avg_price": notional / volume,
+                "worst_price": price, "levels": levels, "filled": True}
+
+    def depth_within(self, limit_price):
+        # 최우선 호가부터 limit_price까지의 누적 금액
+        return self.notional_tree.prefix(bisect_right(self.slot_keys, self.sign * limit_price + self.tolerance))
+
+class LocalOrderbook:
+    # REST 스냅샷 또는 WebSocket 메시지로 갱신되는 로컬 호가창
+    def __init__(self, market="KRW-BTC"):
+        self.market = market
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.updated = None
+        self.lock = threading.Lock()
+
+    def apply_snapshot(self, orderbook):
+        # pyupbit.get_orderbook()과 WebSocket orderbook 메시지는 같은 orderbook_units 형식
+        units = orderbook["orderbook_units"]
+        with self.lock:
+            self.bids.replace((float(u["bid_price"]), float(u["bid_size"])) for u in units)
+            self.asks.replace((float(u["ask_price"]), float(u["ask_size"])) for u in units)
+            self.updated = time.time()
+        return self
+
+    def apply_update(self, orderbook):
+        # 스트림 메시지는 매번 상위 호가 전체를 보내므로 이전 상태와 비교해 바뀐 레벨만 갱신
+        units = orderbook["orderbook_units"]
+        with self.lock:
+            self.bids.update((float(u["bid_price"]), float(u["bid_size"])) for u in units)
+            self.asks.update((float(u["ask_price"]), float(u["ask_size"])) for u in units)
+            self.updated = time.time()
+        return self
+
+    def age(self):
+        return None if self.updated is None else time.time() - self.updated
+
+    def estimate(self, side, amount):
+        # 시장가 매수(원화 금액)/매도(수량)의 예상 평균 체결가와 최우선 호가 대비 슬리피지(%)
+        with self.lock:
+            book = self.asks if side == "buy" else self.bids
+            best = book.best()
+            result = book.fill(amount, by_notional=side == "buy")
+        if result is None:
+            return None
+        result["best_price"] = best
+        result["slippage_pct"] = round(abs(result["avg_price"] / best - 1) * 100, 4)
+        return result
+
+    def summary(self, bands=(0.1, 0.5, 1.0)):
+        # 프롬프트용 요약: 최우선 호가, 스프레드, 중간가 기준 ±band% 이내 누적 금액(원), 잔량 불균형
+        with self.lock:
+            best_bid, best_ask = self.bids.best(), self.asks.best()
+            if best_bid is None or best_ask is None:
+                return None
+            mid = (best_bid + best_ask) / 2
+            bid_depth = {f"{band}%": round(self.bids.depth_within(mid * (1 - band / 100))) for band in bands}
+            ask_depth = {f"{band}%": round(self.asks.depth_within(mid * (1 + band / 100))) for band in bands}
+            total_bid = self.bids.total_notional()
+            total_ask = self.asks.total_notional()
+        return {
+            "best_bid": best_bid,
+            "best_ask": best_ask,
+            "spread_pct": round((best_ask - best_bid) / mid * 100, 4),
+            "bid_depth_krw": bid_depth,
+            "ask_depth_krw": ask_depth,
+            "imbalance": round((total_bid - total_ask) / (total_bid + total_ask), 3),
+        }
+
+class OrderbookFeed:
+    # 업비트 WebSocket orderbook 스트림으로 마켓별 LocalOrderbook을 계속 갱신하는 백그라운드 스레드
+    def __init__(self, books):
+        self.books = books  # {마켓: LocalOrderbook}
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.consume, name="orderbook-feed", daemon=True)
+        self.thread.start()
+
+    def consume(self):
+        from pyupbit import WebSocketManager
+
+        manager = WebSocketManager("orderbook", list(self.books))
+        try:
+            while True:
+                data = manager.get()
+                if isinstance(data, dict) and "orderbook_units" in data:
+                    # WebSocket 메시지는 마켓 코드를 "code"로 전달
+                    book = self.books.get(data.get("code") or data.get("market"))
+                    if book is not None:
+                        book.apply_update(data)
+        except Exception as e:
+            logger.error(f"호가 스트림 중단, REST 스냅샷으로 대체합니다: {e}")
+        finally:
+            manager.terminate()
@@ -0,0 +1,110 @@
+import time
+import logging
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+NO_FALLBACK = object()
+
+class PipelineError(RuntimeError):
+    pass
+
+class Stage:
+    # func는 의존 단계 이름을 키워드 인자로 받음 (예: deps=("market",) -> func(market=...))
+    # 단계 이름과 인자 이름이 다르면 {인자 이름: 단계 이름} dict로 지정
+    def __init__(self, name, func, deps=(), timeout=None, fallback=NO_FALLBACK):
+        self.name = name
+        self.func = func
+        self.deps = dict(deps) if isinstance(deps, dict) else {dep: dep for dep in deps}
+        self.timeout = timeout
+        self.fallback = fallback
+
+class Pipeline:
+    # 의존 관계가 없는 단계는 동시에 실행하고, 의존 단계는 입력이 모두 준비되면 바로 시작하는 DAG 실행기
+    def __init__(self, stages, max_workers=None):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            unknown = [dep for dep in stage.deps.values() if dep not in self.stages]
+            if unknown:
+                raise ValueError(f"{stage.name} 단계의 알 수 없는 의존 단계: {', '.join(unknown)}")
+        self.max_workers = max_workers or len(stages)
+
+    def run(self):
+        results = {}
+        timings = {}
+        running = {}  # future -> (단계 이름, 시작 시각, 마감 시각)
+        waiting = dict(self.stages)
+        origin = time.perf_counter()
+
+        def finish(name, value, status, started):
+            results[name] = value
+            timings[name] = {
+                "start": round(started - origin, 3),
+                "end": round(time.perf_counter() - origin, 3),
+                "seconds": round(time.perf_counter() - started, 3),
+                "status": status,
+            }
+
+        def fail(name, status, error, started):
+            stage = self.stages[name]
+            logger.error(f"{name} 단계 실패 ({status}): {error!r}")
+            if stage.fallback is NO_FALLBACK:
+                finish(name, None, status, started)
+                raise PipelineError(f"{name} 단계 실패 ({status})") from error
+            finish(name, stage.fallback, status, started)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline")
+        try:
+            while waiting or running:
+                # 입력이 모두 준비된 단계 시작
+                for name, stage in list(waiting.items()):
+                    if all(dep in results for dep in stage.deps.values()):
+                        del waiting[name]
+                        started = time.perf_counter()
+                        future = executor.submit(stage.func, **{arg: results[dep] for arg, dep in stage.deps.items()})
+                        deadline = started + stage.timeout if stage.timeout else None
+                        running[future] = (name, started, deadline)
+
+                deadlines = [deadline for _, _, deadline in running.values() if deadline]
+                timeout = max(min(deadlines) - time.perf_counter(), 0) if deadlines else None
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    name, started, _ = running.pop(future)
+                    try:
+                        finish(name, future.result(), "ok", started)
+                    except Exception as e:
+                        fail(name, "error", e, started)
+
+                # 마감 시각이 지난 단계는 대체값으로 넘어감 (스레드는 백그라운드에서 끝나도록 둠)
+                now = time.perf_counter()
+                for future, (name, started, deadline) in list(running.items()):
+                    if deadline and now >= deadline:
+                        del running[future]
+                        fail(name, "timeout", TimeoutError(f"{self.stages[name].timeout}s"), started)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results, timings
+
+    def critical_path(self, timings):
+        # 가장 늦게 끝난 단계에서 시작해, 가장 늦게 끝난 의존 단계를 거꾸로 따라감
+        name = max(timings, key=lambda n: (timings[n]["end"], timings[n]["start"]))
+        path = [name]
+        while self.stages[name].deps:
+            name = max(self.stages[name].deps.values(), key=lambda n: timings[n]["end"])
+            path.append(name)
+        return path[::-1]
+
+    def report(self, timings):
+        path = self.critical_path(timings)
+        total = max(t["end"] for t in timings.values())
+        stage_summary = ", ".join(
+            f"{name}={t['seconds']}s({t['status']})" for name, t in sorted(timings.items(), key=lambda item: item[1]["start"])
+        )
+        serial = sum(t["seconds"] for t in timings.values())
+        return (
+            f"사이클 {total:.2f}초 (순차 실행 시 {serial:.2f}초), "
+            f"임계 경로: {' → '.join(path)} [{stage_summary}]"
+        )
@@ -0,0 +1,60 @@
+
+INSERT_POSITION_SQL = """INSERT INTO positions
+    (timestamp, market, currency, balance, avg_buy_price, price, value_krw)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)"""
+
+def create_positions_table(cursor):
+    # 사이클마다 마켓별 보유 현황을 한 행씩 쌓는 long-format 테이블 (KRW는 market='KRW')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS positions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            timestamp DATETIME,
+            market VARCHAR(16),
+            currency VARCHAR(10),
+            balance DECIMAL(24,8),
+            avg_buy_price DECIMAL(18,8),
+            price DECIMAL(18,8),
+            value_krw DECIMAL(18,2),
+            INDEX idx_positions_market_timestamp (market, timestamp)
+        )
+    ''')
+
+def market_currency(market):
+    # "KRW-BTC" -> "BTC"
+    return market.split("-", 1)[1]
+
+def get_current_prices(markets):
+    import pyupbit
+
+    # 여러 마켓의 현재가를 한 번의 요청으로 조회 (verbose=True면 마켓이 하나여도 목록으로 반환)
+    tickers = pyupbit.get_current_price(list(markets), verbose=True)
+    return {ticker["market"]: float(ticker["trade_price"]) for ticker in tickers}
+
+def get_orderbooks(markets):
+    import pyupbit
+
+    # 여러 마켓의 호가를 한 번의 요청으로 조회
+    orderbooks = pyupbit.get_orderbook(list(markets))
+    return [orderbooks] if isinstance(orderbooks, dict) else orderbooks
+
+def holdings(balances, markets):
+    # get_balances() 결과를 {마켓: (보유 수량, 평균 매수가)}와 원화 잔고로 정리
+    by_currency = {b['currency']: b for b in balances}
+    positions = {}
+    for market in markets:
+        balance = by_currency.get(market_currency(market))
+        positions[market] = (float(balance['balance']), float(balance['avg_buy_price'])) if balance else (0.0, 0.0)
+    krw = by_currency.get('KRW')
+    return positions, float(krw['balance']) if krw else 0.0
+
+def portfolio_value(balances, prices):
+    # 원화 잔고 + 거래 대상 마켓의 보유 수량 × 현재가
+    positions, krw = holdings(balances, prices)
+    return krw + sum(volume * prices[market] for market, (volume, _) in positions.items())
+
+def position_rows(timestamp, balances, prices):
+    positions, krw = holdings(balances, prices)
+    rows = [(timestamp, 'KRW', 'KRW', krw, 0, 1, krw)]
+    for market, (volume, avg_buy_price) in positions.items():
+        rows.append((timestamp, market, market_currency(market), volume, avg_buy_price, prices[market], volume * prices[market]))
+    return rows
@@ -0,0 +1,112 @@
+import json
+import math
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Gemini 토크나이저 호출 없이 쓰는 근사치 (영문/숫자 기준 약 4자당 1토큰)
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(chars):
+    return math.ceil(chars / CHARS_PER_TOKEN)
+
+def to_compact_json(data):
+    # 공백 제거 + 한글을 \uXXXX로 이스케이프하지 않음
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str)
+
+def column_decimals(series, significant_digits):
+    # 열의 대표 크기에 맞춰 유효숫자만 남기도록 소수점 자릿수 결정 (가격 1억 -> 0자리, RSI 50 -> 4자리)
+    values = series.dropna().abs()
+    values = values[values > 0]
+    if values.empty:
+        return 0
+    magnitude = math.floor(math.log10(values.median()))
+    return max(significant_digits - 1 - magnitude, 0)
+
+def timestamp_format(index):
+    # 일봉처럼 모든 캔들의 시각이 같으면 날짜만 표기
+    if len(index) > 1 and (index.hour == index[0].hour).all() and (index.minute == index[0].minute).all():
+        return "%Y-%m-%d"
+    return "%Y-%m-%d %H:%M"
+
+def encode_frame(df, significant_digits=6, drop_warmup=True, indicator_columns=None):
+    # 열 방향 JSON 대신 행 방향 CSV 표 (시각 열은 한 번만, 숫자는 유효숫자로 반올림, NaN은 빈 칸)
+    if drop_warmup:
+        columns = indicator_columns or [c for c in df.columns if c not in ("open", "high", "low", "close", "volume", "value")]
+        if columns:
+            df = df[~df[columns].isna().all(axis=1)]
+
+    lines = [",".join(["time"] + list(df.columns))]
+    if isinstance(df.index, pd.DatetimeIndex):
+        times = df.index.strftime(timestamp_format(df.index))
+    else:
+        times = df.index.astype(str)
+
+    formatted = []
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_numeric_dtype(series):
+            decimals = column_decimals(series, significant_digits)
+            formatted.append(["" if pd.isna(v) else f"{v:.{decimals}f}" for v in series])
+        else:
+            formatted.append(["" if pd.isna(v) else str(v).replace(",", " ").replace("\n", " ") for v in series])
+
+    for i, ts in enumerate(times):
+        lines.append(",".join([ts] + [values[i] for values in formatted]))
+    return "\n".join(lines)
+
+class PromptEncoder:
+    # 프롬프트 섹션을 모아 토큰 예산 안으로 맞추고 섹션별 크기 변화를 기록
+    def __init__(self, token_budget=None, significant_digits=6, min_rows=5):
+        self.token_budget = token_budget
+        self.significant_digits = significant_digits
+        self.min_rows = min_rows
+        self.sections = {}
+
+    def add_text(self, name, text, legacy_size=None):
+        self.sections[name] = {"lines": [text], "header": 0, "legacy_size": legacy_size or len(text)}
+
+    def add_json(self, name, data):
+        self.add_text(name, to_compact_json(data), legacy_size=len(json.dumps(data, default=str)))
+
+    def add_frame(self, name, df):
+        text = encode_frame(df, self.significant_digits)
+        # 표는 헤더 1줄 + 데이터 행으로 보관해 예산 초과 시 오래된 행부터 줄임
+        self.sections[name] = {"lines": text.split("\n"), "header": 1, "legacy_size": len(df.to_json())}
+
+    def section_size(self, section):
+        return sum(len(line) for line in section["lines"]) + max(len(section["lines"]) - 1, 0)
+
+    def total_tokens(self):
+        return estimate_tokens(sum(self.section_size(s) for s in self.sections.values()))
+
+    def trim_to_budget(self):
+        if not self.token_budget:
+            return
+        while self.total_tokens() > self.token_budget:
+            # 데이터 행이 가장 많은 표에서 가장 오래된 행을 제거
+            candidates = [s for s in self.sections.values() if s["header"] and len(s["lines"]) - 1 > self.min_rows]
+            if not candidates:
+                logger.warning(f"프롬프트가 토큰 예산({self.token_budget})을 초과합니다: 약 {self.total_tokens()} 토큰")
+                return
+            section = max(candidates, key=lambda s: len(s["lines"]))
+            del section["lines"][1]
+
+    def render(self):
+        self.trim_to_budget()
+        rendered = {name: "\n".join(section["lines"]) for name, section in self.sections.items()}
+        for line in self.report():
+            logger.info(line)
+        return rendered
+
+    def report(self):
+        lines = []
+        before_total = after_total = 0
+        for name, section in self.sections.items():
+            after = self.section_size(section)
+            before_total += section["legacy_size"]
+            after_total += after
+            lines.append(f"프롬프트 섹션 {name}: {section['legacy_size']:,} → {after:,} chars")
+        lines.append(f"프롬프트 데이터 합계: {before_total:,} → {after_total:,} chars (약 {estimate_tokens(after_total):,} 토큰)")
+        return lines
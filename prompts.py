@@ -0,0 +1,137 @@
+import pandas as pd
+
+from prompt_encoder import PromptEncoder
+
+def calculate_performance(trades_df):
+    if trades_df.empty:
+        return 0
+    
+    initial_balance = trades_df.iloc[-1]['krw_balance'] + trades_df.iloc[-1]['btc_balance'] * trades_df.iloc[-1]['btc_krw_price']
+    final_balance = trades_df.iloc[0]['krw_balance'] + trades_df.iloc[0]['btc_balance'] * trades_df.iloc[0]['btc_krw_price']
+    
+    return (final_balance - initial_balance) / initial_balance * 100
+
+def build_reflection_prompts(trades_df, current_market_data, token_budget=None):
+    performance = calculate_performance(trades_df)
+    
+    system_prompt = """You are an AI trading assistant tasked with analyzing recent trading performance and current market conditions to generate insights and improvements for future trading decisions."""
+    
+    encoder = PromptEncoder(token_budget)
+    encoder.add_json("recent_trades", trades_df.to_dict(orient='records'))
+    for name, value in current_market_data.items():
+        if isinstance(value, pd.DataFrame):
+            encoder.add_frame(name, value)
+        else:
+            encoder.add_json(name, value)
+    sections = encoder.render()
+    market_data_text = "\n".join(f"{name}: {sections[name]}" for name in current_market_data)
+
+    user_prompt = f"""Recent trading data:
+    {sections["recent_trades"]}
+    
+    Current market data (OHLCV tables are CSV):
+    {market_data_text}
+    
+    Overall performance over the last 3 transactions: {performance:.2f}%
+    
+    Please analyze this data and provide:
+    1. A brief reflection on the recent trading decisions
+    2. Insights on what worked well and what didn't
+    3. Suggestions for improvement in future trading decisions
+    4. Any patterns or trends you notice in the market data
+    
+    Limit your response to 250 words or less. (Strictly Follow!)"""
+
+    return system_prompt, user_prompt
+
+def build_decision_prompts(reflection, indicators_data, token_budget=None, market="KRW-BTC"):
+    coin = market.split("-", 1)[1]
+    asset_name = "Bitcoin" if coin == "BTC" else coin
+    system_prompt = f"""You are an expert in {asset_name} investing and strictly follow the trading principles of the legendary Korean Bitcoin trader 'Wonyo-ddi.' Analyze the provided chart image, which includes key technical indicators, along with market data, recent news headlines, and the Fear and Greed Index. Based on this analysis, determine whether to buy, sell, or hold at the moment while adhering to Wonyo-ddi's trading philosophy.
+
+    ### Wonyo-ddi's Trading Principles to Follow:
+    1. Strictly Chart-Based Trading
+    - Ignore fundamental news and external sentiment unless it directly impacts market structure.
+    - Rely primarily on price action and market structure for trade decisions.
+    - Use simple indicators, mainly candlestick patterns, moving averages, and price trends.
+    - Avoid excessive reliance on indicators like RSI, MACD, and Bollinger Bands, except for confirmation.
+
+    2. Market Sentiment & Adaptive Trading
+    - Gauge overall market sentiment through price action and volume.
+    - Adapt trading strategy based on market conditions:
+    - In bullish markets, weak bearish signals can be ignored.
+    - In bearish markets, weak bullish signals should not be trusted.
+    - Identify liquidity zones where large movements are likely to occur.
+
+    3. Risk Management & Capital Allocation
+    - Never invest more than 20-30% of total capital in a single trade.
+    - Use low leverage (preferably under 5x, avoid high leverage).
+    - Maintain a portion of capital for unexpected market movements and recovery.
+    - Use stop-loss only if trade setup is invalidated, rather than mechanical stop-loss levels.
+
+    4. Compounding & Position Management
+    - Focus on high win-rate trades over high reward-to-risk setups.
+    - Avoid taking large, high-risk positions that rely on one-time gains.
+    - Compound gains steadily over time instead of seeking single massive wins.
+
+    5. Practical Chart Application
+    - Use daily and 4-hour charts for trend direction.
+    - Use hourly charts for precision entries.
+    - Avoid noise from very small timeframes (e.g., 1-minute or 5-minute charts).
+    - Price action and volume analysis take precedence over lagging indicators.
+
+    ### Decision-Making Factors:
+    In your analysis, consider the following factors:  
+    - **Chart analysis** (MACD, ADX, RSI, Stochastic, Bollinger Bands, ATR, OBV, VWAP)  
+    - **Market data and trends**  
+    - **Recent news headlines and their potential impact on {asset_name} price**  
+    - **The Fear and Greed Index and its implications**  
+    - **Overall market sentiment**  
+    - Recent trading performance and reflection
+
+    Ensure that you analyze the trend strength, momentum, volatility, and accumulation behavior using the given indicators.  
+
+    ### Recent trading reflection:
+    {reflection}
+
+    ### Response Format:
+    1. Decision (buy, sell, or hold)
+    2. If the decision is 'buy', provide a percentage (1-100) of available KRW to use for buying. If the decision is 'sell', provide a percentage (1-100) of held {coin} to sell. If the decision is 'hold', set the percentage to 0.
+    3. Reason for your decision
+
+    Ensure that the percentage is an integer between 1 and 100 for buy/sell decisions, and exactly 0 for hold decisions.
+    Your percentage should reflect the strength of your conviction in the decision based on the analyzed data.
+
+    Your response should be in JSON format as follows (Strictly Follow!):  
+
+    {'{"decision": "buy", "percentage": {"type": "integer"}, "reason": "some technical, fundamental, and sentiment-based reason"}'}
+    {'{"decision": "sell", "percentage": {"type": "integer"}, "reason": "some technical, fundamental, and sentiment-based reason"}'}
+    {'{"decision": "hold", "percentage": {"type": "integer"}, "reason": "some technical, fundamental, and sentiment-based reason"}'}\n\n"""
+    
+    encoder = PromptEncoder(token_budget)
+    encoder.add_json("filtered_balances", indicators_data["filtered_balances"])
+    encoder.add_json("orderbook", indicators_data["orderbook"])
+    encoder.add_frame("df_daily", indicators_data["df_daily"])
+    encoder.add_frame("df_4hourly", indicators_data["df_4hourly"])
+    encoder.add_frame("df_hourly", indicators_data["df_hourly"])
+    encoder.add_json("google_news_headlines", indicators_data["google_news_headlines"])
+    encoder.add_json("naver_news_headlines", indicators_data["naver_news_headlines"])
+    encoder.add_json("fear_greed_index", indicators_data["fear_greed_index"])
+    sections = encoder.render()
+
+    # 행동 강령이 포함된 프롬프트 (OHLCV는 시각 열이 하나인 CSV 표)
+    user_prompt = f"""### Data to provide
+    Market: {market}
+    Current investment status: {sections["filtered_balances"]}
+    Orderbook summary (spread, KRW depth within ±% of mid price, bid-ask imbalance): {sections["orderbook"]}
+    Daily OHLCV with indicators (30 days, CSV):
+    {sections["df_daily"]}
+    4-Hourly OHLCV with indicators (24 counts, CSV):
+    {sections["df_4hourly"]}
+    Hourly OHLCV with indicators (24 hours, CSV):
+    {sections["df_hourly"]}
+    Recent news headlines from Google: {sections["google_news_headlines"]}
+    Recent news headlines from Naver: {sections["naver_news_headlines"]}
+    Fear and Greed Index: {sections["fear_greed_index"]}\n\n"""
+
+    return system_prompt, user_prompt
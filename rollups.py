@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+
+# 해상도별 버킷 길이 (week는 월요일 00시 기준)
+RESOLUTIONS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+UPSERT_ROLLUP_SQL = """INSERT INTO trade_rollups
+    (market, resolution, bucket_start, open_price, high_price, low_price, close_price,
+     btc_balance, krw_balance, revenue_rate, buy_count, sell_count, hold_count, trade_count)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 1)
+    ON DUPLICATE KEY UPDATE
+        high_price = GREATEST(high_price, VALUES(high_price)),
+        low_price = LEAST(low_price, VALUES(low_price)),
+        close_price = VALUES(close_price),
+        btc_balance = VALUES(btc_balance),
+        krw_balance = VALUES(krw_balance),
+        revenue_rate = VALUES(revenue_rate),
+        buy_count = buy_count + VALUES(buy_count),
+        sell_count = sell_count + VALUES(sell_count),
+        hold_count = hold_count + VALUES(hold_count),
+        trade_count = trade_count + 1"""
+
+def create_rollup_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS trade_rollups (
+            market VARCHAR(16) NOT NULL DEFAULT 'KRW-BTC',
+            resolution VARCHAR(8) NOT NULL,
+            bucket_start DATETIME NOT NULL,
+            open_price DECIMAL(18,8),
+            high_price DECIMAL(18,8),
+            low_price DECIMAL(18,8),
+            close_price DECIMAL(18,8),
+            btc_balance DECIMAL(18,8),
+            krw_balance DECIMAL(18,8),
+            revenue_rate DECIMAL(6,2),
+            buy_count INT DEFAULT 0,
+            sell_count INT DEFAULT 0,
+            hold_count INT DEFAULT 0,
+            trade_count INT DEFAULT 0,
+            PRIMARY KEY (market, resolution, bucket_start)
+        )
+    ''')
+
+# 마켓 구분 이전에 만들어진 테이블 변환 (기존 행은 KRW-BTC)
+ADD_ROLLUP_MARKET_SQL = """ALTER TABLE trade_rollups
+    ADD COLUMN market VARCHAR(16) NOT NULL DEFAULT 'KRW-BTC' FIRST,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (market, resolution, bucket_start)"""
+
+def bucket_start(timestamp, resolution):
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if resolution == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    day = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == "day":
+        return day
+    return day - timedelta(days=day.weekday())
+
+def rollup_rows(timestamp, market, decision, btc_balance, krw_balance, btc_krw_price, revenue_rate):
+    # 거래 한 건을 해상도별 집계 테이블에 반영할 UPSERT 값 목록
+    counts = (int(decision == "buy"), int(decision == "sell"), int(decision == "hold"))
+    return [
+        (market, resolution, bucket_start(timestamp, resolution),
+         btc_krw_price, btc_krw_price, btc_krw_price, btc_krw_price,
+         btc_balance, krw_balance, revenue_rate, *counts)
+        for resolution in RESOLUTIONS
+    ]
+
+def backfill_rollups(cursor):
+    # 집계 테이블이 비어 있으면 기존 거래 내역으로 한 번 채움
+    cursor.execute("SELECT COUNT(*) FROM trade_rollups")
+    if cursor.fetchone()[0] > 0:
+        return 0
+    cursor.execute("SELECT timestamp, market, decision, btc_balance, krw_balance, btc_krw_price, revenue_rate FROM trades ORDER BY timestamp")
+    rows = [row for trade in cursor.fetchall() for row in rollup_rows(*trade)]
+    if rows:
+        cursor.executemany(UPSERT_ROLLUP_SQL, rows)
+    return len(rows)
+
+def choose_resolution(start, end, max_points):
+    # 선택한 기간을 max_points 이하의 버킷으로 표현할 수 있는 가장 세밀한 해상도
+    span = end - start
+    for resolution, length in RESOLUTIONS.items():
+        if span / length <= max_points:
+            return resolution
+    return "week"
+
+def lttb(x, y, threshold):
+    import numpy as np
+
+    # Largest-Triangle-Three-Buckets: 모양을 유지하면서 threshold 개의 점만 남기는 다운샘플링
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean() if next_end > end else x[-1]
+        next_y = y[end:next_end].mean() if next_end > end else y[-1]
+        areas = np.abs(
+            (x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a])
+        )
+        a = start + int(np.argmax(areas)) if len(areas) else start
+        selected[i + 1] = a
+    return selected
+
+def downsample(df, x_column, y_column, max_points):
+    import pandas as pd
+
+    df = df.dropna(subset=[y_column])
+    if len(df) <= max_points:
+        return df
+    x = pd.to_datetime(df[x_column]).astype("int64")
+    return df.iloc[lttb(x, df[y_column].astype(float), max_points)]
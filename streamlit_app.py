@@ -1,9 +1,13 @@
 import os
+import time
+import threading
 import pandas as pd
 import streamlit as st
 import plotly.express as px
-import mysql.connector
 from dotenv import load_dotenv
+from db import get_db_connection
+from datetime import timedelta
+from rollups import choose_resolution, downsample
 
 # 환경 변수 로드
 load_dotenv()
@@ -13,30 +17,161 @@ st.set_page_config(
     page_icon="🪙", 
 )
 
-def get_db_connection():
-    return mysql.connector.connect(
-        host=os.getenv('MYSQL_HOST'),
-        port=os.getenv('MYSQL_PORT'),
-        user=os.getenv('MYSQL_USER'),
-        password=os.getenv('MYSQL_PASSWORD'),
-        database=os.getenv('MYSQL_DB')
-    )
+# 차트/통계에 필요한 열 (reason, reflection 같은 긴 TEXT는 보는 행만 따로 조회)
+SUMMARY_COLUMNS = ["id", "timestamp", "market", "decision", "percentage", "btc_balance", "krw_balance", "btc_avg_buy_price", "btc_krw_price", "revenue_rate"]
+NUMERIC_COLUMNS = ["btc_balance", "krw_balance", "btc_avg_buy_price", "btc_krw_price", "revenue_rate"]
+CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', '60'))  # 새 거래 조회 주기(초)
+PAGE_SIZE = int(os.getenv('DASHBOARD_PAGE_SIZE', '50'))
+MAX_POINTS = int(os.getenv('DASHBOARD_MAX_POINTS', '1000'))  # 차트당 최대 점 개수
+# 성능 페이지 기본 단계 (fetch:* 소스별 기록은 선택 시에만 표시)
+METRIC_STAGES = ["fetch", "indicators", "recent_trades", "reflection", "chart", "decision", "order", "db_write"]
+METRIC_BUCKETS = {"최근 1일": "1h", "최근 1주": "6h", "최근 1개월": "1D", "최근 3개월": "1D", "최근 1년": "1W", "전체": "1W"}
+TIME_RANGES = {
+    "최근 1일": timedelta(days=1),
+    "최근 1주": timedelta(weeks=1),
+    "최근 1개월": timedelta(days=30),
+    "최근 3개월": timedelta(days=90),
+    "최근 1년": timedelta(days=365),
+    "전체": None,
+}
+
+def query_frame(sql, params=()):
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute(sql, params)
+        columns = [column[0] for column in c.description]  # 컬럼명 가져오기
+        rows = c.fetchall()  # 실제 데이터 가져오기
+        c.close()
+    finally:
+        conn.close()  # 커넥션 풀로 반환
+    return pd.DataFrame(rows, columns=columns)
+
+class TradeCache:
+    # 재실행(rerun) 사이에 유지되는 거래 요약 캐시, TTL이 지나면 캐시된 최대 id 이후 행만 추가 조회
+    def __init__(self):
+        self.df = pd.DataFrame(columns=SUMMARY_COLUMNS)
+        self.max_id = 0
+        self.loaded_at = 0.0
+        self.lock = threading.Lock()
+
+    def get(self):
+        with self.lock:
+            if time.time() - self.loaded_at >= CACHE_TTL:
+                self.refresh()
+            return self.df
+
+    def refresh(self):
+        new_rows = query_frame(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM trades WHERE id > %s ORDER BY id",
+            (self.max_id,)
+        )
+        self.loaded_at = time.time()
+        if new_rows.empty:
+            return
+        new_rows[NUMERIC_COLUMNS] = new_rows[NUMERIC_COLUMNS].astype(float)
+        new_rows["timestamp"] = pd.to_datetime(new_rows["timestamp"])
+        # 최신 거래가 위로 오도록 유지 (ORDER BY timestamp DESC와 동일)
+        frames = [new_rows, self.df] if not self.df.empty else [new_rows]
+        self.df = pd.concat(frames, ignore_index=True).sort_values("timestamp", ascending=False, ignore_index=True)
+        self.max_id = int(self.df["id"].max())
+
+@st.cache_resource
+def get_trade_cache():
+    return TradeCache()
 
 # 데이터 로드 
 def load_data():
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute("SELECT * FROM trades ORDER BY timestamp DESC")
-    columns = [column[0] for column in c.description]  # 컬럼명 가져오기
-    rows = c.fetchall()  # 실제 데이터 가져오기
-    df = pd.DataFrame(rows, columns=columns)  # 데이터프레임 생성
+    return get_trade_cache().get()
+
+# 긴 텍스트 열은 화면에 표시되는 행만 조회 (거래 기록은 변경되지 않으므로 id 기준으로 캐시)
+@st.cache_data(max_entries=256)
+def load_trade_texts(ids):
+    if not ids:
+        return pd.DataFrame(columns=["id", "reason", "reflection"])
+    placeholders = ", ".join(["%s"] * len(ids))
+    return query_frame(f"SELECT id, reason, reflection FROM trades WHERE id IN ({placeholders})", tuple(ids))
+
+# 선택한 기간/해상도의 집계 데이터 (trade_rollups는 log_trade 시점에 증분 갱신됨)
+@st.cache_data(ttl=CACHE_TTL)
+def load_rollups(resolution, start, market):
+    df = query_frame(
+        "SELECT bucket_start, close_price, btc_balance, krw_balance, revenue_rate, buy_count, sell_count, hold_count "
+        "FROM trade_rollups WHERE market = %s AND resolution = %s AND bucket_start >= %s ORDER BY bucket_start",
+        (market, resolution, start)
+    )
+    df[["close_price", "btc_balance", "krw_balance", "revenue_rate"]] = df[["close_price", "btc_balance", "krw_balance", "revenue_rate"]].astype(float)
+    return df
+
+# 단계별 성능 기록 (사이클당 단계 수만큼의 작은 행)
+@st.cache_data(ttl=CACHE_TTL)
+def load_metrics(start):
+    df = query_frame(
+        "SELECT timestamp, version, market, stage, seconds, status, bytes_in, bytes_out, prompt_chars, retries, model "
+        "FROM cycle_metrics WHERE timestamp >= %s ORDER BY timestamp",
+        (start,)
+    )
+    df["seconds"] = df["seconds"].astype(float)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
 
-    return df 
+def latency_percentiles(df, keys):
+    grouped = df.groupby(keys)["seconds"]
+    return pd.DataFrame({
+        "p50": grouped.quantile(0.5),
+        "p95": grouped.quantile(0.95),
+        "count": grouped.size(),
+    }).reset_index()
+
+def with_trade_texts(df):
+    texts = load_trade_texts(tuple(int(i) for i in df["id"]))
+    return df.merge(texts, on="id", how="left")
 
 # 날짜 형식 변환 함수
 def format_datetime(dt):
     return pd.to_datetime(dt).strftime("%Y년 %m월 %d일 %H시 %M분 %S초")
 
+def metrics_page():
+    st.title('⏱️ 매매 사이클 성능')
+    range_label = st.selectbox("기간", list(TIME_RANGES), index=1)
+    delta = TIME_RANGES[range_label]
+    start = pd.Timestamp.now() - delta if delta is not None else pd.Timestamp("2000-01-01")
+    df = load_metrics(start.to_pydatetime())
+    if df.empty:
+        st.info("아직 성능 기록이 없습니다.")
+        return
+
+    all_stages = sorted(df["stage"].unique())
+    stages = st.multiselect("단계", all_stages, default=[stage for stage in METRIC_STAGES if stage in all_stages])
+    df = df[df["stage"].isin(stages)]
+    st.write(f"사이클 수: **{df['timestamp'].nunique()}**")
+
+    # 시간 구간별 p50/p95 (배포 이후 회귀 확인)
+    bucket = METRIC_BUCKETS[range_label]
+    trend = latency_percentiles(df.assign(bucket=df["timestamp"].dt.floor(bucket)), ["bucket", "stage"])
+    for percentile in ("p50", "p95"):
+        fig = px.line(trend, x="bucket", y=percentile, color="stage", markers=True, title=f"단계별 {percentile} 소요 시간(초)")
+        st.plotly_chart(fig)
+
+    # 배포 버전별 비교
+    st.header('🚀 버전별 단계 지연')
+    by_version = latency_percentiles(df, ["version", "stage"])
+    st.dataframe(by_version.pivot(index="stage", columns="version", values=["p50", "p95"]).round(3))
+
+    # 오류/시간 초과, 재시도, 전송량, 백업 모델 사용
+    st.header('📋 단계별 요약')
+    summary = df.groupby("stage").agg(
+        errors=("status", lambda s: int((s != "ok").sum())),
+        retries=("retries", "sum"),
+        avg_bytes_in=("bytes_in", "mean"),
+        avg_bytes_out=("bytes_out", "mean"),
+        avg_prompt_chars=("prompt_chars", "mean"),
+    ).round(1)
+    st.dataframe(summary)
+    models = df.dropna(subset=["model"]).groupby(["stage", "model"]).size().rename("count").reset_index()
+    if not models.empty:
+        st.dataframe(models)
+
 # 메인 함수
 def main():
     st.title('LDY Studio 비트코인 거래 내역 뷰어')
@@ -44,6 +179,9 @@ def main():
     
     # 데이터 로드
     df = load_data()
+    if df.empty:
+        st.info("아직 거래 내역이 없습니다.")
+        return
 
     # 기본 통계
     st.header('📈 기본 통계')
@@ -55,7 +193,7 @@ def main():
 
     # 가장 최근 거래 내역
     st.header('📌 가장 최근 거래 내역')
-    latest_trade = df.iloc[0]  
+    latest_trade = with_trade_texts(df.iloc[:1]).iloc[0]
     decision_color = "#008000" if latest_trade['decision'] == 'buy' else "#FF0000" if latest_trade['decision'] == 'sell' else "#808080"
     revenue_color = "#0000FF" if latest_trade['revenue_rate'] >= 0 else "#FF0000"
     
@@ -87,35 +225,53 @@ def main():
 
     # 거래 내역 표시
     st.header('📜 전체 거래 내역')
-    st.dataframe(df)
+    page_count = max((len(df) - 1) // PAGE_SIZE + 1, 1)
+    page = st.number_input(f"페이지 (총 {page_count}페이지)", min_value=1, max_value=page_count, value=1)
+    page_df = df.iloc[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+    st.dataframe(with_trade_texts(page_df))
     st.write("")
     st.write("")
 
+    # 차트 마켓/기간 선택 -> 기간에 맞는 해상도의 집계 데이터 사용
+    market = st.selectbox("마켓", sorted(df['market'].dropna().unique()))
+    coin = market.split("-", 1)[1]
+    range_label = st.selectbox("차트 기간", list(TIME_RANGES), index=len(TIME_RANGES) - 1)
+    end = df['timestamp'].max()
+    start = df['timestamp'].min() if TIME_RANGES[range_label] is None else end - TIME_RANGES[range_label]
+    resolution = choose_resolution(start, end, MAX_POINTS)
+    rollup_df = load_rollups(resolution, start.to_pydatetime(), market)
+    st.caption(f"집계 단위: {resolution}, 차트당 최대 {MAX_POINTS}개 지점")
+
     # 거래 결정 분포 (Pie Chart)
     st.header('📊 거래 결정 분포')
-    decision_counts = df['decision'].value_counts()
+    decision_counts = rollup_df[['buy_count', 'sell_count', 'hold_count']].sum().rename(lambda c: c.replace('_count', ''))
+    decision_counts = decision_counts[decision_counts > 0]
     fig = px.pie(values=decision_counts.values, names=decision_counts.index, title='거래 결정 비율')
     st.plotly_chart(fig)
     st.write("")
 
-    # BTC 잔액 변화 (Line Chart)
-    st.header('📉 BTC 잔액 변화')
-    fig = px.line(df, x='timestamp', y='btc_balance', title='📈 BTC 잔액 변화')
+    # 코인 잔액 변화 (Line Chart)
+    st.header(f'📉 {coin} 잔액 변화')
+    fig = px.line(downsample(rollup_df, 'bucket_start', 'btc_balance', MAX_POINTS), x='bucket_start', y='btc_balance', title=f'📈 {coin} 잔액 변화')
     st.plotly_chart(fig)
     st.write("")
 
     # KRW 잔액 변화 (Line Chart)
     st.header('💰 KRW 잔액 변화')
-    fig = px.line(df, x='timestamp', y='krw_balance', title='💴 KRW 잔액 변화')
+    fig = px.line(downsample(rollup_df, 'bucket_start', 'krw_balance', MAX_POINTS), x='bucket_start', y='krw_balance', title='💴 KRW 잔액 변화')
     st.plotly_chart(fig)
     st.write("")
 
-    # BTC 가격 변화 (Line Chart)
-    st.header('📢 BTC 가격 변화')
-    fig = px.line(df, x='timestamp', y='btc_krw_price', title='🏷️ BTC 가격 (KRW)')
+    # 코인 가격 변화 (Line Chart)
+    st.header(f'📢 {coin} 가격 변화')
+    fig = px.line(downsample(rollup_df, 'bucket_start', 'close_price', MAX_POINTS), x='bucket_start', y='close_price', title=f'🏷️ {coin} 가격 (KRW)')
     st.plotly_chart(fig)
     st.write("")
 
 # Streamlit 실행
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    page = st.sidebar.radio("페이지", ["거래 내역", "성능"])
+    if page == "성능":
+        metrics_page()
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from candle_store import CandleStore, OHLCV_COLUMNS
+from backtest import Backtest, RuleBasedProvider, FRAME_SPECS
+from indicators import DEFAULT_PARAMS
+
+logger = logging.getLogger(__name__)
+
+# 조합 하나가 어떤 인자로 쓰이는지 (지표 파라미터는 Backtest, 나머지는 제공자/주기)
+PROVIDER_PARAMS = ("rsi_buy", "rsi_sell", "buy_percentage", "sell_percentage")
+CADENCE_PARAM = "every"
+
+DEFAULT_GRID = {
+    "bb_window": [20],
+    "bb_dev": [2],
+    "rsi_window": [14],
+    "macd_fast": [12],
+    "macd_slow": [26],
+    "macd_signal": [9],
+    "buy_percentage": [10, 20, 50],
+    "sell_percentage": [10, 20, 50],
+    "every": [1, 4, 8],
+}
+
+# 워커 프로세스마다 한 번만 여는 캔들 이력 (memmap 위의 읽기 전용 DataFrame)
+worker_frames = None
+worker_capital = None
+
+def export_frames(frames, cache_dir):
+    # 캔들 이력을 .npy로 한 번 저장해 두고 워커는 mmap으로 열어 페이지 캐시를 공유
+    os.makedirs(cache_dir, exist_ok=True)
+    for name, df in frames.items():
+        np.save(os.path.join(cache_dir, f"{name}_index.npy"), df.index.to_numpy())
+        np.save(os.path.join(cache_dir, f"{name}_values.npy"), df[OHLCV_COLUMNS].to_numpy(dtype=float))
+
+def load_frames(cache_dir):
+    frames = {}
+    for name, _, _ in FRAME_SPECS:
+        index = np.load(os.path.join(cache_dir, f"{name}_index.npy"), mmap_mode='r')
+        values = np.load(os.path.join(cache_dir, f"{name}_values.npy"), mmap_mode='r')
+        frames[name] = pd.DataFrame(values, index=pd.DatetimeIndex(index), columns=OHLCV_COLUMNS, copy=False)
+    return frames
+
+def init_worker(cache_dir, initial_capital):
+    global worker_frames, worker_capital
+    worker_frames = load_frames(cache_dir)
+    worker_capital = initial_capital
+
+def run_combo(combo):
+    indicator_params = {k: v for k, v in combo.items() if k in DEFAULT_PARAMS}
+    provider_params = {k: v for k, v in combo.items() if k in PROVIDER_PARAMS}
+    backtest = Backtest(worker_frames, worker_capital, indicator_params)
+    _, summary = backtest.run(RuleBasedProvider(**provider_params), every=combo.get(CADENCE_PARAM, 1))
+    return summary
+
+def expand_grid(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def data_identity(frames):
+    # 간격별 캔들 이력의 내용 해시와 기간 (같은 DB라도 이력 범위가 다르면 다른 데이터로 취급)
+    digest = hashlib.sha1()
+    ranges = {}
+    for name in sorted(frames):
+        df = frames[name]
+        digest.update(name.encode())
+        digest.update(df.index.to_numpy(dtype="datetime64[ns]").tobytes())
+        digest.update(np.ascontiguousarray(df[OHLCV_COLUMNS].to_numpy(dtype=float)).tobytes())
+        ranges[name] = [str(df.index[0]), str(df.index[-1]), len(df)] if len(df) else [None, None, 0]
+    return {"hash": digest.hexdigest()[:16], "ranges": ranges}
+
+def sweep_context(frames, market, source, initial_capital):
+    # 결과 재사용 여부를 가르는 실행 조건 (마켓/데이터 원본/이력 범위/초기 자본)
+    return {
+        "market": market,
+        "source": os.path.abspath(source) if source else None,
+        "data": data_identity(frames),
+        "initial_capital": initial_capital,
+    }
+
+def combo_key(combo, context=None):
+    payload = {"params": combo, "context": context}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+def completed_keys(results_path):
+    # 이미 결과 파일에 기록된 조합 (중단 후 재실행 시 건너뜀, 마지막 줄이 잘렸으면 무시)
+    keys = set()
+    if not os.path.exists(results_path):
+        return keys
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                keys.add(json.loads(line)["key"])
+            except (json.JSONDecodeError, KeyError):
+                continue
+    return keys
+
+def run_sweep(frames, grid, results_path, cache_dir, initial_capital, max_workers=None, market=None, source=None):
+    # 같은 결과 파일이라도 마켓/데이터/이력 범위가 다르면 키가 달라 다시 실행
+    context = sweep_context(frames, market, source, initial_capital)
+    combos = expand_grid(grid)
+    keys = {combo_key(c, context) for c in combos}
+    done = completed_keys(results_path)
+    pending = [c for c in combos if combo_key(c, context) not in done]
+    logger.info(f"파라미터 조합 {len(combos)}개 중 {len(done & keys)}개 완료, {len(pending)}개 실행")
+    if not pending:
+        return 0
+
+    export_frames(frames, cache_dir)
+    started = time.perf_counter()
+    finished = 0
+    with open(results_path, "a", encoding="utf-8") as out, ProcessPoolExecutor(
+        max_workers=max_workers, initializer=init_worker, initargs=(cache_dir, initial_capital)
+    ) as executor:
+        futures = {executor.submit(run_combo, combo): combo for combo in pending}
+        for future in as_completed(futures):
+            combo = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                logger.error(f"조합 {combo} 실행 중 오류 발생: {e}")
+                continue
+            # 끝나는 대로 한 줄씩 기록해 중단되어도 완료된 결과는 남김
+            record = {"key": combo_key(combo, context), "params": combo, "context": context, "summary": summary}
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            finished += 1
+            logger.info(f"[{finished}/{len(pending)}] {combo} → 수익률 {summary.get('revenue_rate')}%")
+    logger.info(f"파라미터 탐색 완료: {finished}개, {time.perf_counter() - started:.1f}s")
+    return finished
+
+def main():
+    parser = argparse.ArgumentParser(description="백테스트 파라미터 그리드 병렬 탐색")
+    parser.add_argument("--db", default=os.getenv('CANDLE_STORE_PATH', 'candles.db'))
+    parser.add_argument("--market", default="KRW-BTC")
+    parser.add_argument("--history", type=int, default=100_000, help="간격별로 불러올 최대 캔들 수")
+    parser.add_argument("--grid", help="파라미터별 후보 목록 JSON 파일 (없으면 DEFAULT_GRID)")
+    parser.add_argument("--results", default="sweep_results.jsonl")
+    parser.add_argument("--cache-dir", default="sweep_cache")
+    parser.add_argument("--initial-capital", type=float, default=float(os.getenv('INITIAL_CAPITAL') or 1_000_000))
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    grid = DEFAULT_GRID
+    if args.grid:
+        with open(args.grid, encoding="utf-8") as f:
+            grid = json.load(f)
+
+    store = CandleStore(args.db, max_rows=args.history)
+    frames = {name: store.load(args.market, interval) for name, interval, _ in FRAME_SPECS}
+    run_sweep(frames, grid, args.results, args.cache_dir, args.initial_capital, args.workers,
+              market=args.market, source=args.db)
+
+if __name__ == "__main__":
+    main()
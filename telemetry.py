@@ -0,0 +1,98 @@
+import os
+import time
+import uuid
+import threading
+
+from datetime import datetime
+from contextlib import contextmanager
+
+INSERT_METRIC_SQL = """INSERT INTO cycle_metrics
+    (cycle_id, timestamp, version, market, stage, seconds, status, bytes_in, bytes_out, prompt_chars, retries, model)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
+
+# 같은 단계에 여러 번 기록하면 더하는 값 (나머지는 마지막 값으로 덮어씀)
+ADDITIVE_FIELDS = ("seconds", "bytes_in", "bytes_out", "prompt_chars", "retries")
+
+def create_metrics_table(cursor):
+    # 사이클 × 단계(× 마켓)별 한 행, 배포 버전별 지연 비교용
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cycle_metrics (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            cycle_id VARCHAR(32),
+            timestamp DATETIME,
+            version VARCHAR(64),
+            market VARCHAR(16),
+            stage VARCHAR(48),
+            seconds DECIMAL(10,3),
+            status VARCHAR(10),
+            bytes_in BIGINT DEFAULT 0,
+            bytes_out BIGINT DEFAULT 0,
+            prompt_chars INT DEFAULT 0,
+            retries INT DEFAULT 0,
+            model VARCHAR(64),
+            INDEX idx_cycle_metrics_timestamp (timestamp),
+            INDEX idx_cycle_metrics_stage_timestamp (stage, timestamp)
+        )
+    ''')
+
+class CycleMetrics:
+    # 한 매매 사이클의 단계별 소요 시간/전송량/프롬프트 크기/재시도/사용 모델 수집 (여러 스레드에서 기록)
+    def __init__(self, version=None):
+        self.cycle_id = uuid.uuid4().hex
+        self.timestamp = datetime.now()
+        self.version = version or os.getenv('APP_VERSION', 'dev')
+        self.records = {}
+        self.lock = threading.Lock()
+
+    def record(self, stage, market=None, **fields):
+        with self.lock:
+            record = self.records.setdefault((stage, market), {"status": "ok"})
+            for name, value in fields.items():
+                if value is None:
+                    continue
+                if name in ADDITIVE_FIELDS:
+                    record[name] = record.get(name, 0) + value
+                else:
+                    record[name] = value
+
+    @contextmanager
+    def measure(self, stage, market=None):
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            self.record(stage, market, seconds=time.perf_counter() - started, status=status)
+
+    def record_model_calls(self, stage, market, calls):
+        # ModelClient.tracked_calls() 결과: 수정 요청/백업 모델 전환은 재시도로 집계
+        if not calls:
+            return
+        self.record(
+            stage, market,
+            bytes_in=sum(c["bytes_in"] for c in calls),
+            bytes_out=sum(c["bytes_out"] for c in calls),
+            prompt_chars=calls[0]["prompt_chars"],
+            retries=len(calls) - 1 + sum(c["retries"] for c in calls),
+            model=calls[-1]["model"] + (" (cache)" if calls[-1]["cached"] else ""),
+        )
+
+    def rows(self):
+        with self.lock:
+            items = list(self.records.items())
+        return [
+            (self.cycle_id, self.timestamp, self.version, market, stage,
+             round(r.get("seconds", 0.0), 3), r["status"], r.get("bytes_in", 0), r.get("bytes_out", 0),
+             r.get("prompt_chars", 0), r.get("retries", 0), r.get("model"))
+            for (stage, market), r in items
+        ]
+
+    def summary(self):
+        return ", ".join(
+            f"{stage if market is None else f'{market}:{stage}'}={r.get('seconds', 0.0):.2f}s({r['status']})"
+            for (stage, market), r in sorted(self.records.items(), key=lambda item: (item[0][0], item[0][1] or ""))
+            if not stage.startswith("fetch:")
+        )
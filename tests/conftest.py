@@ -0,0 +1,28 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 저장소 루트의 모듈(indicators, db, ...)을 패키지 설치 없이 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def make_ohlcv(count, seed=0, start="2026-01-01", freq="h"):
+    # 랜덤 워크 기반 합성 OHLCV (업비트 get_ohlcv와 같은 열/인덱스 형식)
+    rng = np.random.default_rng(seed)
+    close = 50_000_000 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.004, count)) * close
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.uniform(1, 50, count),
+        "value": rng.uniform(1e7, 1e9, count),
+    }, index=pd.date_range(start, periods=count, freq=freq))
+
+@pytest.fixture
+def ohlcv():
+    return make_ohlcv
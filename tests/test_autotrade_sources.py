@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+from autotrade import run_sources_concurrently
+
+def test_slow_source_yields_fallback_without_blocking():
+    release = threading.Event()
+
+    def slow():
+        release.wait(10)
+        return "late"
+
+    try:
+        started = time.perf_counter()
+        results, timings = run_sources_concurrently({
+            "fast": (lambda: "fresh", None, True),
+            "slow": (slow, "fallback", False),
+        }, timeout=0.2)
+        elapsed = time.perf_counter() - started
+    finally:
+        release.set()
+
+    assert elapsed < 1
+    assert results == {"fast": "fresh", "slow": "fallback"}
+    assert timings["fast"]["status"] == "ok"
+    assert timings["slow"]["status"] == "timeout"
+    assert timings["slow"]["seconds"] >= 0.2
+
+def test_failing_source_does_not_cancel_others():
+    finished = []
+
+    def broken():
+        raise ValueError("boom")
+
+    def steady(name):
+        def call():
+            time.sleep(0.05)
+            finished.append(name)
+            return name
+        return call
+
+    results, timings = run_sources_concurrently({
+        "broken": (broken, [], False),
+        "first": (steady("first"), None, True),
+        "second": (steady("second"), None, True),
+    }, timeout=5)
+
+    assert results == {"broken": [], "first": "first", "second": "second"}
+    assert sorted(finished) == ["first", "second"]
+    assert timings["broken"]["status"] == "error"
+    assert timings["first"]["status"] == timings["second"]["status"] == "ok"
+
+def test_sources_run_concurrently():
+    barrier = threading.Barrier(3, timeout=2)
+    sources = {name: (lambda: barrier.wait() is not None, None, True) for name in ("a", "b", "c")}
+    # 순차 실행이면 첫 호출이 barrier에서 시간 초과로 실패함
+    results, _ = run_sources_concurrently(sources, timeout=5)
+    assert results == {"a": True, "b": True, "c": True}
+
+def test_missing_required_source_raises():
+    def broken():
+        raise ConnectionError("down")
+
+    with pytest.raises(RuntimeError, match="ohlcv"):
+        run_sources_concurrently({
+            "ohlcv": (broken, None, True),
+            "news": (lambda: [], [], False),
+        }, timeout=1)
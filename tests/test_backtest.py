@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from backtest import Backtest, ModelProvider, ReplayProvider, RuleBasedProvider
+
+@pytest.fixture
+def backtest(ohlcv):
+    frames = {
+        "df_daily": ohlcv(45, seed=1, freq="D"),
+        "df_4hourly": ohlcv(270, seed=2, freq="4h"),
+        "df_hourly": ohlcv(1080, seed=3),
+    }
+    return Backtest(frames, 1_000_000, market="KRW-BTC", token_budget=12000)
+
+class RecordingProvider:
+    needs_prompt = True
+
+    def __init__(self):
+        self.prompts = []
+
+    def decide(self, snapshot):
+        self.prompts.append(snapshot.prompts)
+        return {"decision": "hold", "percentage": 0, "reason": "test"}
+
+class FakeClient:
+    # ModelClient.generate/invalidate 대역: 받은 대화 내용을 기록하고 매수 판단을 돌려줌
+    def __init__(self):
+        self.contents = []
+
+    def generate(self, contents, generation_config=None):
+        self.contents.append(contents)
+        return json.dumps({"decision": "buy", "percentage": 10, "reason": "test"})
+
+    def invalidate(self, contents, generation_config=None):
+        pass
+
+def test_prompt_provider_receives_decision_prompts(backtest):
+    provider = RecordingProvider()
+    curve, summary = backtest.run(provider, every=24)
+    assert len(provider.prompts) == len(curve) > 0
+    system_prompt, user_prompt = provider.prompts[-1]
+    assert "Market: KRW-BTC" in user_prompt
+    assert "Hourly OHLCV with indicators" in user_prompt
+    assert summary["avg_prompt_chars"] > 0
+
+def test_replay_provider_skips_prompts_by_default(backtest):
+    curve, summary = backtest.run(ReplayProvider([]), every=24)
+    assert (curve["prompt_chars"] == 0).all()
+    assert "avg_prompt_chars" not in summary
+
+    curve, summary = backtest.run(ReplayProvider([], needs_prompt=True), every=24)
+    assert (curve["prompt_chars"] > 0).all()
+    assert summary["avg_prompt_chars"] > 0
+
+def test_rule_provider_skips_prompts(backtest):
+    curve, summary = backtest.run(RuleBasedProvider(), every=24)
+    assert (curve["prompt_chars"] == 0).all()
+    assert "avg_prompt_chars" not in summary
+
+def test_model_provider_sends_assembled_prompts(backtest):
+    client = FakeClient()
+    curve, summary = backtest.run(ModelProvider(client), every=48)
+    assert len(client.contents) == len(curve)
+    assert "Market: KRW-BTC" in client.contents[0][1]["parts"][0]["text"]
+    assert summary["trades"] > 0
@@ -0,0 +1,56 @@
+import chart_capture
+from chart_capture import ChartCaptureService
+
+class FakeDriver:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url):
+        self.calls.append("get")
+
+    def refresh(self):
+        self.calls.append("refresh")
+
+    def find_elements(self, by, xpath):
+        return [object()]
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_service(monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(chart_capture.time, "monotonic", clock)
+    monkeypatch.setattr(chart_capture, "wait_for_chart_ready", lambda driver, timeout: None)
+    monkeypatch.setattr(chart_capture, "perform_chart_actions", lambda driver: driver.calls.append("setup"))
+    service = ChartCaptureService(**kwargs)
+    service.driver = FakeDriver()
+    service.load_page()
+    service.driver.calls.clear()
+    return service, clock
+
+def test_fresh_page_is_reused(monkeypatch):
+    service, clock = make_service(monkeypatch, refresh_interval=600)
+    clock.now += 599
+    service.ensure_ready()
+    assert service.driver.calls == []
+
+def test_page_is_refreshed_after_interval(monkeypatch):
+    service, clock = make_service(monkeypatch, refresh_interval=600)
+    clock.now += 601
+    service.ensure_ready()
+    assert service.driver.calls == ["refresh", "setup"]
+
+    # 새로고침 시점부터 다시 주기를 셈
+    clock.now += 300
+    service.ensure_ready()
+    assert service.driver.calls == ["refresh", "setup"]
+
+def test_old_page_is_reloaded_instead_of_refreshed(monkeypatch):
+    service, clock = make_service(monkeypatch, refresh_interval=600, max_page_age=3600)
+    clock.now += 3601
+    service.ensure_ready()
+    assert service.driver.calls == ["get", "setup"]
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from matplotlib.figure import Figure
+from chart_renderer import PANELS, compute_chart_studies, compute_chart_window, draw_panel, render_chart_png
+
+# autotrade.OHLCV_FRAMES와 같은 화면 캔들 수, INDICATOR_WARMUP 기본값과 같은 이력 길이
+DISPLAY_COUNTS = [("day", "D", 30), ("minute240", "4h", 24), ("minute60", "h", 24)]
+WARMUP = 200
+
+def panel_values(ax):
+    # 패널에 그려진 선/막대의 y 값 (쌍축 포함)
+    values = []
+    for axis in [ax] + [other for other in ax.figure.axes if other is not ax and other.bbox.bounds == ax.bbox.bounds]:
+        values += [np.asarray(line.get_ydata(), dtype=float) for line in axis.get_lines() if len(line.get_xdata()) > 2]
+        heights = [patch.get_height() for patch in axis.patches]
+        if heights:
+            values.append(np.asarray(heights, dtype=float))
+    return values
+
+@pytest.mark.parametrize("interval, freq, count", DISPLAY_COUNTS)
+def test_every_study_covers_displayed_rows(ohlcv, interval, freq, count):
+    df, studies = compute_chart_window(ohlcv(WARMUP, freq=freq), count)
+    assert len(df) == count
+    for name, series in studies.items():
+        assert len(series) == count, name
+        assert series.notna().all(), f"{interval} {name}: {series.isna().sum()}개 비어 있음"
+    assert {"bb_bbm", "macd", "macd_signal", "adx", "rsi", "stoch_k", "atr", "vwap", "obv"} <= set(studies)
+
+def test_short_frame_leaves_gaps(ohlcv):
+    # 화면 캔들 수만으로 계산하면 MACD가 비어 있음 (전체 이력을 넘겨야 하는 이유)
+    studies = compute_chart_studies(ohlcv(24))
+    assert studies["macd"].isna().all()
+
+@pytest.mark.parametrize("panel", PANELS)
+def test_every_panel_has_data_for_displayed_rows(ohlcv, panel):
+    df, studies = compute_chart_window(ohlcv(WARMUP), 24)
+    ax = Figure().subplots()
+    draw_panel(ax, panel, df, studies, np.arange(len(df)))
+    values = panel_values(ax)
+    assert values, panel
+    for series in values:
+        assert len(series) == len(df)
+        assert np.isfinite(series).all(), panel
+
+def test_render_chart_png_offline(ohlcv):
+    png = render_chart_png([
+        ("KRW-BTC Daily", ohlcv(WARMUP, freq="D"), 30),
+        ("KRW-BTC 4H", ohlcv(WARMUP, freq="4h"), 24),
+        ("KRW-BTC 1H", ohlcv(WARMUP), 24),
+    ], width=600, height=900)
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
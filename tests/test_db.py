@@ -0,0 +1,146 @@
+import queue
+import threading
+import time
+
+import mysql.connector
+import pytest
+
+import db
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        pass
+
+    def close(self):
+        # PooledMySQLConnection.close()처럼 풀로 반환
+        self.pool.release(self)
+
+class FakePool:
+    # MySQLConnectionPool과 같이 비어 있으면 기다리지 않고 PoolError
+    def __init__(self, size):
+        self.size = size
+        self.idle = queue.Queue()
+        for _ in range(size):
+            self.idle.put(FakeConnection(self))
+        self.in_use = 0
+        self.max_in_use = 0
+        self.lock = threading.Lock()
+
+    def get_connection(self):
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            raise mysql.connector.errors.PoolError("Failed getting connection; pool exhausted")
+        with self.lock:
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+        return conn
+
+    def release(self, conn):
+        with self.lock:
+            self.in_use -= 1
+        self.idle.put(conn)
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    pool = FakePool(size=2)
+    monkeypatch.setattr(db, "get_pool", lambda: pool)
+    return pool
+
+def test_borrowing_more_than_pool_size_waits_for_release(fake_pool):
+    held = [db.get_db_connection(), db.get_db_connection()]
+    threading.Timer(0.1, held[0].close).start()
+
+    started = time.monotonic()
+    conn = db.get_db_connection(timeout=2)
+    assert conn is held[0]
+    assert time.monotonic() - started >= 0.05
+    conn.close()
+    held[1].close()
+
+def test_concurrent_borrowers_all_succeed(fake_pool):
+    # 마켓별 recent_trades 단계처럼 풀 크기보다 많은 스레드가 동시에 빌림
+    errors = []
+
+    def borrow():
+        try:
+            conn = db.get_db_connection(timeout=5)
+            time.sleep(0.02)
+            conn.close()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=borrow) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert fake_pool.max_in_use == fake_pool.size
+    assert fake_pool.idle.qsize() == fake_pool.size
+
+def test_borrow_times_out_when_pool_stays_empty(fake_pool):
+    held = [db.get_db_connection(), db.get_db_connection()]
+    started = time.monotonic()
+    with pytest.raises(mysql.connector.errors.PoolError):
+        db.get_db_connection(timeout=0.1)
+    assert time.monotonic() - started < 1
+    for conn in held:
+        conn.close()
+
+def test_default_pool_size_follows_market_count(monkeypatch):
+    monkeypatch.setenv("TRADING_MARKETS", ",".join(f"KRW-C{i}" for i in range(8)))
+    assert db.default_pool_size() == 11
+    monkeypatch.setenv("TRADING_MARKETS", "KRW-BTC")
+    assert db.default_pool_size() == 5
+    monkeypatch.setenv("TRADING_MARKETS", ",".join(f"KRW-C{i}" for i in range(40)))
+    assert db.default_pool_size() == 32
+
+class RecordingConnection:
+    def __init__(self, log, fail=False):
+        self.log = log
+        self.fail = fail
+
+    def cursor(self):
+        return self
+
+    def executemany(self, sql, rows):
+        if self.fail:
+            raise mysql.connector.Error("connection lost")
+        self.log.append((sql, list(rows), threading.current_thread().name))
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+def test_flush_later_writes_on_background_thread(monkeypatch):
+    log = []
+    monkeypatch.setattr(db, "get_db_connection", lambda: RecordingConnection(log))
+    writer = db.BatchWriter()
+    writer.add("INSERT INTO cycle_metrics VALUES (%s)", (1,))
+    writer.add("INSERT INTO cycle_metrics VALUES (%s)", (2,))
+
+    assert writer.flush_later().result(timeout=5) == 2
+    ((sql, rows, thread),) = log
+    assert rows == [(1,), (2,)]
+    assert thread.startswith("db-writer")
+
+def test_flush_later_failure_keeps_rows_for_next_flush(monkeypatch):
+    log = []
+    connections = iter([RecordingConnection(log, fail=True), RecordingConnection(log)])
+    monkeypatch.setattr(db, "get_db_connection", lambda: next(connections))
+    writer = db.BatchWriter()
+    writer.add("INSERT INTO cycle_metrics VALUES (%s)", (1,))
+
+    assert writer.flush_later().result(timeout=5) == 0
+    assert writer.flush() == 1
+    assert log[0][1] == [(1,)]
@@ -0,0 +1,51 @@
+from event_trigger import EventTrigger, ReplaySource, VolatilityTrigger
+
+class FakeClock:
+    def __init__(self):
+        self.value = 1000.0
+
+    def __call__(self):
+        return self.value
+
+def make_trigger(clock, **kwargs):
+    params = {"window": 300, "price_change": 0.01, "volatility": 1.0, "cooldown": 900, "max_per_hour": 2}
+    return VolatilityTrigger(clock=clock, **{**params, **kwargs})
+
+def test_scheduled_cycle_uses_current_time_not_last_tick():
+    clock = FakeClock()
+    trigger = make_trigger(clock)
+    trigger.update(1_700_000_000, 100.0)
+
+    # 마지막 체결 이후 20분 동안 체결이 없다가 정시 사이클 실행
+    clock.value += 1200
+    trigger.record_cycle()
+    assert trigger.last_cycle == 1_700_001_200
+
+    # 쿨다운은 정시 사이클 시각 기준: 10분 뒤 급등은 무시, 15분 뒤는 허용
+    assert trigger.update(1_700_001_800, 102.0) is None
+    assert trigger.update(1_700_002_200, 104.0) is not None
+
+def test_record_cycle_without_ticks_uses_wall_clock(monkeypatch):
+    monkeypatch.setattr("event_trigger.time.time", lambda: 1_800_000_000.0)
+    trigger = make_trigger(FakeClock())
+    trigger.record_cycle()
+    assert trigger.last_cycle == 1_800_000_000.0
+
+def test_fired_cycle_is_anchored_to_the_firing_tick():
+    ticks = [(1_700_000_000, 100.0), (1_700_000_060, 102.0), (1_700_000_120, 102.1)]
+    trigger = make_trigger(FakeClock())
+    events = EventTrigger(ReplaySource(ticks), trigger)
+    events.consume()
+
+    reason = events.wait(0)
+    assert reason is not None
+    assert trigger.last_cycle == 1_700_000_060
+
+def test_scheduled_wait_records_cycle():
+    clock = FakeClock()
+    trigger = make_trigger(clock)
+    events = EventTrigger(ReplaySource([(1_700_000_000, 100.0)]), trigger)
+    events.consume()
+    clock.value += 30
+    assert events.wait(0) is None
+    assert trigger.last_cycle == 1_700_000_030
@@ -0,0 +1,118 @@
+import itertools
+import logging
+
+import pytest
+
+from execution import OrderExecutor
+
+PRICE = 100_000_000.0
+
+class FakeBook:
+    def summary(self):
+        return {"best_bid": PRICE - 10_000, "best_ask": PRICE}
+
+class FakeUpbit:
+    # 주문 UUID별로 get_order가 돌려줄 상태를 순서대로 재생 (마지막 상태는 계속 반복)
+    def __init__(self, limit_states=None):
+        self.limit_states = limit_states or []
+        self.uuids = (f"uuid-{i}" for i in itertools.count())
+        self.orders = {}
+        self.last = {}
+        self.calls = []
+
+    def order(self, side, ord_type, states):
+        uuid = next(self.uuids)
+        self.orders[uuid] = iter(states)
+        self.calls.append((side, ord_type, uuid))
+        return {"uuid": uuid}
+
+    def buy_market_order(self, market, amount):
+        self.calls_amount = amount
+        return self.order("buy", "price", [market_done(uuid=None, side="bid", funds=amount, volume=amount / PRICE)])
+
+    def sell_market_order(self, market, volume):
+        return self.order("sell", "market", [market_done(uuid=None, side="ask", funds=volume * PRICE, volume=volume)])
+
+    def buy_limit_order(self, market, price, volume):
+        return self.order("buy", "limit", self.limit_states)
+
+    def sell_limit_order(self, market, price, volume):
+        return self.order("sell", "limit", self.limit_states)
+
+    def cancel_order(self, uuid):
+        self.calls.append(("cancel", None, uuid))
+
+    def get_order(self, uuid):
+        states = self.orders[uuid]
+        state = next(states, None)
+        if state is None:
+            state = self.last.get(uuid)
+        self.last[uuid] = state
+        if state is None:
+            return None
+        return {**state, "uuid": uuid}
+
+def market_done(uuid, side, funds, volume):
+    return {"uuid": uuid, "side": side, "ord_type": "market", "state": "done", "paid_fee": funds * 0.0005,
+            "executed_volume": str(volume), "trades": [{"volume": str(volume), "funds": str(funds)}]}
+
+def limit_state(state, volume, side="bid"):
+    trades = [{"volume": str(volume), "funds": str(volume * PRICE)}] if volume else []
+    return {"side": side, "ord_type": "limit", "state": state, "paid_fee": "0", "executed_volume": str(volume), "trades": trades}
+
+def executor(upbit, **kwargs):
+    params = {"strategy": "limit", "poll_interval": 0, "poll_timeout": 0.05, "limit_timeout": 0.05,
+              "interval": 0, "orderbook_source": FakeBook}
+    return OrderExecutor(upbit, **{**params, **kwargs})
+
+def market_orders(upbit):
+    return [call for call in upbit.calls if call[1] in ("price", "market")]
+
+def test_twap_market_children_are_aggregated():
+    upbit = FakeUpbit()
+    result = OrderExecutor(upbit, slices=3, interval=0, poll_interval=0).execute("buy", 300_000, PRICE)
+    assert len(market_orders(upbit)) == 3
+    assert result["orders"] == 3
+    assert result["funds"] == pytest.approx(300_000)
+    assert result["avg_price"] == pytest.approx(PRICE)
+
+def test_twap_keeps_children_above_minimum_order():
+    upbit = FakeUpbit()
+    OrderExecutor(upbit, slices=10, interval=0, poll_interval=0).execute("buy", 30_000, PRICE)
+    assert len(market_orders(upbit)) == 3
+
+def test_limit_fully_filled_sends_no_market_order():
+    upbit = FakeUpbit([limit_state("wait", 0), limit_state("done", 0.001)])
+    result = executor(upbit).execute("buy", 100_000, PRICE)
+    assert market_orders(upbit) == []
+    assert result["volume"] == pytest.approx(0.001)
+
+def test_limit_partial_fill_then_cancel_sends_market_remainder():
+    upbit = FakeUpbit([limit_state("wait", 0.0004)] * 3 + [limit_state("cancel", 0.0004)])
+    result = executor(upbit, limit_timeout=0).execute("buy", 100_000, PRICE)
+    assert ("cancel", None, "uuid-0") in upbit.calls
+    assert len(market_orders(upbit)) == 1
+    assert upbit.calls_amount == pytest.approx(100_000 - 0.0004 * PRICE)
+    assert result["funds"] == pytest.approx(100_000)
+
+def test_sell_remainder_uses_final_executed_volume():
+    upbit = FakeUpbit([limit_state("cancel", 0.3, side="ask")])
+    result = executor(upbit).execute("sell", 1.0, PRICE)
+    assert len(market_orders(upbit)) == 1
+    assert result["volume"] == pytest.approx(1.0)
+
+def test_cancel_that_never_completes_aborts_remainder(caplog):
+    # 취소 후에도 wait 상태면 지정가가 아직 체결될 수 있으므로 시장가를 보내지 않음
+    upbit = FakeUpbit([limit_state("wait", 0.0002)])
+    with caplog.at_level(logging.ERROR, logger="execution"):
+        result = executor(upbit).execute("buy", 100_000, PRICE)
+    assert ("cancel", None, "uuid-0") in upbit.calls
+    assert market_orders(upbit) == []
+    assert result["volume"] == pytest.approx(0.0002)
+    assert "취소 확인 실패" in caplog.text
+
+def test_unknown_order_state_after_cancel_aborts_remainder():
+    upbit = FakeUpbit([])
+    result = executor(upbit).execute("buy", 100_000, PRICE)
+    assert market_orders(upbit) == []
+    assert result["orders"] == 0
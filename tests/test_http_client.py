@@ -0,0 +1,59 @@
+import pytest
+import requests
+
+from requests.structures import CaseInsensitiveDict
+from http_client import HttpClient
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"{}"):
+        self.status_code = status_code
+        self.content = content
+        self.headers = CaseInsensitiveDict()
+
+class FakeSession:
+    # 정해진 응답/예외를 순서대로 돌려주고 받은 요청을 기록
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls.append((method, url, kwargs.get("headers")))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+@pytest.fixture
+def client():
+    return HttpClient(retries=3, backoff=0, max_backoff=0)
+
+def use_session(client, session):
+    client.session = lambda url: session
+    return session
+
+def test_public_get_is_retried(client):
+    session = use_session(client, FakeSession(FakeResponse(503), FakeResponse(200)))
+    response = client.get("https://api.upbit.com/v1/ticker", params={"markets": "KRW-BTC"})
+    assert response.status_code == 200
+    assert len(session.calls) == 2
+
+@pytest.mark.parametrize("method", ["GET", "DELETE"])
+def test_authenticated_request_is_not_retried_on_status(client, method):
+    # 같은 JWT nonce로 다시 보내면 업비트가 거부하므로 첫 응답을 그대로 돌려줌
+    session = use_session(client, FakeSession(FakeResponse(503), FakeResponse(200)))
+    response = client.request(method, "https://api.upbit.com/v1/order", headers={"Authorization": "Bearer token"})
+    assert response.status_code == 503
+    assert len(session.calls) == 1
+    assert client.snapshot()[f"{method} api.upbit.com/v1/order"]["retries"] == 0
+
+def test_authenticated_request_raises_original_connection_error(client):
+    session = use_session(client, FakeSession(requests.ConnectionError("reset"), FakeResponse(200)))
+    with pytest.raises(requests.ConnectionError, match="reset"):
+        client.get("https://api.upbit.com/v1/order", headers={"Authorization": "Bearer token"})
+    assert len(session.calls) == 1
+
+def test_order_creation_is_not_retried(client):
+    session = use_session(client, FakeSession(FakeResponse(503), FakeResponse(200)))
+    response = client.post("https://api.upbit.com/v1/orders", headers={"Authorization": "Bearer token"})
+    assert response.status_code == 503
+    assert len(session.calls) == 1
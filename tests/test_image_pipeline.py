@@ -0,0 +1,58 @@
+import io
+from datetime import datetime
+
+from PIL import Image
+
+import image_pipeline
+from image_pipeline import archive_filename, build_image_part
+from model_client import cache_key, content_size, sdk_contents
+
+def make_png(width=64, height=32):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "#c84a31").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def wait_for_archive():
+    image_pipeline.archive_executor.submit(lambda: None).result()
+
+def test_passthrough_keeps_memoryview_without_copy():
+    view = memoryview(make_png())
+    part, stats = build_image_part(view)
+    assert part["data"] is view
+    assert part["mime_type"] == "image/png"
+    assert stats["bytes_in"] == stats["bytes_out"] == len(view)
+
+def test_memoryview_is_converted_only_at_sdk_boundary():
+    png = make_png()
+    contents = [{"role": "user", "parts": [{"text": "chart"}, {"mime_type": "image/png", "data": memoryview(png)}]}]
+    converted = sdk_contents(contents)
+    assert isinstance(converted[0]["parts"][1]["data"], bytes)
+    assert converted[0]["parts"][1]["data"] == png
+    assert converted[0]["parts"][0] is contents[0]["parts"][0]
+    # 캐시 키/크기 계산은 memoryview 그대로 사용
+    bytes_contents = [{"role": "user", "parts": [{"text": "chart"}, {"mime_type": "image/png", "data": png}]}]
+    assert cache_key("m", contents) == cache_key("m", bytes_contents)
+    assert content_size(contents) == content_size(bytes_contents)
+
+def test_reencode_to_webp_with_max_width():
+    part, stats = build_image_part(memoryview(make_png(200, 100)), image_format="webp", max_width=50)
+    assert part["mime_type"] == "image/webp"
+    assert Image.open(io.BytesIO(part["data"])).size == (50, 25)
+
+def test_archive_filenames_are_unique_within_the_same_second():
+    now = datetime(2026, 10, 18, 9, 30)
+    names = {archive_filename("png", market, now) for market in ("KRW-BTC", "KRW-ETH") for _ in range(5)}
+    assert len(names) == 10
+    assert any(name.startswith("upbit_chart_KRW-ETH_20261018_093000_") for name in names)
+
+def test_concurrent_market_archives_do_not_overwrite(tmp_path):
+    pngs = {market: make_png(10 + i, 10) for i, market in enumerate(("KRW-BTC", "KRW-ETH", "KRW-XRP"))}
+    for market, png in pngs.items():
+        build_image_part(memoryview(png), archive_dir=str(tmp_path), market=market)
+    wait_for_archive()
+
+    files = sorted(tmp_path.iterdir())
+    assert len(files) == 3
+    for market, png in pngs.items():
+        (path,) = [f for f in files if f.name.startswith(f"upbit_chart_{market}_")]
+        assert path.read_bytes() == png
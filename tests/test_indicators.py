@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import INDICATOR_COLUMNS, IndicatorEngine, add_indicators, compute_indicators_batch
+
+def assert_matches_reference(result, reference):
+    # NaN 위치가 같고 나머지 값은 허용 오차 안에서 같아야 함
+    for column in INDICATOR_COLUMNS:
+        expected = reference[column].to_numpy(dtype=float)
+        actual = result[column].to_numpy(dtype=float)
+        np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected), err_msg=column)
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-6, equal_nan=True, err_msg=column)
+
+def test_engine_matches_ta_on_full_history(ohlcv):
+    df = ohlcv(300)
+    result = IndicatorEngine().update("KRW-BTC", df, last_closed=True)
+    assert_matches_reference(result, add_indicators(df.copy()))
+
+def test_engine_sliding_window_keeps_state(ohlcv):
+    # 캔들 저장소처럼 최근 200개만 넘겨도 누적 상태는 전체 이력 기준 값과 같아야 함
+    df = ohlcv(400, seed=1)
+    reference = add_indicators(df.copy())
+    engine = IndicatorEngine()
+    for end in range(200, 401, 25):
+        window = df.iloc[max(0, end - 200):end]
+        result = engine.update("KRW-BTC", window, last_closed=True)
+        assert_matches_reference(result, reference.loc[window.index])
+
+def test_engine_in_progress_candle_is_not_committed(ohlcv):
+    df = ohlcv(250, seed=2)
+    engine = IndicatorEngine()
+
+    # 마지막 캔들은 진행 중인 가격으로 계산하되 상태에는 반영하지 않음
+    partial = df.iloc[:200].copy()
+    partial.iloc[-1, partial.columns.get_loc("close")] *= 1.05
+    result = engine.update("KRW-BTC", partial, last_closed=False)
+    assert_matches_reference(result, add_indicators(partial.copy()))
+
+    # 같은 캔들이 확정 가격으로 바뀌어 다시 들어오면 확정 가격 기준으로 계산
+    result = engine.update("KRW-BTC", df.iloc[:220], last_closed=False)
+    assert_matches_reference(result, add_indicators(df.iloc[:220].copy()))
+
+    result = engine.update("KRW-BTC", df, last_closed=True)
+    assert_matches_reference(result, add_indicators(df.copy()))
+
+def test_engine_resets_when_older_data_arrives(ohlcv):
+    df = ohlcv(300, seed=3)
+    engine = IndicatorEngine()
+    engine.update("KRW-BTC", df.iloc[100:300], last_closed=True)
+
+    # 저장된 상태보다 과거에서 끝나는 데이터 -> 처음부터 다시 누적
+    older = df.iloc[:200]
+    result = engine.update("KRW-BTC", older, last_closed=True)
+    assert_matches_reference(result, add_indicators(older.copy()))
+
+def test_engine_keys_are_independent(ohlcv):
+    engine = IndicatorEngine()
+    btc, eth = ohlcv(120, seed=4), ohlcv(120, seed=5)
+    engine.update(("KRW-BTC", "minute60"), btc, last_closed=True)
+    result = engine.update(("KRW-ETH", "minute60"), eth, last_closed=True)
+    assert_matches_reference(result, add_indicators(eth.copy()))
+
+def test_batch_matches_ta_for_frames_of_different_lengths(ohlcv):
+    frames = [ohlcv(30, seed=6, freq="D"), ohlcv(120, seed=7, freq="4h"), ohlcv(200, seed=8)]
+    results = compute_indicators_batch(frames)
+    for frame, result in zip(frames, results):
+        assert list(result.columns) == list(frame.columns) + INDICATOR_COLUMNS
+        assert_matches_reference(result, add_indicators(frame.copy()))
+
+def test_batch_matches_engine(ohlcv):
+    df = ohlcv(150, seed=9)
+    (batch,) = compute_indicators_batch([df])
+    engine = IndicatorEngine().update("KRW-BTC", df, last_closed=True)
+    pd.testing.assert_frame_equal(batch, engine, check_exact=False, rtol=1e-9, atol=1e-6)
+
+@pytest.mark.parametrize("params", [{"bb_window": 10, "sma_window": 30}, {"ema_window": 20, "rsi_window": 7}])
+def test_batch_matches_engine_with_custom_params(ohlcv, params):
+    df = ohlcv(150, seed=10)
+    (batch,) = compute_indicators_batch([df], **params)
+    engine = IndicatorEngine(**params).update("KRW-BTC", df, last_closed=True)
+    pd.testing.assert_frame_equal(batch, engine, check_exact=False, rtol=1e-9, atol=1e-6)
@@ -0,0 +1,63 @@
+from email.utils import format_datetime
+from datetime import datetime, timezone
+
+import pytest
+
+from news_cache import NewsCache
+
+def pub_date(ts):
+    return format_datetime(datetime.fromtimestamp(ts, timezone.utc))
+
+@pytest.fixture
+def cache(tmp_path):
+    return NewsCache(str(tmp_path / "news.db"))
+
+def test_undated_items_do_not_move_cursor(cache):
+    now = 1_800_000_000
+    first = [
+        {"title": "older article", "published": pub_date(now - 3600)},
+        {"title": "undated article", "published": "3 hours ago"},
+    ]
+    assert cache.refresh("naver", lambda since: first, interval=60, now=now) == 1
+    assert cache.state("naver")[1] == now - 3600
+
+    # 커서(now - 3600) 이후지만 이전 조회 시각보다 과거인 기사도 신규로 저장
+    second = [{"title": "late but new article", "published": pub_date(now - 1800)}]
+    assert cache.refresh("naver", lambda since: second, interval=60, now=now + 600) == 1
+    titles = [item["title"] for item in cache.top("naver", k=10, byte_budget=10_000)]
+    assert titles == ["late but new article", "older article"]
+
+def test_refresh_passes_cursor_and_skips_seen_items(cache):
+    now = 1_800_000_000
+    items = [{"title": "first", "published": pub_date(now - 100)}]
+    cache.refresh("naver", lambda since: items, interval=60, now=now)
+
+    seen = []
+    def fetch(since):
+        seen.append(since)
+        return items + [{"title": "second", "published": pub_date(now + 10)}]
+    assert cache.refresh("naver", fetch, interval=60, now=now + 60) == 1
+    assert seen == [now - 100]
+
+def test_refresh_respects_interval(cache):
+    now = 1_800_000_000
+    calls = []
+    fetch = lambda since: calls.append(since) or []
+    cache.refresh("google", fetch, interval=3600, now=now)
+    cache.refresh("google", fetch, interval=3600, now=now + 60)
+    assert len(calls) == 1
+
+def test_failed_fetch_does_not_record_last_fetch(cache):
+    now = 1_800_000_000
+    cache.refresh("google", lambda since: [{"title": "first", "published": pub_date(now - 100)}], interval=28800, now=now - 30000)
+
+    def failing(since):
+        raise ConnectionError("serpapi 503")
+    assert cache.refresh("google", failing, interval=28800, now=now) == 0
+    assert cache.state("google") == (now - 30000, now - 100)
+
+    # 실패한 다음 사이클에 주기를 기다리지 않고 다시 조회
+    assert cache.due("google", interval=28800, now=now + 60)
+    fresh = [{"title": "second", "published": pub_date(now)}]
+    assert cache.refresh("google", lambda since: fresh, interval=28800, now=now + 60) == 1
+    assert cache.state("google") == (now + 60, now)
@@ -0,0 +1,133 @@
+import random
+
+import pytest
+
+from orderbook import BookSide, LocalOrderbook
+
+def brute_fill(levels, amount, by_notional):
+    # 최우선 호가부터 한 레벨씩 채우는 기준 구현
+    volume = notional = 0.0
+    for i, (price, size) in enumerate(levels):
+        level_value = price * size if by_notional else size
+        taken = amount - (notional if by_notional else volume)
+        if taken <= level_value:
+            part = taken / price if by_notional else taken
+            return volume + part, notional + part * price, i + 1
+        volume += size
+        notional += price * size
+    return volume, notional, len(levels)
+
+def snapshot(bids, asks):
+    units = [{"bid_price": b[0], "bid_size": b[1], "ask_price": a[0], "ask_size": a[1]} for b, a in zip(bids, asks)]
+    return {"market": "KRW-BTC", "orderbook_units": units}
+
+@pytest.fixture
+def book():
+    bids = [(100_000_000 - i * 10_000, 0.1 + i * 0.05) for i in range(15)]
+    asks = [(100_010_000 + i * 10_000, 0.2 + i * 0.03) for i in range(15)]
+    return LocalOrderbook().apply_snapshot(snapshot(bids, asks))
+
+def test_deltas_match_brute_force_fill():
+    rng = random.Random(0)
+    side = BookSide(descending=False)
+    levels = {}
+    for _ in range(500):
+        price = 100_000_000 + rng.randrange(40) * 10_000
+        size = rng.choice([0, 0, rng.uniform(0.01, 1)])
+        side.set(price, size)
+        if size > 0:
+            levels[price] = size
+        else:
+            levels.pop(price, None)
+
+        if levels and rng.random() < 0.2:
+            ordered = sorted(levels.items())
+            assert side.best() == ordered[0][0]
+            amount = rng.uniform(1_000_000, 2e9)
+            result = side.fill(amount, by_notional=True)
+            volume, notional, used = brute_fill(ordered, amount, by_notional=True)
+            assert result["levels"] == used
+            assert result["volume"] == pytest.approx(volume)
+            assert result["notional"] == pytest.approx(notional)
+
+def test_deltas_and_queries_inside_grid_do_not_rebuild():
+    side = BookSide(descending=True)
+    side.replace([(100.0, 1.0), (99.0, 2.0)])
+    rebuilds = side.rebuilds
+    for i in range(50):
+        side.set(98.0 - i, 1.0)
+        assert side.best() == 100.0
+        side.fill(10, by_notional=False)
+        side.depth_within(90.0)
+    side.set(100.0, 0)
+    assert side.best() == 99.0
+    assert side.rebuilds == rebuilds
+
+    # 격자 여유분을 벗어난 가격이 들어올 때만 격자를 다시 잡음
+    side.set(1_000.0, 1.0)
+    assert side.rebuilds == rebuilds + 1
+    assert side.best() == 1_000.0
+    assert side.depth_within(99.0) == pytest.approx(1_000.0 + 99.0 * 2.0)
+
+def test_irregular_prices_match_brute_force_fill():
+    rng = random.Random(1)
+    side = BookSide(descending=True)
+    levels = {}
+    for _ in range(300):
+        price = round(rng.uniform(90, 110), 3)
+        size = rng.choice([0, rng.uniform(0.1, 5)])
+        side.set(price, size)
+        if size > 0:
+            levels[price] = size
+        else:
+            levels.pop(price, None)
+
+        if levels:
+            ordered = sorted(levels.items(), reverse=True)
+            assert side.best() == ordered[0][0]
+            amount = rng.uniform(0.1, 50)
+            result = side.fill(amount, by_notional=False)
+            volume, notional, used = brute_fill(ordered, amount, by_notional=False)
+            assert result["levels"] == used
+            assert result["notional"] == pytest.approx(notional)
+
+def test_stream_update_applies_only_changed_levels(book):
+    bids = [(100_000_000 - i * 10_000, 0.1 + i * 0.05) for i in range(1, 16)]
+    asks = [(100_010_000 + i * 10_000, 0.2 + i * 0.03) for i in range(15)]
+    asks[0] = (100_010_000, 0.5)
+    rebuilds = book.bids.rebuilds + book.asks.rebuilds
+    book.apply_update(snapshot(bids, asks))
+
+    assert book.bids.rebuilds + book.asks.rebuilds == rebuilds
+    assert book.bids.best() == 99_990_000
+    assert len(book.bids.sizes) == 15 and 100_000_000 not in book.bids.sizes
+    assert book.asks.sizes[100_010_000] == 0.5
+    fresh = LocalOrderbook().apply_snapshot(snapshot(bids, asks))
+    assert book.summary() == fresh.summary()
+
+def test_removing_levels_updates_best_and_depth():
+    side = BookSide(descending=True)
+    side.replace([(100.0, 1.0), (99.0, 2.0), (98.0, 3.0)])
+    assert side.depth_within(99.0) == pytest.approx(100.0 + 198.0)
+    side.set(100.0, 0)
+    side.set(97.0, 0)  # 없는 레벨 삭제는 무시
+    assert side.best() == 99.0
+    assert side.depth_within(99.0) == pytest.approx(198.0)
+
+def test_estimate_and_summary(book):
+    estimate = book.estimate("buy", 10_000_000)
+    assert estimate["best_price"] == 100_010_000
+    assert estimate["filled"] and estimate["levels"] == 1
+    assert estimate["slippage_pct"] == 0
+
+    sell = book.estimate("sell", 1.0)
+    assert sell["levels"] > 1 and sell["avg_price"] < sell["best_price"]
+
+    summary = book.summary()
+    assert summary["best_bid"] == 100_000_000 and summary["best_ask"] == 100_010_000
+    assert summary["bid_depth_krw"]["0.1%"] <= summary["bid_depth_krw"]["1.0%"]
+
+def test_estimate_beyond_visible_depth_is_partial(book):
+    result = book.estimate("sell", 1_000)
+    assert result["filled"] is False
+    assert result["levels"] == 15
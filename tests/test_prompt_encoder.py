@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from prompt_encoder import PromptEncoder, column_decimals, encode_frame, estimate_tokens
+
+def rows(text):
+    lines = text.split("\n")
+    return lines[0].split(","), [line.split(",") for line in lines[1:]]
+
+def test_values_keep_significant_digits_per_column():
+    df = pd.DataFrame({
+        "close": [123_456_789.4, 98_765_432.6],
+        "rsi": [51.234567, 49.87654],
+        "macd_diff": [0.00123456, -0.00098765],
+    }, index=pd.date_range("2026-01-01", periods=2, freq="h"))
+    assert column_decimals(df["close"], 6) == 0
+    assert column_decimals(df["rsi"], 6) == 4
+    assert column_decimals(df["macd_diff"], 6) == 8
+
+    header, values = rows(encode_frame(df, significant_digits=6, drop_warmup=False))
+    assert header == ["time", "close", "rsi", "macd_diff"]
+    assert values[0] == ["2026-01-01 00:00", "123456789", "51.2346", "0.00123456"]
+    assert values[1] == ["2026-01-01 01:00", "98765433", "49.8765", "-0.00098765"]
+
+def test_nan_becomes_empty_cell_and_daily_index_drops_time():
+    df = pd.DataFrame({"close": [100.0, np.nan]}, index=pd.date_range("2026-01-01", periods=2, freq="D"))
+    _, values = rows(encode_frame(df, drop_warmup=False))
+    assert values == [["2026-01-01", "100.000"], ["2026-01-02", ""]]
+
+def test_warmup_rows_without_any_indicator_are_dropped(ohlcv):
+    df = ohlcv(6)
+    df["sma_3"] = df["close"].rolling(3).mean()
+    df["rsi"] = [np.nan, np.nan, np.nan, 40.0, 50.0, 60.0]
+
+    _, values = rows(encode_frame(df))
+    assert len(values) == 4
+    assert values[0][0] == df.index[2].strftime("%Y-%m-%d %H:%M")
+    assert values[0][-1] == ""  # 일부 지표만 값이 있는 행은 유지
+
+    # 지정한 지표 열 기준으로만 판단
+    _, values = rows(encode_frame(df, indicator_columns=["rsi"]))
+    assert len(values) == 3
+    assert len(rows(encode_frame(df, drop_warmup=False))[1]) == 6
+
+def test_trim_drops_oldest_rows_until_under_budget(ohlcv):
+    df = ohlcv(200)
+    encoder = PromptEncoder(token_budget=1_000, min_rows=5)
+    encoder.add_frame("hourly", df)
+    encoder.add_json("status", {"balance": 1_000_000})
+    full = encode_frame(df).split("\n")
+    assert encoder.total_tokens() > 1_000
+
+    rendered = encoder.render()
+    lines = rendered["hourly"].split("\n")
+    assert encoder.total_tokens() <= 1_000
+    assert estimate_tokens(sum(len(text) for text in rendered.values())) <= 1_000
+    assert lines[0] == full[0]
+    # 남은 행은 원래 표의 가장 최근 행들
+    assert lines[1:] == full[-(len(lines) - 1):]
+    assert rendered["status"] == '{"balance":1000000}'
+
+def test_trim_takes_rows_from_largest_table_and_respects_min_rows(ohlcv):
+    encoder = PromptEncoder(token_budget=1, min_rows=5)
+    encoder.add_frame("daily", ohlcv(10, freq="D"))
+    encoder.add_frame("hourly", ohlcv(40))
+    rendered = encoder.render()
+
+    # 예산을 맞출 수 없으면 표마다 min_rows까지만 줄이고 멈춤
+    assert len(rendered["daily"].split("\n")) == 1 + 5
+    assert len(rendered["hourly"].split("\n")) == 1 + 5
+    assert encoder.total_tokens() > 1
+
+def test_no_budget_keeps_every_row(ohlcv):
+    encoder = PromptEncoder(token_budget=None)
+    encoder.add_frame("hourly", ohlcv(50))
+    assert len(encoder.render()["hourly"].split("\n")) == 51
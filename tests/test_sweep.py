@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from sweep import combo_key, completed_keys, data_identity, sweep_context
+
+COMBO = {"buy_percentage": 20, "sell_percentage": 20, "every": 4}
+
+@pytest.fixture
+def frames(ohlcv):
+    return {"df_daily": ohlcv(60, seed=1, freq="D"), "df_hourly": ohlcv(500, seed=2)}
+
+def test_key_is_stable_for_same_run(frames):
+    first = sweep_context(frames, "KRW-BTC", "candles.db", 1_000_000)
+    second = sweep_context({name: df.copy() for name, df in frames.items()}, "KRW-BTC", "candles.db", 1_000_000)
+    assert combo_key(COMBO, first) == combo_key(dict(reversed(list(COMBO.items()))), second)
+
+def test_key_changes_with_market_source_and_capital(frames):
+    base = combo_key(COMBO, sweep_context(frames, "KRW-BTC", "candles.db", 1_000_000))
+    assert combo_key(COMBO, sweep_context(frames, "KRW-ETH", "candles.db", 1_000_000)) != base
+    assert combo_key(COMBO, sweep_context(frames, "KRW-BTC", "other.db", 1_000_000)) != base
+    assert combo_key(COMBO, sweep_context(frames, "KRW-BTC", "candles.db", 2_000_000)) != base
+
+def test_key_changes_with_history_range_and_content(frames):
+    base = combo_key(COMBO, sweep_context(frames, "KRW-BTC", "candles.db", 1_000_000))
+    shorter = {**frames, "df_hourly": frames["df_hourly"].iloc[-300:]}
+    assert combo_key(COMBO, sweep_context(shorter, "KRW-BTC", "candles.db", 1_000_000)) != base
+
+    edited = {**frames, "df_hourly": frames["df_hourly"].copy()}
+    edited["df_hourly"].iloc[10, 0] += 1
+    assert data_identity(edited)["ranges"] == data_identity(frames)["ranges"]
+    assert combo_key(COMBO, sweep_context(edited, "KRW-BTC", "candles.db", 1_000_000)) != base
+
+def test_results_from_another_market_are_not_resumed(tmp_path, frames):
+    # 같은 결과 파일에 다른 마켓 결과가 있어도 현재 실행의 조합은 완료로 보지 않음
+    results = tmp_path / "sweep_results.jsonl"
+    btc = sweep_context(frames, "KRW-BTC", "candles.db", 1_000_000)
+    eth = sweep_context(frames, "KRW-ETH", "candles.db", 1_000_000)
+    results.write_text(json.dumps({"key": combo_key(COMBO, btc), "params": COMBO}) + "\n" + '{"key": "trunc', encoding="utf-8")
+
+    done = completed_keys(str(results))
+    assert combo_key(COMBO, btc) in done
+    assert combo_key(COMBO, eth) not in done
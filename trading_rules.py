@@ -0,0 +1,14 @@
+# 실거래(autotrade)와 백테스트가 공유하는 주문/수익률 규칙
+FEE_FACTOR = 0.9995     # 매수 시 수수료를 고려해 사용 가능한 원화에서 제외하는 비율
+FEE_RATE = 0.0005       # 업비트 KRW 마켓 거래 수수료 (0.05%)
+MIN_ORDER_KRW = 5000    # 최소 주문 금액
+
+def get_buy_amount(krw_balance, percentage):
+    return krw_balance * (percentage / 100) * FEE_FACTOR  # 수수료 고려
+
+def get_sell_amount(btc_balance, percentage):
+    return btc_balance * (percentage / 100)
+
+def calculate_revenue_rate(current_value, initial_investment):
+    # 수익률 계산
+    return round(round((int(current_value) / initial_investment) * 100.0, 2) - 100, 2)